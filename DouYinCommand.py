@@ -34,6 +34,7 @@ from apiproxy.douyin.douyin import Douyin
 from apiproxy.douyin.download import Download
 from apiproxy.douyin import douyin_headers
 from apiproxy.common import utils
+from apiproxy.common.signer import set_default_signer
 
 @dataclass
 class DownloadConfig:
@@ -51,6 +52,9 @@ class DownloadConfig:
     thread: int = 5
     cookie: Optional[str] = None
     database: bool = True
+    database_path: str = "data.db"
+    database_compress: bool = False
+    signer: str = "xbogus"
     number: Dict[str, int] = field(default_factory=lambda: {
         "post": 0, "like": 0, "allmix": 0, "mix": 0, "music": 0
     })
@@ -91,6 +95,9 @@ configModel = {
         "music": 0,
     },
     'database': True,
+    'database_path': 'data.db',
+    'database_compress': False,
+    'signer': 'xbogus',
     "increase": {
         "post": False,
         "like": False,
@@ -99,6 +106,12 @@ configModel = {
         "music": False,
     },
     "thread": 5,
+    # Tham số tải file (dùng chung mục download: với downloader.py)
+    "download": {
+        "segments": 1,
+        "segment_threshold": 8 * 1024 * 1024,
+        "mirror_race": 2,
+    },
     "cookie": os.environ.get("DOUYIN_COOKIE", "")
 }
 
@@ -237,20 +250,30 @@ def main():
     os.makedirs(configModel["path"], exist_ok=True)
     douyin_logger.info(f"Đường dẫn lưu dữ liệu {configModel['path']}")
 
+    # Thuật toán ký URL dùng chung
+    set_default_signer(configModel["signer"])
+
     # Khởi tạo bộ tải
-    dy = Douyin(database=configModel["database"])
+    dy = Douyin(database=configModel["database"], db_path=configModel["database_path"],
+                compress=configModel["database_compress"])
     dl = Download(
         thread=configModel["thread"],
         music=configModel["music"],
         cover=configModel["cover"],
         avatar=configModel["avatar"],
         resjson=configModel["json"],
-        folderstyle=configModel["folderstyle"]
+        folderstyle=configModel["folderstyle"],
+        segments=configModel["download"]["segments"],
+        segment_threshold=configModel["download"]["segment_threshold"],
+        mirror_race=configModel["download"]["mirror_race"]
     )
 
-    # Xử lý từng liên kết
-    for link in configModel["link"]:
-        process_link(dy, dl, link)
+    # Xử lý từng liên kết, luôn giải phóng session và thread pool của bộ tải
+    try:
+        for link in configModel["link"]:
+            process_link(dy, dl, link)
+    finally:
+        dl.close()
 
     # Tính thời gian
     duration = time.time() - start
@@ -8,10 +8,10 @@ import re
 import os
 import sys
 import hashlib
-import base64
 import time
 
 import apiproxy
+from apiproxy.common.signer import form_salt, get_signer, ua_salt
 
 
 class Utils(object):
@@ -71,30 +71,14 @@ class Utils(object):
             return j
 
     def getXbogus(self, payload, form='', ua=apiproxy.ua):
-        xbogus = self.get_xbogus(payload, ua, form)
-        params = payload + "&X-Bogus=" + xbogus
-        return params
+        return get_signer('xbogus').sign_params(payload, ua, form)
 
-    def get_xbogus(self, payload, ua, form):
-        short_str = "Dkdpgh4ZKsQB80/Mfvw36XI1R25-WUAlEi7NLboqYTOPuzmFjJnryx9HVGcaStCe="
-        arr2 = self.get_arr2(payload, ua, form)
-
-        garbled_string = self.get_garbled_string(arr2)
-
-        xbogus = ""
+    def sign_many(self, payloads, form='', ua=apiproxy.ua):
+        """Ký nhiều payload cùng lúc (dùng chung một timestamp)"""
+        return get_signer('xbogus').sign_many(payloads, ua, form)
 
-        for i in range(0, 21, 3):
-            char_code_num0 = garbled_string[i]
-            char_code_num1 = garbled_string[i + 1]
-            char_code_num2 = garbled_string[i + 2]
-            base_num = char_code_num2 | char_code_num1 << 8 | char_code_num0 << 16
-            str1 = short_str[(base_num & 16515072) >> 18]
-            str2 = short_str[(base_num & 258048) >> 12]
-            str3 = short_str[(base_num & 4032) >> 6]
-            str4 = short_str[base_num & 63]
-            xbogus += str1 + str2 + str3 + str4
-
-        return xbogus
+    def get_xbogus(self, payload, ua, form):
+        return get_signer('xbogus').sign(payload, ua, form)
 
     def get_garbled_string(self, arr2):
         p = [
@@ -117,12 +101,8 @@ class Utils(object):
         salt_payload_bytes = hashlib.md5(hashlib.md5(payload.encode()).digest()).digest()
         salt_payload = [byte for byte in salt_payload_bytes]
 
-        salt_form_bytes = hashlib.md5(hashlib.md5(form.encode()).digest()).digest()
-        salt_form = [byte for byte in salt_form_bytes]
-
-        ua_key = ['\u0000', '\u0001', '\u000e']
-        salt_ua_bytes = hashlib.md5(base64.b64encode(self._0x30492c(ua_key, ua))).digest()
-        salt_ua = [byte for byte in salt_ua_bytes]
+        salt_form = list(form_salt(form))
+        salt_ua = list(ua_salt(b"\x00\x01\x0e", ua))
 
         timestamp = int(time.time())
         canvas = 1489154074
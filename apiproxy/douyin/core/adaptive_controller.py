@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bộ điều khiển đồng thời tự thích ứng (AIMD)
+Theo dõi phản hồi (429, phản hồi rỗng khi bị chặn mềm, 403 từ CDN, độ trễ)
+để tăng dần / giảm nhanh số worker và tốc độ request
+"""
+
+import asyncio
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Optional, Dict, Any, Iterable
+
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseSignal(Enum):
+    """Phân loại phản hồi dùng cho điều khiển"""
+    OK = "ok"                  # Thành công
+    THROTTLED = "throttled"    # HTTP 429
+    SOFT_BLOCK = "soft_block"  # 200 nhưng nội dung rỗng (Douyin chặn mềm)
+    FORBIDDEN = "forbidden"    # HTTP 403 (thường từ CDN)
+    ERROR = "error"            # Lỗi khác, không coi là tín hiệu nghẽn
+
+
+# Các tín hiệu cho thấy đang vượt ngưỡng giới hạn của server
+CONGESTION_SIGNALS = (ResponseSignal.THROTTLED, ResponseSignal.SOFT_BLOCK, ResponseSignal.FORBIDDEN)
+
+# Nguồn tín hiệu: phản hồi API chỉ điều chỉnh bucket API, phản hồi CDN chỉ điều chỉnh bucket media
+SCOPE_API = "api"
+SCOPE_MEDIA = "media"
+
+
+def classify_response(status: int, body: Optional[str] = None) -> ResponseSignal:
+    """
+    Phân loại phản hồi HTTP
+
+    Args:
+        status: Mã trạng thái HTTP
+        body: Nội dung phản hồi (None nếu không đọc)
+    """
+    if status == 429:
+        return ResponseSignal.THROTTLED
+    if status == 403:
+        return ResponseSignal.FORBIDDEN
+    if 200 <= status < 300:
+        if body is not None and not body.strip():
+            return ResponseSignal.SOFT_BLOCK
+        return ResponseSignal.OK
+    return ResponseSignal.ERROR
+
+
+class AIMDController:
+    """
+    Điều khiển số worker và tốc độ request theo kiểu AIMD
+
+    - Mỗi khi thành công đủ ``workers`` lần liên tiếp (một "vòng") và độ trễ p90
+      dưới ngưỡng: tăng thêm ``increase_step`` worker và ``rate_step`` tốc độ.
+    - Khi gặp 429/phản hồi rỗng/403 hoặc độ trễ p90 vượt ngưỡng: nhân số worker và
+      tốc độ với ``decrease_factor``; tối đa một lần giảm mỗi ``decrease_interval`` giây
+      để một loạt lỗi cùng lúc chỉ tính là một lần.
+    - Tín hiệu được tính riêng theo nguồn (``scope``): phản hồi API chỉ đổi tốc độ các
+      bucket API, phản hồi CDN chỉ đổi tốc độ bucket media; cả hai cùng điều chỉnh số worker.
+    """
+
+    def __init__(
+        self,
+        initial_workers: int = 5,
+        min_workers: int = 1,
+        max_workers: Optional[int] = None,
+        buckets: Optional[Iterable[TokenBucket]] = None,
+        rate_limiter=None,
+        media_buckets: Optional[Iterable[TokenBucket]] = None,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        max_rate_factor: float = 4.0,
+        min_rate: float = 0.2,
+        latency_target: float = 3.0,
+        latency_window: int = 100,
+        decrease_interval: float = 2.0,
+    ):
+        """
+        Khởi tạo bộ điều khiển
+
+        Args:
+            initial_workers: Số worker ban đầu
+            min_workers: Số worker tối thiểu
+            max_workers: Số worker tối đa (mặc định gấp đôi initial_workers)
+            buckets: Các token bucket API cần điều chỉnh tốc độ
+            rate_limiter: AdaptiveRateLimiter (tuỳ chọn), được báo record_failure khi API nghẽn
+            media_buckets: Các token bucket tải media (CDN) cần điều chỉnh tốc độ
+            increase_step: Số worker tăng mỗi vòng thành công
+            decrease_factor: Hệ số nhân khi giảm
+            max_rate_factor: Tốc độ tối đa so với tốc độ ban đầu của bucket
+            min_rate: Tốc độ tối thiểu của bucket (token/giây)
+            latency_target: Ngưỡng độ trễ p90 (giây)
+            latency_window: Số mẫu độ trễ gần nhất được giữ lại
+            decrease_interval: Khoảng cách tối thiểu giữa hai lần giảm (giây)
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers or 2 * initial_workers)
+        self.limit = float(min(max(initial_workers, self.min_workers), self.max_workers))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.min_rate = min_rate
+        self.max_rate_factor = max_rate_factor
+        self.latency_target = latency_target
+        self.decrease_interval = decrease_interval
+        self.rate_limiter = rate_limiter
+
+        # bucket -> (tốc độ ban đầu, bước tăng, nguồn tín hiệu)
+        self._buckets: Dict[TokenBucket, tuple] = {}
+        for bucket in buckets or ():
+            self.attach_bucket(bucket)
+        for bucket in media_buckets or ():
+            self.attach_bucket(bucket, SCOPE_MEDIA)
+
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._successes: Dict[str, int] = {}
+        self._last_decrease: Dict[str, float] = {}
+
+        # Cổng worker có giới hạn thay đổi được
+        self._active = 0
+        self._slot_waiters: deque = deque()
+
+        self.stats = {
+            'ok': 0,
+            'throttled': 0,
+            'soft_block': 0,
+            'forbidden': 0,
+            'error': 0,
+            'increases': 0,
+            'decreases': 0,
+        }
+
+    @property
+    def workers(self) -> int:
+        """Số worker được phép chạy đồng thời hiện tại"""
+        return int(self.limit)
+
+    def attach_bucket(self, bucket: TokenBucket, scope: str = SCOPE_API):
+        """Đưa một token bucket vào vòng điều khiển của nguồn tín hiệu scope"""
+        if bucket not in self._buckets:
+            self._buckets[bucket] = (bucket.rate, bucket.rate * 0.1, scope)
+
+    # ---- Cổng worker ----
+
+    async def acquire_slot(self):
+        """Chờ tới khi số worker đang chạy nhỏ hơn giới hạn hiện tại (FIFO)"""
+        if not self._slot_waiters and self._active < self.workers:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._slot_waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release_slot()
+            raise
+
+    def release_slot(self):
+        """Trả lại slot worker"""
+        self._active -= 1
+        self._wake_slots()
+
+    def _wake_slots(self):
+        """Giao slot cho người chờ khi còn chỗ"""
+        while self._slot_waiters and self._active < self.workers:
+            future = self._slot_waiters.popleft()
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Context giữ một slot worker"""
+        await self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    # ---- Tín hiệu phản hồi ----
+
+    def record(self, signal: ResponseSignal, latency: Optional[float] = None, scope: str = SCOPE_API):
+        """
+        Ghi nhận một phản hồi
+
+        Args:
+            signal: Phân loại phản hồi
+            latency: Độ trễ của request (giây), nếu có
+            scope: Nguồn phản hồi (SCOPE_API hoặc SCOPE_MEDIA)
+        """
+        self.stats[signal.value] += 1
+        if latency is not None:
+            self._latencies.append(latency)
+
+        if signal in CONGESTION_SIGNALS:
+            if self.rate_limiter is not None and scope == SCOPE_API:
+                self.rate_limiter.record_failure()
+            self._decrease(signal.value, scope)
+        elif signal == ResponseSignal.OK:
+            successes = self._successes.get(scope, 0) + 1
+            self._successes[scope] = successes
+            if successes >= self.workers:
+                self._successes[scope] = 0
+                # Mẫu độ trễ chỉ đến từ API, nên chỉ xét ở vòng của API
+                p90 = self.latency_percentile(0.9) if scope == SCOPE_API else None
+                if p90 is not None and p90 > self.latency_target:
+                    self._decrease(f"p90 {p90:.2f}s", scope)
+                else:
+                    self._increase(scope)
+
+    def record_response(self, status: int, body: Optional[str] = None, latency: Optional[float] = None,
+                        scope: str = SCOPE_API) -> ResponseSignal:
+        """Phân loại rồi ghi nhận phản hồi HTTP, trả về phân loại"""
+        signal = classify_response(status, body)
+        self.record(signal, latency, scope)
+        return signal
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Phân vị độ trễ trong các mẫu gần nhất"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _increase(self, scope: str = SCOPE_API):
+        """Tăng cộng số worker và tốc độ các bucket của scope"""
+        old = self.workers
+        self.limit = min(self.max_workers, self.limit + self.increase_step)
+        for bucket, (base_rate, step, bucket_scope) in self._buckets.items():
+            if bucket_scope == scope:
+                bucket.set_rate(min(base_rate * self.max_rate_factor, bucket.rate + step))
+        self.stats['increases'] += 1
+        if self.workers != old:
+            logger.debug(f"AIMD tăng số worker: {old} -> {self.workers}")
+            self._wake_slots()
+
+    def _decrease(self, reason: str, scope: str = SCOPE_API):
+        """Giảm nhân số worker và tốc độ các bucket của scope, tối đa một lần mỗi decrease_interval"""
+        now = time.monotonic()
+        self._successes[scope] = 0
+        if now - self._last_decrease.get(scope, 0.0) < self.decrease_interval:
+            return
+        self._last_decrease[scope] = now
+        old = self.workers
+        self.limit = max(self.min_workers, self.limit * self.decrease_factor)
+        for bucket, (_, _, bucket_scope) in self._buckets.items():
+            if bucket_scope == scope:
+                bucket.set_rate(max(self.min_rate, bucket.rate * self.decrease_factor))
+        self.stats['decreases'] += 1
+        if self.workers != old:
+            logger.warning(f"AIMD giảm tải ({reason}): worker {old} -> {self.workers}")
+        else:
+            logger.debug(f"AIMD giảm tốc độ ({reason}), worker giữ ở mức tối thiểu {self.workers}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lấy thông tin thống kê"""
+        return {
+            **self.stats,
+            'workers': self.workers,
+            'active': self._active,
+            'waiting': len(self._slot_waiters),
+            'p50_latency': self.latency_percentile(0.5),
+            'p90_latency': self.latency_percentile(0.9),
+            'rates': {bucket.name: round(bucket.rate, 3) for bucket in self._buckets},
+        }
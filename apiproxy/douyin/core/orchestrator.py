@@ -7,10 +7,13 @@ Bộ điều phối tải xuống
 """
 
 import asyncio
+import heapq
+import itertools
 import time
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict, deque
+from typing import Deque, List, Dict, Any, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -24,6 +27,7 @@ from apiproxy.douyin.strategies.base import (
 from apiproxy.douyin.strategies.api_strategy import EnhancedAPIStrategy
 from apiproxy.douyin.strategies.retry_strategy import RetryStrategy
 from .rate_limiter import AdaptiveRateLimiter, RateLimitConfig
+from .adaptive_controller import AIMDController
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +41,10 @@ class OrchestratorConfig:
         enable_rate_limit: bool = True,
         rate_limit_config: Optional[RateLimitConfig] = None,
         priority_queue: bool = True,
-        save_progress: bool = True
+        save_progress: bool = True,
+        history_size: int = 1000,
+        adaptive_concurrency: bool = True,
+        max_workers: Optional[int] = None
     ):
         self.max_concurrent = max_concurrent
         self.enable_retry = enable_retry
@@ -45,6 +52,11 @@ class OrchestratorConfig:
         self.rate_limit_config = rate_limit_config or RateLimitConfig()
         self.priority_queue = priority_queue
         self.save_progress = save_progress
+        # Số nhiệm vụ đã xong (hoàn thành/thất bại) giữ lại trong bộ nhớ
+        self.history_size = history_size
+        # Tự điều chỉnh số worker (AIMD) trong khoảng [1, max_workers], bắt đầu từ max_concurrent
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_workers = max_workers or 2 * max_concurrent
 
 
 class DownloadOrchestrator:
@@ -60,13 +72,27 @@ class DownloadOrchestrator:
         self.config = config or OrchestratorConfig()
         self.strategies: List[IDownloadStrategy] = []
         self.rate_limiter = AdaptiveRateLimiter(self.config.rate_limit_config) if self.config.enable_rate_limit else None
-        
-        # Hàng đợi nhiệm vụ
-        self.pending_queue = asyncio.Queue()
-        self.priority_tasks: List[DownloadTask] = []
+        if self.config.adaptive_concurrency:
+            self.controller = AIMDController(
+                initial_workers=self.config.max_concurrent,
+                max_workers=self.config.max_workers,
+                rate_limiter=self.rate_limiter
+            )
+        else:
+            concurrency = self.config.max_concurrent
+            self.controller = AIMDController(concurrency, concurrency, concurrency, rate_limiter=self.rate_limiter)
+        
+        # Hàng đợi nhiệm vụ: heap (-priority, seq, task), seq giữ thứ tự FIFO khi cùng ưu tiên
+        self.priority_tasks: List[tuple] = []
+        self._seq = itertools.count()
+        self._task_available = asyncio.Event()
+        # task_id -> nhiệm vụ đang chờ hoặc đang chạy
+        self.tasks: Dict[str, DownloadTask] = {}
         self.active_tasks: Dict[str, DownloadTask] = {}
-        self.completed_tasks: List[DownloadTask] = []
-        self.failed_tasks: List[DownloadTask] = []
+        # Lịch sử có giới hạn; số lượng đầy đủ nằm trong self.stats
+        self.completed_tasks: Deque[DownloadTask] = deque(maxlen=self.config.history_size)
+        self.failed_tasks: Deque[DownloadTask] = deque(maxlen=self.config.history_size)
+        self._finished: "OrderedDict[str, TaskStatus]" = OrderedDict()
         
         # Worker threads
         self.workers: List[asyncio.Task] = []
@@ -88,7 +114,7 @@ class DownloadOrchestrator:
     def _init_default_strategies(self):
         """Khởi tạo chiến lược mặc định"""
         # Chiến lược API
-        api_strategy = EnhancedAPIStrategy()
+        api_strategy = EnhancedAPIStrategy(controller=self.controller)
         
         # Nếu bật thử lại, bọc chiến lược
         if self.config.enable_retry:
@@ -133,17 +159,28 @@ class DownloadOrchestrator:
         )
         
         # Thêm vào hàng đợi
-        if self.config.priority_queue and priority > 0:
-            self.priority_tasks.append(task)
-            self.priority_tasks.sort(key=lambda t: t.priority, reverse=True)
-        else:
-            await self.pending_queue.put(task)
+        self.tasks[task.task_id] = task
+        self._push_task(task, priority if self.config.priority_queue else 0)
         
         self.stats['total_tasks'] += 1
         logger.info(f"Thêm nhiệm vụ: {task.task_id} ({task_type.value}) ưu tiên: {priority}")
         
         return task.task_id
     
+    def _push_task(self, task: DownloadTask, priority: int):
+        """Đưa nhiệm vụ vào heap, O(log n)"""
+        heapq.heappush(self.priority_tasks, (-priority, next(self._seq), task))
+        self._task_available.set()
+    
+    def _record_finished(self, task: DownloadTask, status: TaskStatus):
+        """Chuyển nhiệm vụ sang lịch sử có giới hạn"""
+        task.status = status
+        self.tasks.pop(task.task_id, None)
+        (self.completed_tasks if status == TaskStatus.COMPLETED else self.failed_tasks).append(task)
+        self._finished[task.task_id] = status
+        while len(self._finished) > 2 * self.config.history_size:
+            self._finished.popitem(last=False)
+    
     async def add_batch(self, urls: List[str], task_type: Optional[TaskType] = None) -> List[str]:
         """
         Thêm nhiệm vụ hàng loạt
@@ -173,8 +210,8 @@ class DownloadOrchestrator:
         self.running = True
         logger.info(f"Khởi động bộ điều phối, số đồng thời tối đa: {self.config.max_concurrent}")
         
-        # Tạo worker threads
-        for i in range(self.config.max_concurrent):
+        # Tạo worker threads (số chạy đồng thời do bộ điều khiển AIMD giới hạn)
+        for i in range(self.controller.max_workers):
             worker = asyncio.create_task(self._worker(i))
             self.workers.append(worker)
     
@@ -207,9 +244,7 @@ class DownloadOrchestrator:
         
         while self.running:
             # Kiểm tra xem tất cả nhiệm vụ đã hoàn thành chưa
-            if (self.pending_queue.empty() and 
-                not self.priority_tasks and 
-                not self.active_tasks):
+            if not self.priority_tasks and not self.active_tasks:
                 logger.info("Tất cả nhiệm vụ đã hoàn thành")
                 break
             
@@ -234,45 +269,49 @@ class DownloadOrchestrator:
         
         while self.running:
             try:
-                # Lấy nhiệm vụ
-                task = await self._get_next_task()
-                if task is None:
-                    await asyncio.sleep(0.1)
-                    continue
+                # Chỉ nhận nhiệm vụ khi bộ điều khiển AIMD còn cho phép thêm worker
+                async with self.controller.slot():
+                    # Lấy nhiệm vụ
+                    task = await self._get_next_task()
+                    if task is None:
+                        continue
                 
-                # Đánh dấu là nhiệm vụ đang hoạt động
-                self.active_tasks[task.task_id] = task
+                    # Đánh dấu là nhiệm vụ đang hoạt động
+                    task.status = TaskStatus.PROCESSING
+                    self.active_tasks[task.task_id] = task
                 
-                # Kiểm soát giới hạn tốc độ
-                if self.rate_limiter:
-                    await self.rate_limiter.acquire()
+                    # Kiểm soát giới hạn tốc độ
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire()
                 
-                # Thực thi nhiệm vụ
-                logger.info(f"Worker thread {worker_id} bắt đầu xử lý nhiệm vụ: {task.task_id}")
-                result = await self._execute_task(task)
+                    # Thực thi nhiệm vụ
+                    logger.info(f"Worker thread {worker_id} bắt đầu xử lý nhiệm vụ: {task.task_id}")
+                    result = await self._execute_task(task)
                 
-                # Xóa nhiệm vụ đang hoạt động
-                del self.active_tasks[task.task_id]
+                    # Xóa nhiệm vụ đang hoạt động
+                    del self.active_tasks[task.task_id]
                 
-                # Xử lý kết quả
-                if result.success:
-                    self.completed_tasks.append(task)
-                    self.stats['completed_tasks'] += 1
-                    logger.info(f"Nhiệm vụ {task.task_id} hoàn thành")
-                else:
-                    # Kiểm tra xem có cần thử lại không
-                    if task.increment_retry():
-                        logger.warning(f"Nhiệm vụ {task.task_id} thất bại, chuẩn bị thử lại ({task.retry_count}/{task.max_retries})")
-                        await self.pending_queue.put(task)
-                        self.stats['retried_tasks'] += 1
+                    # Xử lý kết quả
+                    if result.success:
+                        self._record_finished(task, TaskStatus.COMPLETED)
+                        self.stats['completed_tasks'] += 1
+                        logger.info(f"Nhiệm vụ {task.task_id} hoàn thành")
                     else:
-                        self.failed_tasks.append(task)
-                        self.stats['failed_tasks'] += 1
-                        logger.error(f"Nhiệm vụ {task.task_id} cuối cùng thất bại: {result.error_message}")
+                        # Kiểm tra xem có cần thử lại không
+                        if task.increment_retry():
+                            logger.warning(f"Nhiệm vụ {task.task_id} thất bại, chuẩn bị thử lại ({task.retry_count}/{task.max_retries})")
+                            # Nhiệm vụ thử lại xếp sau các nhiệm vụ có ưu tiên
+                            task.status = TaskStatus.RETRYING
+                            self._push_task(task, 0)
+                            self.stats['retried_tasks'] += 1
+                        else:
+                            self._record_finished(task, TaskStatus.FAILED)
+                            self.stats['failed_tasks'] += 1
+                            logger.error(f"Nhiệm vụ {task.task_id} cuối cùng thất bại: {result.error_message}")
                 
-                # Lưu tiến độ
-                if self.config.save_progress:
-                    await self._save_progress()
+                    # Lưu tiến độ
+                    if self.config.save_progress:
+                        await self._save_progress()
                 
             except asyncio.CancelledError:
                 logger.info(f"Worker thread {worker_id} bị hủy")
@@ -284,19 +323,18 @@ class DownloadOrchestrator:
         logger.info(f"Worker thread {worker_id} kết thúc")
     
     async def _get_next_task(self) -> Optional[DownloadTask]:
-        """Lấy nhiệm vụ tiếp theo"""
-        # Ưu tiên xử lý nhiệm vụ có ưu tiên cao
-        if self.priority_tasks:
-            return self.priority_tasks.pop(0)
-        
-        # Lấy từ hàng đợi thông thường
-        try:
-            return await asyncio.wait_for(
-                self.pending_queue.get(),
-                timeout=0.1
-            )
-        except asyncio.TimeoutError:
-            return None
+        """Lấy nhiệm vụ tiếp theo (ưu tiên cao trước, cùng ưu tiên thì vào trước ra trước)"""
+        if not self.priority_tasks:
+            # Chờ nhiệm vụ mới thay vì quay vòng liên tục
+            self._task_available.clear()
+            try:
+                await asyncio.wait_for(self._task_available.wait(), timeout=0.1)
+            except asyncio.TimeoutError:
+                return None
+            if not self.priority_tasks:
+                return None
+        
+        return heapq.heappop(self.priority_tasks)[-1]
     
     async def _execute_task(self, task: DownloadTask) -> DownloadResult:
         """
@@ -399,23 +437,10 @@ class DownloadOrchestrator:
         Returns:
             Trạng thái nhiệm vụ
         """
-        # Kiểm tra nhiệm vụ đang hoạt động
-        if task_id in self.active_tasks:
-            return self.active_tasks[task_id].status
-        
-        # Kiểm tra nhiệm vụ đã hoàn thành
-        for task in self.completed_tasks:
-            if task.task_id == task_id:
-                return TaskStatus.COMPLETED
-        
-        # Kiểm tra nhiệm vụ thất bại
-        for task in self.failed_tasks:
-            if task.task_id == task_id:
-                return TaskStatus.FAILED
-        
-        # Kiểm tra nhiệm vụ đang chờ
-        for task in self.priority_tasks:
-            if task.task_id == task_id:
-                return TaskStatus.PENDING
+        # Nhiệm vụ đang chờ hoặc đang hoạt động
+        task = self.tasks.get(task_id)
+        if task is not None:
+            return task.status
         
-        return None
\ No newline at end of file
+        # Nhiệm vụ đã xong (trong giới hạn lịch sử)
+        return self._finished.get(task_id)
\ No newline at end of file
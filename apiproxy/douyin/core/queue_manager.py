@@ -7,12 +7,16 @@ Hỗ trợ lưu trữ nhiệm vụ và khôi phục điểm dừng
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import sqlite3
+import threading
 import time
 import logging
 import pickle
-from typing import List, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Dict, Optional, Any, Tuple
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -22,41 +26,93 @@ from apiproxy.douyin.strategies.base import DownloadTask, TaskStatus, TaskType
 logger = logging.getLogger(__name__)
 
 
+_INSERT_TASK_SQL = '''
+    INSERT OR REPLACE INTO tasks (
+        task_id, url, task_type, priority, status, 
+        retry_count, max_retries, metadata, 
+        created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
 class PersistentQueue:
-    """Quản lý hàng đợi lưu trữ"""
+    """Quản lý hàng đợi lưu trữ
+
+    Database là nơi lưu toàn bộ nhiệm vụ chờ; trong bộ nhớ chỉ giữ một cửa sổ nhỏ (heap theo
+    priority), được nạp thêm từ sqlite theo thứ tự priority khi cạn, nên thời gian khởi động và
+    bộ nhớ không phụ thuộc vào số nhiệm vụ tồn đọng.
+    Mọi thao tác sqlite chạy trên một thread ghi duy nhất (không chặn event loop).
+    Cập nhật trạng thái được gom lại (bản mới nhất của mỗi nhiệm vụ) và ghi theo lô
+    sau flush_interval giây, khi đủ flush_batch_size, hoặc trước bất kỳ thao tác ghi khác.
+    """
     
     def __init__(
         self,
         db_path: str = "download_queue.db",
         max_size: int = 10000,
-        checkpoint_interval: int = 60
+        checkpoint_interval: int = 60,
+        window_size: int = 256,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 500
     ):
         """
         Khởi tạo quản lý hàng đợi
         
         Args:
             db_path: Đường dẫn file database
-            max_size: Dung lượng tối đa hàng đợi
+            max_size: Số nhiệm vụ tối đa giữ trong bộ nhớ (giới hạn trên của window_size)
             checkpoint_interval: Khoảng thời gian lưu checkpoint (giây)
+            window_size: Số nhiệm vụ nạp từ database mỗi lần cửa sổ bộ nhớ cạn
+            flush_interval: Thời gian tối đa giữ cập nhật trạng thái trong bộ nhớ (giây)
+            flush_batch_size: Số cập nhật trạng thái tối đa trước khi ghi ngay
         """
         self.db_path = Path(db_path)
         self.max_size = max_size
         self.checkpoint_interval = checkpoint_interval
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        
+        self.window_size = max(1, min(window_size, max_size))
         
         self.conn: Optional[sqlite3.Connection] = None
-        self.queue = asyncio.Queue(maxsize=max_size)
+        # Cửa sổ nhiệm vụ trong bộ nhớ: (-priority, created_at, seq, task)
+        self._window: List[tuple] = []
+        # Thứ hạng (-priority, created_at) của nhiệm vụ tốt nhất chỉ có trong database, None nếu
+        # mọi nhiệm vụ chờ đều đã nằm trong cửa sổ
+        self._backlog_rank: Optional[tuple] = None
+        self._seq = itertools.count()
+        self._task_added = asyncio.Event()
         self._checkpoint_task = None
         self._lock = asyncio.Lock()
         
+        # Thread ghi duy nhất sở hữu kết nối sqlite
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="queue-db")
+        # task_id -> các trường cần UPDATE, chưa ghi xuống database
+        self._pending_updates: Dict[str, Dict[str, Any]] = {}
+        self._updates_lock = threading.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        
         # Khởi tạo database
-        self._init_database()
+        self._call(self._init_database)
         
-        # Khôi phục các nhiệm vụ chưa hoàn thành
-        self._restore_tasks()
+        # Khôi phục các nhiệm vụ chưa hoàn thành (chỉ đặt lại trạng thái, nạp dần khi cần)
+        self._call(self._restore_tasks)
+        _, self._backlog_rank = self._call(self._load_window, 0)
+    
+    def _call(self, fn: Callable, *args):
+        """Chạy fn trên thread ghi và chờ kết quả (dùng từ code đồng bộ)"""
+        return self._executor.submit(fn, *args).result()
+    
+    async def _run(self, fn: Callable, *args):
+        """Chạy fn trên thread ghi mà không chặn event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
     
     def _init_database(self):
         """Khởi tạo database"""
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
         cursor = self.conn.cursor()
         
         # Tạo bảng nhiệm vụ
@@ -82,6 +138,7 @@ class PersistentQueue:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_status ON tasks(status)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_priority ON tasks(priority DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON tasks(created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_status_priority ON tasks(status, priority DESC, created_at)')
         
         # Tạo bảng tiến độ
         cursor.execute('''
@@ -112,28 +169,53 @@ class PersistentQueue:
             WHERE status = ?
         ''', (TaskStatus.PENDING.value, time.time(), TaskStatus.PROCESSING.value))
         
-        # Lấy tất cả nhiệm vụ đang chờ xử lý
-        cursor.execute('''
-            SELECT task_id, url, task_type, priority, retry_count, max_retries, metadata, created_at
-            FROM tasks
-            WHERE status IN (?, ?)
-            ORDER BY priority DESC, created_at ASC
-        ''', (TaskStatus.PENDING.value, TaskStatus.RETRYING.value))
-        
-        restored_count = 0
-        for row in cursor.fetchall():
-            task = self._row_to_task(row)
-            if task:
-                try:
-                    self.queue.put_nowait(task)
-                    restored_count += 1
-                except asyncio.QueueFull:
-                    break
-        
         self.conn.commit()
         
-        if restored_count > 0:
-            logger.info(f"Đã khôi phục {restored_count} nhiệm vụ chưa hoàn thành từ database")
+        if cursor.rowcount > 0:
+            logger.info(f"Đã khôi phục {cursor.rowcount} nhiệm vụ đang xử lý dở về trạng thái chờ")
+    
+    def _load_window(self, limit: int) -> Tuple[List[DownloadTask], Optional[tuple]]:
+        """Đọc các nhiệm vụ chờ có priority cao nhất (chạy trên thread ghi)
+
+        Trả về (nhiệm vụ, thứ hạng của nhiệm vụ tốt nhất còn lại trong database hoặc None).
+        """
+        # Ghi trước các cập nhật PROCESSING để không nạp lại nhiệm vụ đã lấy ra
+        self._apply_updates()
+        # Mỗi trạng thái một truy vấn để đi thẳng theo idx_status_priority (tránh sắp xếp toàn bảng)
+        rows = []
+        for status in (TaskStatus.PENDING, TaskStatus.RETRYING):
+            rows.extend(self.conn.execute('''
+                SELECT task_id, url, task_type, priority, retry_count, max_retries, metadata, created_at
+                FROM tasks
+                WHERE status = ?
+                ORDER BY priority DESC, created_at ASC
+                LIMIT ?
+            ''', (status.value, limit + 1)).fetchall())
+        rows.sort(key=lambda row: (-row[3], row[7]))
+        backlog_rank = (-rows[limit][3], rows[limit][7]) if len(rows) > limit else None
+        return [task for task in map(self._row_to_task, rows[:limit]) if task], backlog_rank
+    
+    def _push_window(self, task: DownloadTask):
+        heapq.heappush(self._window, (-task.priority, task.created_at, next(self._seq), task))
+    
+    def _needs_refill(self) -> bool:
+        """Cửa sổ rỗng, hoặc database còn nhiệm vụ xếp trên nhiệm vụ đầu cửa sổ"""
+        if not self._window:
+            return True
+        return self._backlog_rank is not None and self._backlog_rank < self._window[0][:2]
+    
+    async def _refill(self):
+        """Nạp lại cửa sổ từ database theo priority khi cửa sổ cạn hoặc không còn đúng thứ tự"""
+        # Dùng chung khoá với add_tasks: ghi database + đưa vào cửa sổ không xen giữa lần đọc này
+        async with self._lock:
+            if not self._needs_refill():
+                return
+            # Mọi nhiệm vụ trong cửa sổ cũng đang chờ trong database, nên đọc lại top theo
+            # priority là gộp cửa sổ với phần tồn đọng mà không bị trùng
+            tasks, self._backlog_rank = await self._run(self._load_window, self.window_size)
+            self._window = []
+            for task in tasks:
+                self._push_window(task)
     
     def _row_to_task(self, row: tuple) -> Optional[DownloadTask]:
         """Chuyển đổi hàng database thành đối tượng nhiệm vụ"""
@@ -161,6 +243,28 @@ class PersistentQueue:
             logger.error(f"Chuyển đổi nhiệm vụ thất bại: {e}")
             return None
     
+    @staticmethod
+    def _task_to_row(task: DownloadTask) -> tuple:
+        return (
+            task.task_id,
+            task.url,
+            task.task_type.value,
+            task.priority,
+            task.status.value,
+            task.retry_count,
+            task.max_retries,
+            json.dumps(task.metadata),
+            task.created_at,
+            task.updated_at
+        )
+    
+    def _write_tasks(self, rows: List[tuple]):
+        """Ghi các nhiệm vụ trong một transaction (chạy trên thread ghi)"""
+        # Ghi trước các cập nhật trạng thái đang chờ để giữ đúng thứ tự
+        self._apply_updates()
+        with self.conn:
+            self.conn.executemany(_INSERT_TASK_SQL, rows)
+    
     async def add_task(self, task: DownloadTask) -> bool:
         """
         Thêm nhiệm vụ vào hàng đợi
@@ -171,39 +275,43 @@ class PersistentQueue:
         Returns:
             Có thêm thành công không
         """
+        return await self.add_tasks([task]) == 1
+    
+    async def add_tasks(self, tasks: Iterable[DownloadTask]) -> int:
+        """
+        Thêm nhiều nhiệm vụ, lưu bằng executemany trong một transaction
+        
+        Args:
+            tasks: Các nhiệm vụ tải xuống
+        
+        Returns:
+            Số nhiệm vụ đã thêm
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return 0
         async with self._lock:
             try:
                 # Lưu vào database
-                cursor = self.conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO tasks (
-                        task_id, url, task_type, priority, status, 
-                        retry_count, max_retries, metadata, 
-                        created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    task.task_id,
-                    task.url,
-                    task.task_type.value,
-                    task.priority,
-                    task.status.value,
-                    task.retry_count,
-                    task.max_retries,
-                    json.dumps(task.metadata),
-                    task.created_at,
-                    task.updated_at
-                ))
-                self.conn.commit()
+                await self._run(self._write_tasks, [self._task_to_row(task) for task in tasks])
                 
-                # Thêm vào hàng đợi bộ nhớ
-                await self.queue.put(task)
+                # Chỉ thêm vào cửa sổ nếu còn chỗ và không xếp sau nhiệm vụ nào chỉ có trong
+                # database; phần còn lại được nạp theo priority khi cần
+                for task in tasks:
+                    rank = (-task.priority, task.created_at)
+                    if len(self._window) < self.window_size and (
+                            self._backlog_rank is None or rank <= self._backlog_rank):
+                        self._push_window(task)
+                    elif self._backlog_rank is None or rank < self._backlog_rank:
+                        self._backlog_rank = rank
+                self._task_added.set()
                 
-                logger.debug(f"Nhiệm vụ {task.task_id} đã được thêm vào hàng đợi")
-                return True
+                logger.debug(f"{len(tasks)} nhiệm vụ đã được thêm vào hàng đợi")
+                return len(tasks)
                 
             except Exception as e:
                 logger.error(f"Thêm nhiệm vụ thất bại: {e}")
-                return False
+                return 0
     
     async def get_task(self, timeout: float = 1.0) -> Optional[DownloadTask]:
         """
@@ -215,16 +323,28 @@ class PersistentQueue:
         Returns:
             Nhiệm vụ tải xuống
         """
-        try:
-            task = await asyncio.wait_for(self.queue.get(), timeout=timeout)
-            
-            # Cập nhật trạng thái database
-            await self.update_task_status(task.task_id, TaskStatus.PROCESSING)
-            
-            return task
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            if self._needs_refill():
+                await self._refill()
+            if self._window:
+                task = heapq.heappop(self._window)[-1]
+                
+                # Cập nhật trạng thái database
+                await self.update_task_status(task.task_id, TaskStatus.PROCESSING)
+                
+                return task
             
-        except asyncio.TimeoutError:
-            return None
+            # Không còn nhiệm vụ chờ: đợi add_tasks tới hết thời gian chờ
+            self._task_added.clear()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._task_added.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
     
     async def update_task_status(
         self,
@@ -242,32 +362,59 @@ class PersistentQueue:
             error_message: Thông báo lỗi
             result: Kết quả thực thi
         """
-        async with self._lock:
-            cursor = self.conn.cursor()
-            
-            update_fields = {
-                'status': status.value,
-                'updated_at': time.time()
-            }
-            
-            if error_message:
-                update_fields['error_message'] = error_message
-            
-            if result:
-                update_fields['result'] = json.dumps(result)
-            
-            if status == TaskStatus.COMPLETED:
-                update_fields['completed_at'] = time.time()
-            
-            # Xây dựng câu lệnh UPDATE
-            set_clause = ', '.join([f'{k} = ?' for k in update_fields.keys()])
-            values = list(update_fields.values()) + [task_id]
-            
-            cursor.execute(
-                f'UPDATE tasks SET {set_clause} WHERE task_id = ?',
-                values
-            )
-            self.conn.commit()
+        update_fields = {
+            'status': status.value,
+            'updated_at': time.time()
+        }
+        
+        if error_message:
+            update_fields['error_message'] = error_message
+        
+        if result:
+            update_fields['result'] = json.dumps(result)
+        
+        if status == TaskStatus.COMPLETED:
+            update_fields['completed_at'] = time.time()
+        
+        # Gộp với cập nhật chưa ghi của cùng nhiệm vụ (giống như chạy các UPDATE theo thứ tự)
+        with self._updates_lock:
+            self._pending_updates.setdefault(task_id, {}).update(update_fields)
+            pending = len(self._pending_updates)
+        
+        if pending >= self.flush_batch_size:
+            await self.flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._schedule_flush)
+    
+    def _schedule_flush(self):
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
+    
+    def _apply_updates(self):
+        """Ghi các cập nhật trạng thái đang chờ theo lô (chạy trên thread ghi)"""
+        with self._updates_lock:
+            updates, self._pending_updates = self._pending_updates, {}
+        if not updates or self.conn is None:
+            return
+        
+        # Nhóm theo tập trường để dùng executemany cho mỗi câu lệnh UPDATE
+        groups: Dict[tuple, List[list]] = {}
+        for task_id, fields in updates.items():
+            keys = tuple(sorted(fields))
+            groups.setdefault(keys, []).append([fields[k] for k in keys] + [task_id])
+        
+        with self.conn:
+            for keys, rows in groups.items():
+                set_clause = ', '.join([f'{k} = ?' for k in keys])
+                self.conn.executemany(f'UPDATE tasks SET {set_clause} WHERE task_id = ?', rows)
+    
+    async def flush(self):
+        """Ghi ngay các cập nhật trạng thái đang chờ"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self._run(self._apply_updates)
     
     async def requeue_task(self, task: DownloadTask):
         """
@@ -285,6 +432,10 @@ class PersistentQueue:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Lấy thông tin thống kê hàng đợi"""
+        return self._call(self._get_statistics)
+    
+    def _get_statistics(self) -> Dict[str, Any]:
+        self._apply_updates()
         cursor = self.conn.cursor()
         
         # Thống kê số nhiệm vụ theo trạng thái
@@ -321,14 +472,18 @@ class PersistentQueue:
             'retrying_tasks': status_counts.get(TaskStatus.RETRYING.value, 0),
             'success_rate': success_rate,
             'average_duration': avg_duration,
-            'queue_size': self.queue.qsize()
+            'queue_size': len(self._window)
         }
         
         return stats
     
     async def save_progress(self):
         """Lưu tiến độ vào database"""
-        stats = self.get_statistics()
+        await self._run(self._save_progress)
+        logger.debug("Đã lưu tiến độ")
+    
+    def _save_progress(self):
+        stats = self._get_statistics()
         
         cursor = self.conn.cursor()
         cursor.execute('''
@@ -347,8 +502,6 @@ class PersistentQueue:
             stats['average_duration']
         ))
         self.conn.commit()
-        
-        logger.debug("Đã lưu tiến độ")
     
     async def start_checkpoint(self):
         """Khởi động nhiệm vụ lưu checkpoint"""
@@ -388,6 +541,9 @@ class PersistentQueue:
         Returns:
             Danh sách bản ghi tiến độ
         """
+        return self._call(self._get_recent_progress, hours)
+    
+    def _get_recent_progress(self, hours: int) -> List[Dict]:
         cursor = self.conn.cursor()
         since = time.time() - hours * 3600
         
@@ -418,6 +574,10 @@ class PersistentQueue:
         Args:
             days: Giữ lại bản ghi trong bao nhiêu ngày gần đây
         """
+        self._call(self._cleanup_old_tasks, days)
+    
+    def _cleanup_old_tasks(self, days: int):
+        self._apply_updates()
         cursor = self.conn.cursor()
         cutoff = time.time() - days * 86400
         
@@ -442,6 +602,10 @@ class PersistentQueue:
         Returns:
             Danh sách nhiệm vụ
         """
+        return self._call(self._export_tasks, status)
+    
+    def _export_tasks(self, status: Optional[TaskStatus]) -> List[Dict]:
+        self._apply_updates()
         cursor = self.conn.cursor()
         
         if status:
@@ -476,11 +640,19 @@ class PersistentQueue:
         return tasks
     
     def close(self):
-        """Đóng kết nối database"""
+        """Ghi nốt các cập nhật, đóng kết nối database và dừng thread ghi"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
         if self.conn:
-            self.conn.close()
-            self.conn = None
+            self._call(self._close)
             logger.info("Đã đóng kết nối database")
+        self._executor.shutdown(wait=True)
+    
+    def _close(self):
+        self._apply_updates()
+        self.conn.close()
+        self.conn = None
     
     async def __aenter__(self):
         """Điểm vào quản lý context bất đồng bộ"""
@@ -10,7 +10,7 @@ import asyncio
 import time
 import logging
 from collections import deque
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -35,6 +35,287 @@ class RateLimitConfig:
     cooldown_time: int = 60  # Thời gian làm mát sau khi kích hoạt giới hạn (giây)
 
 
+class TokenBucket:
+    """
+    Bộ giới hạn tốc độ dạng token bucket
+
+    Token được nạp đều với tốc độ ``rate`` mỗi giây, tối đa ``capacity`` token,
+    nên cho phép bùng nổ ngắn mà vẫn giữ tốc độ trung bình. Người chờ được
+    phục vụ theo thứ tự FIFO; không có khóa nào bị giữ trong lúc chờ.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, name: str = "default"):
+        """
+        Khởi tạo token bucket
+
+        Args:
+            rate: Số token nạp lại mỗi giây
+            capacity: Dung lượng tối đa (kích thước bùng nổ), mặc định bằng max(1, rate)
+            name: Tên bucket (dùng cho log/thống kê)
+        """
+        if rate <= 0:
+            raise ValueError("rate phải lớn hơn 0")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: deque = deque()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.stats = {'acquired': 0, 'waited': 0, 'rejected': 0}
+
+    def _refill(self):
+        """Nạp lại token theo thời gian đã trôi qua"""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Số token hiện có"""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Lấy token không chờ
+
+        Returns:
+            True nếu lấy được; False nếu thiếu token hoặc đã có người xếp hàng trước
+        """
+        self._refill()
+        if not self._waiters and self._tokens >= tokens:
+            self._tokens -= tokens
+            self.stats['acquired'] += 1
+            return True
+        self.stats['rejected'] += 1
+        return False
+
+    async def acquire(self, tokens: float = 1):
+        """Lấy token, chờ theo thứ tự FIFO nếu bucket đang cạn"""
+        if tokens > self.capacity:
+            raise ValueError(f"Yêu cầu {tokens} token vượt quá dung lượng {self.capacity}")
+        self._refill()
+        if not self._waiters and self._tokens >= tokens:
+            self._tokens -= tokens
+            self.stats['acquired'] += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((future, tokens))
+        self.stats['waited'] += 1
+        self._schedule(loop)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Đã được cấp token nhưng bị hủy: trả lại cho người kế tiếp
+                self._tokens = min(self.capacity, self._tokens + tokens)
+            self._schedule(loop)
+            raise
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop):
+        """Cấp token cho người chờ đầu hàng, hẹn giờ cho lần cấp tiếp theo"""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+        while self._waiters:
+            future, tokens = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self._wakeup = loop.call_later(delay, self._schedule, loop)
+                return
+            self._tokens -= tokens
+            self._waiters.popleft()
+            self.stats['acquired'] += 1
+            future.set_result(None)
+
+    def set_rate(self, rate: float):
+        """Đổi tốc độ nạp token (dùng cho điều khiển tự thích ứng)"""
+        self._refill()
+        self.rate = max(1e-6, float(rate))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lấy thông tin thống kê"""
+        return {
+            **self.stats,
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'tokens': round(self.tokens, 3),
+            'waiting': len(self._waiters),
+        }
+
+    async def __aenter__(self):
+        """Điểm vào quản lý context bất đồng bộ"""
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Điểm ra quản lý context bất đồng bộ"""
+        pass
+
+
+# Nhóm endpoint -> (token mỗi giây, dung lượng bùng nổ)
+DEFAULT_ENDPOINT_RATES: Dict[str, tuple] = {
+    'post': (2.0, 4),      # Danh sách tác phẩm/yêu thích của người dùng
+    'detail': (2.0, 4),    # Chi tiết tác phẩm
+    'mix': (2.0, 4),       # Bộ sưu tập
+    'music': (2.0, 4),     # Nhạc
+    'media': (20.0, 40),   # Tải file từ CDN
+    'default': (2.0, 4),
+}
+
+
+class EndpointRateLimiter:
+    """
+    Tập hợp token bucket theo nhóm endpoint
+
+    Mỗi nhóm (post, detail, mix, music, media) có bucket riêng, nên tải media
+    không tiêu hao ngân sách API và ngược lại.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Union[float, Dict[str, float], tuple]]] = None):
+        """
+        Khởi tạo bộ giới hạn theo endpoint
+
+        Args:
+            rates: Ghi đè cấu hình từng nhóm; giá trị là số (token/giây),
+                   tuple (rate, burst) hoặc dict {'rate': ..., 'burst': ...}
+        """
+        self._rates: Dict[str, tuple] = dict(DEFAULT_ENDPOINT_RATES)
+        for endpoint, value in (rates or {}).items():
+            self._rates[endpoint] = self._parse_rate(value)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _parse_rate(value) -> tuple:
+        """Chuẩn hóa cấu hình của một nhóm thành (rate, burst)"""
+        if isinstance(value, dict):
+            rate = float(value.get('rate', value.get('max_per_second', 2)))
+            return rate, value.get('burst', max(1.0, rate))
+        if isinstance(value, (tuple, list)):
+            return float(value[0]), value[1]
+        rate = float(value)
+        return rate, max(1.0, rate)
+
+    def bucket(self, endpoint: str = 'default') -> TokenBucket:
+        """Lấy (hoặc tạo) bucket của nhóm endpoint"""
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            rate, burst = self._rates.get(endpoint, self._rates['default'])
+            bucket = self._buckets[endpoint] = TokenBucket(rate, burst, name=endpoint)
+        return bucket
+
+    async def acquire(self, endpoint: str = 'default', tokens: float = 1):
+        """Lấy token của nhóm endpoint, chờ nếu cần"""
+        await self.bucket(endpoint).acquire(tokens)
+
+    def try_acquire(self, endpoint: str = 'default', tokens: float = 1) -> bool:
+        """Lấy token của nhóm endpoint không chờ"""
+        return self.bucket(endpoint).try_acquire(tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Thống kê theo từng nhóm endpoint"""
+        return {name: bucket.get_stats() for name, bucket in self._buckets.items()}
+
+
+_shared_limiter: Optional[EndpointRateLimiter] = None
+
+
+def get_shared_limiter(rates: Optional[Dict[str, Any]] = None) -> EndpointRateLimiter:
+    """
+    Lấy bộ giới hạn dùng chung trong tiến trình
+
+    Args:
+        rates: Cấu hình nhóm endpoint, chỉ có tác dụng ở lần gọi đầu tiên
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = EndpointRateLimiter(rates)
+    return _shared_limiter
+
+
+class SlidingWindowCounter:
+    """
+    Bộ đếm cửa sổ trượt dạng vòng (ring) gồm các ô thời gian cố định
+
+    Mỗi ô đếm số sự kiện trong khoảng ``window / buckets`` giây; tổng được cập nhật
+    dần khi ghi và khi ô hết hạn, nên ``count`` có chi phí hằng số (tối đa
+    ``buckets + 1`` ô, không phụ thuộc số request). Đếm theo hướng an toàn: ô cũ nhất
+    chỉ bị bỏ khi cả cửa sổ đã trượt qua nó, nên có thể đếm dư tối đa một ô nhưng
+    không bao giờ đếm thiếu.
+    """
+
+    def __init__(self, window: float, buckets: int):
+        """
+        Args:
+            window: Độ dài cửa sổ (giây)
+            buckets: Số ô trên một cửa sổ
+        """
+        self.window = float(window)
+        self.buckets = buckets
+        # Thêm một ô cho phần cũ nhất còn nằm một phần trong cửa sổ
+        self.size = buckets + 1
+        self._counts = [0] * self.size
+        self._total = 0
+        self._head = 0  # Chỉ số tuyệt đối của ô mới nhất
+
+    def _slot(self, now: float) -> int:
+        # Nhân trước rồi chia: now // width với width thập phân làm tròn sai (100.0 // 0.1 == 999)
+        return int(now * self.buckets / self.window)
+
+    def _advance(self, now: float):
+        """Xóa các ô đã ra khỏi cửa sổ"""
+        slot = self._slot(now)
+        if slot <= self._head:
+            return
+        if slot - self._head >= self.size:
+            self._counts = [0] * self.size
+            self._total = 0
+        else:
+            for index in range(self._head + 1, slot + 1):
+                i = index % self.size
+                self._total -= self._counts[i]
+                self._counts[i] = 0
+        self._head = slot
+
+    def add(self, now: float, amount: int = 1):
+        """Ghi nhận sự kiện tại thời điểm now"""
+        self._advance(now)
+        self._counts[self._head % self.size] += amount
+        self._total += amount
+
+    def count(self, now: float) -> int:
+        """Số sự kiện trong cửa sổ tính đến now"""
+        self._advance(now)
+        return self._total
+
+    def time_until_below(self, limit: int, now: float) -> float:
+        """Thời gian (giây) đến khi số sự kiện trong cửa sổ nhỏ hơn limit"""
+        total = self.count(now)
+        if total < limit:
+            return 0.0
+        # Duyệt từ ô cũ nhất; ô index bị bỏ khi ô hiện tại đạt index + size
+        for offset in range(self.size - 1, -1, -1):
+            index = self._head - offset
+            total -= self._counts[index % self.size]
+            if total < limit:
+                return max(0.0, (index + self.size) * self.window / self.buckets - now)
+        return self.window
+
+    def reset(self):
+        """Xóa toàn bộ bộ đếm"""
+        self._counts = [0] * self.size
+        self._total = 0
+
+
 class AdaptiveRateLimiter:
     """Bộ giới hạn tốc độ tự thích ứng"""
     
@@ -46,10 +327,18 @@ class AdaptiveRateLimiter:
             config: Cấu hình giới hạn tốc độ
         """
         self.config = config or RateLimitConfig()
-        self.requests = deque()
-        self.failures = deque()
         self.lock = asyncio.Lock()
         
+        # Bộ đếm cửa sổ trượt: mỗi lần kiểm tra có chi phí hằng số
+        self.windows = {
+            'second': SlidingWindowCounter(1, 10),
+            'minute': SlidingWindowCounter(60, 60),
+            'hour': SlidingWindowCounter(3600, 60),
+        }
+        self.burst_window = SlidingWindowCounter(0.1, 5)
+        self.failures_minute = SlidingWindowCounter(60, 60)
+        self.failures_recent = SlidingWindowCounter(10, 10)
+        
         # Giá trị giới hạn hiện tại (có thể điều chỉnh động)
         self.current_max_per_second = self.config.max_per_second
         self.current_max_per_minute = self.config.max_per_minute
@@ -74,42 +363,40 @@ class AdaptiveRateLimiter:
         Returns:
             Có được quyền không
         """
-        async with self.lock:
-            now = time.time()
-            
-            # Kiểm tra xem có đang trong thời gian làm mát không
-            if self.cooldown_until > now:
-                remaining = self.cooldown_until - now
-                logger.warning(f"Bộ giới hạn tốc độ đang trong thời gian làm mát, cần chờ thêm {remaining:.1f} giây")
-                await asyncio.sleep(remaining)
-                self.cooldown_until = 0
-            
-            # Dọn dẹp các bản ghi đã hết hạn
-            self._clean_old_records(now)
-            
-            # Kiểm tra giới hạn tốc độ
-            while not self._can_proceed(now):
-                # Tính toán thời gian cần chờ
-                wait_time = self._calculate_wait_time(now)
-                if wait_time > 0:
-                    logger.debug(f"Giới hạn tốc độ, chờ {wait_time:.2f} giây")
-                    await asyncio.sleep(wait_time)
-                    now = time.time()
-                    self._clean_old_records(now)
+        # Khóa chỉ bảo vệ phần kiểm tra/ghi nhận; việc chờ diễn ra ngoài khóa
+        while True:
+            async with self.lock:
+                now = time.time()
+                
+                # Kiểm tra xem có đang trong thời gian làm mát không
+                if self.cooldown_until > now:
+                    wait_time = self.cooldown_until - now
+                    logger.warning(f"Bộ giới hạn tốc độ đang trong thời gian làm mát, cần chờ thêm {wait_time:.1f} giây")
                 else:
-                    # Không thể tiếp tục, ghi lại request bị chặn
-                    self.stats['blocked_requests'] += 1
-                    return False
-            
-            # Ghi lại request
-            self.requests.append(now)
-            self.stats['total_requests'] += 1
-            
-            # Điều chỉnh tự thích ứng
-            if self.config.strategy == RateLimitStrategy.ADAPTIVE:
-                self._adjust_rate()
+                    self.cooldown_until = 0
+                    
+                    if self._can_proceed(now):
+                        # Ghi lại request
+                        for counter in self.windows.values():
+                            counter.add(now)
+                        self.burst_window.add(now)
+                        self.stats['total_requests'] += 1
+                        
+                        # Điều chỉnh tự thích ứng
+                        if self.config.strategy == RateLimitStrategy.ADAPTIVE:
+                            self._adjust_rate()
+                        
+                        return True
+                    
+                    # Tính toán thời gian cần chờ
+                    wait_time = self._calculate_wait_time(now)
+                    if wait_time <= 0:
+                        # Không thể tiếp tục, ghi lại request bị chặn
+                        self.stats['blocked_requests'] += 1
+                        return False
+                    logger.debug(f"Giới hạn tốc độ, chờ {wait_time:.2f} giây")
             
-            return True
+            await asyncio.sleep(wait_time)
     
     async def __aenter__(self):
         """Điểm vào quản lý context bất đồng bộ"""
@@ -125,92 +412,72 @@ class AdaptiveRateLimiter:
     def record_failure(self):
         """Ghi lại request thất bại"""
         now = time.time()
-        self.failures.append(now)
+        self.failures_minute.add(now)
+        self.failures_recent.add(now)
         
         # Điều chỉnh tự thích ứng
         if self.config.strategy == RateLimitStrategy.ADAPTIVE:
             self._handle_failure()
     
+    def _limits(self) -> Dict[str, int]:
+        """Giới hạn hiện tại của từng cửa sổ"""
+        return {
+            'second': self.current_max_per_second,
+            'minute': self.current_max_per_minute,
+            'hour': self.current_max_per_hour,
+        }
+    
     def _can_proceed(self, now: float) -> bool:
         """Kiểm tra xem có thể tiếp tục request không"""
-        # Kiểm tra giới hạn mỗi giây
-        recent_second = [r for r in self.requests if now - r < 1]
-        if len(recent_second) >= self.current_max_per_second:
-            return False
-        
-        # Kiểm tra giới hạn mỗi phút
-        recent_minute = [r for r in self.requests if now - r < 60]
-        if len(recent_minute) >= self.current_max_per_minute:
-            return False
-        
-        # Kiểm tra giới hạn mỗi giờ
-        recent_hour = [r for r in self.requests if now - r < 3600]
-        if len(recent_hour) >= self.current_max_per_hour:
-            return False
+        for name, limit in self._limits().items():
+            if self.windows[name].count(now) >= limit:
+                return False
         
         # Kiểm tra chế độ bùng nổ
         if self.config.strategy == RateLimitStrategy.BURST:
-            recent_burst = [r for r in self.requests if now - r < 0.1]
-            if len(recent_burst) >= self.config.burst_size:
+            if self.burst_window.count(now) >= self.config.burst_size:
                 return False
         
         return True
     
     def _calculate_wait_time(self, now: float) -> float:
         """Tính toán thời gian cần chờ"""
-        wait_times = []
-        
-        # Tính toán thời gian chờ cho giới hạn mỗi giây
-        recent_second = [r for r in self.requests if now - r < 1]
-        if len(recent_second) >= self.current_max_per_second:
-            oldest_in_second = min(recent_second)
-            wait_times.append(1 - (now - oldest_in_second))
-        
-        # Tính toán thời gian chờ cho giới hạn mỗi phút
-        recent_minute = [r for r in self.requests if now - r < 60]
-        if len(recent_minute) >= self.current_max_per_minute:
-            oldest_in_minute = min(recent_minute)
-            wait_times.append(60 - (now - oldest_in_minute))
-        
-        # Trả về thời gian chờ tối thiểu
-        return min(wait_times) if wait_times else 0.1
-    
-    def _clean_old_records(self, now: float):
-        """Dọn dẹp các bản ghi đã hết hạn"""
-        # Giữ lại bản ghi request trong 1 giờ gần đây
-        while self.requests and now - self.requests[0] > 3600:
-            self.requests.popleft()
+        wait_times = [
+            self.windows[name].time_until_below(limit, now)
+            for name, limit in self._limits().items()
+        ]
+        if self.config.strategy == RateLimitStrategy.BURST:
+            wait_times.append(self.burst_window.time_until_below(self.config.burst_size, now))
         
-        # Giữ lại bản ghi thất bại trong 10 phút gần đây
-        while self.failures and now - self.failures[0] > 600:
-            self.failures.popleft()
+        # Cửa sổ chặn lâu nhất quyết định thời gian chờ
+        wait_time = max(wait_times)
+        return wait_time if wait_time > 0 else 0.1
     
     def _adjust_rate(self):
         """Điều chỉnh tốc độ tự thích ứng"""
         now = time.time()
         
         # Tính toán tỷ lệ thất bại
-        recent_failures = [f for f in self.failures if now - f < 60]
-        recent_requests = [r for r in self.requests if now - r < 60]
+        recent_failures = self.failures_minute.count(now)
+        recent_requests = self.windows['minute'].count(now)
         
-        if len(recent_requests) > 10:
-            failure_rate = len(recent_failures) / len(recent_requests)
+        if recent_requests > 10:
+            failure_rate = recent_failures / recent_requests
             self.stats['failure_rate'] = failure_rate
             
             if failure_rate > 0.3:
                 # Tỷ lệ thất bại quá cao, giảm tốc độ
                 self._decrease_rate()
-            elif failure_rate < 0.05 and len(recent_requests) > 20:
+            elif failure_rate < 0.05 and recent_requests > 20:
                 # Tỷ lệ thất bại rất thấp, thử tăng tốc độ
                 self._increase_rate()
     
     def _handle_failure(self):
         """Xử lý thất bại, điều chỉnh chiến lược giới hạn tốc độ"""
         now = time.time()
-        recent_failures = [f for f in self.failures if now - f < 10]
         
         # Nếu số lần thất bại trong thời gian ngắn quá nhiều, kích hoạt làm mát
-        if len(recent_failures) >= 5:
+        if self.failures_recent.count(now) >= 5:
             logger.warning(f"Phát hiện thất bại thường xuyên, vào thời gian làm mát {self.config.cooldown_time} giây")
             self.cooldown_until = now + self.config.cooldown_time
             self._decrease_rate()
@@ -252,8 +519,20 @@ class AdaptiveRateLimiter:
             logger.info(f"Tăng tốc độ request: {old_rate}/s -> {self.current_max_per_second}/s")
     
     def get_stats(self) -> Dict[str, Any]:
-        """Lấy thông tin thống kê"""
-        return self.stats.copy()
+        """Lấy thông tin thống kê, kèm mức sử dụng hiện tại của từng cửa sổ"""
+        now = time.time()
+        stats = self.stats.copy()
+        stats['windows'] = {
+            name: {
+                'count': self.windows[name].count(now),
+                'limit': limit,
+                'utilization': round(self.windows[name].count(now) / limit, 3) if limit else 0.0,
+            }
+            for name, limit in self._limits().items()
+        }
+        stats['recent_failures'] = self.failures_minute.count(now)
+        stats['cooldown_remaining'] = max(0.0, self.cooldown_until - now)
+        return stats
     
     def reset_stats(self):
         """Đặt lại thông tin thống kê"""
@@ -271,8 +550,8 @@ class AdaptiveRateLimiter:
         logger.info(f"Thiết lập thời gian làm mát thủ công {seconds} giây")
 
 
-class SimpleRateLimiter:
-    """Bộ giới hạn tốc độ đơn giản (tốc độ cố định)"""
+class SimpleRateLimiter(TokenBucket):
+    """Bộ giới hạn tốc độ đơn giản (tốc độ cố định, không bùng nổ)"""
     
     def __init__(self, requests_per_second: float = 1.0):
         """
@@ -281,28 +560,6 @@ class SimpleRateLimiter:
         Args:
             requests_per_second: Số request cho phép mỗi giây
         """
+        super().__init__(requests_per_second, capacity=1, name="simple")
         self.requests_per_second = requests_per_second
         self.min_interval = 1.0 / requests_per_second
-        self.last_request_time = 0
-        self.lock = asyncio.Lock()
-    
-    async def acquire(self):
-        """Lấy quyền request"""
-        async with self.lock:
-            now = time.time()
-            time_since_last = now - self.last_request_time
-            
-            if time_since_last < self.min_interval:
-                sleep_time = self.min_interval - time_since_last
-                await asyncio.sleep(sleep_time)
-            
-            self.last_request_time = time.time()
-    
-    async def __aenter__(self):
-        """Điểm vào quản lý context bất đồng bộ"""
-        await self.acquire()
-        return self
-    
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Điểm ra quản lý context bất đồng bộ"""
-        pass
\ No newline at end of file
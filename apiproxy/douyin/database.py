@@ -2,25 +2,249 @@
 # -*- coding: utf-8 -*-
 
 
+import argparse
+import atexit
+import logging
 import sqlite3
 import json
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("douyin_downloader")
+
+# Tiền tố của rawdata nén: b'ZD' + id từ điển (uint32, 0 = không dùng từ điển) + dữ liệu zlib
+_BLOB_MAGIC = b'ZD'
+_BLOB_HEADER = struct.Struct('>2sI')
+# zlib chỉ dùng được tối đa 32KB cuối của từ điển
+_ZDICT_SIZE = 32 * 1024
+_ZDICT_SAMPLES = 64
+
+# Phiên bản schema hiện tại, lưu trong bảng schema_version
+# 1: schema cũ (aweme_id unique toàn cục, t_mix không có index)
+# 2: khoá unique kết hợp theo phạm vi (sec_uid/mix_id/music_id, aweme_id)
+SCHEMA_VERSION = 2
 
 
 class DataBase(object):
-    def __init__(self):
-        self.conn = sqlite3.connect('data.db')
+    """Lưu lịch sử tải xuống vào SQLite
+
+    Ghi theo kiểu write-behind: các insert_* chỉ đưa bản ghi vào bộ đệm, một thread ghi riêng
+    (sở hữu kết nối ghi duy nhất) ghi bộ đệm bằng executemany trong một transaction khi đủ
+    batch_size dòng hoặc sau flush_interval giây. Mỗi thread đọc có kết nối đọc riêng; nhờ WAL và
+    busy_timeout, nhiều lần tải song song và nhiều tiến trình có thể dùng chung một file.
+    Dùng flush()/close() (hoặc with DataBase() as db) để chắc chắn dữ liệu đã xuống đĩa;
+    khi thoát chương trình close() cũng được gọi tự động.
+
+    Các has_* kiểm tra trong một tập aweme_id nạp một lần cho mỗi sec_uid/mix_id/music_id,
+    thay vì một câu SELECT cho mỗi tác phẩm.
+
+    compress=True lưu rawdata mới dưới dạng zlib nén với từ điển dùng chung (huấn luyện từ các
+    bản ghi sẵn có, lưu trong t_zdict). get_* luôn trả về chuỗi JSON dù bản ghi có nén hay không;
+    chuyển dữ liệu cũ bằng: python -m apiproxy.douyin.database migrate --db data.db
+    """
+
+    _INSERT_SQL = {
+        't_user_post': "insert or ignore into t_user_post (sec_uid, aweme_id, rawdata) values(?,?,?);",
+        't_user_like': "insert or ignore into t_user_like (sec_uid, aweme_id, rawdata) values(?,?,?);",
+        't_mix': "insert or ignore into t_mix (sec_uid, mix_id, aweme_id, rawdata) values(?,?,?,?);",
+        't_music': "insert or ignore into t_music (music_id, aweme_id, rawdata) values(?,?,?);",
+    }
+
+    _TABLE_SQL = {
+        't_user_post': """CREATE TABLE if not exists t_user_post (
+                        id integer primary key autoincrement,
+                        sec_uid varchar(200),
+                        aweme_id integer,
+                        rawdata json
+                    );""",
+        't_user_like': """CREATE TABLE if not exists t_user_like (
+                        id integer primary key autoincrement,
+                        sec_uid varchar(200),
+                        aweme_id integer,
+                        rawdata json
+                    );""",
+        't_mix': """CREATE TABLE if not exists t_mix (
+                        id integer primary key autoincrement,
+                        sec_uid varchar(200),
+                        mix_id varchar(200),
+                        aweme_id integer,
+                        rawdata json
+                    );""",
+        't_music': """CREATE TABLE if not exists t_music (
+                        id integer primary key autoincrement,
+                        music_id varchar(200),
+                        aweme_id integer,
+                        rawdata json
+                    );""",
+    }
+
+    # Index unique kết hợp, cũng là index cho các truy vấn get_*/has_*
+    _INDEX_SQL = {
+        't_user_post': "CREATE UNIQUE INDEX if not exists ux_user_post_sec_aweme on t_user_post (sec_uid, aweme_id);",
+        't_user_like': "CREATE UNIQUE INDEX if not exists ux_user_like_sec_aweme on t_user_like (sec_uid, aweme_id);",
+        't_mix': "CREATE UNIQUE INDEX if not exists ux_mix_sec_mix_aweme on t_mix (sec_uid, mix_id, aweme_id);",
+        't_music': "CREATE UNIQUE INDEX if not exists ux_music_music_aweme on t_music (music_id, aweme_id);",
+    }
+
+    # Câu lệnh nạp tập aweme_id đã biết theo phạm vi (sec_uid / sec_uid+mix_id / music_id)
+    _SEEN_SQL = {
+        't_user_post': "select aweme_id from t_user_post where sec_uid=?;",
+        't_user_like': "select aweme_id from t_user_like where sec_uid=?;",
+        't_mix': "select aweme_id from t_mix where sec_uid=? and mix_id=?;",
+        't_music': "select aweme_id from t_music where music_id=?;",
+    }
+
+    def __init__(self, db_path: str = 'data.db', batch_size: int = 200, flush_interval: float = 1.0,
+                 compress: bool = False, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        # Kết nối ghi: chỉ dùng khi giữ _write_lock (thread ghi, khởi tạo schema, migrate)
+        self.conn = self._connect()
         self.cursor = self.conn.cursor()
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self._write_lock = threading.Lock()
+        # Kết nối đọc riêng cho từng thread
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._pending: Dict[str, List[Tuple]] = {table: [] for table in self._INSERT_SQL}
+        # Khoá tra cứu của các dòng chưa ghi xong, để get_* vẫn thấy bản ghi vừa thêm
+        self._pending_keys = set()
+        self._pending_count = 0
+        self._pending_since = 0.0
+        self._flush_requested = 0
+        self._flush_done = 0
+        self._seen_sets: Dict[Tuple, Set[int]] = {}
+        self._closed = False
         self.create_user_post_table()
         self.create_user_like_table()
         self.create_mix_table()
         self.create_music_table()
+        self.create_zdict_table()
+        self.migrate_schema()
+        self.compress = compress
+        self._zdicts: Dict[int, bytes] = {}
+        self._zdict_id: Optional[int] = None
+        if compress:
+            self._zdict_id = self._latest_zdict_id()
+            if self._zdict_id is None:
+                self._zdict_id = self.train_dictionary()
+        self._writer = threading.Thread(target=self._writer_loop, name="douyin-db-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
-    def create_user_post_table(self):
-        sql = """CREATE TABLE if not exists t_user_post (
+    def _connect(self) -> sqlite3.Connection:
+        # Kết nối có thể được tạo ở thread này và đóng ở thread khác (close), việc dùng chung đã có khoá
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)};")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Kết nối đọc của thread hiện tại (tạo khi cần)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _enqueue(self, table: str, key: Tuple, row: Tuple):
+        """Đưa một dòng vào bộ đệm, ghi ngay nếu bộ đệm đã đầy"""
+        with self._lock:
+            if self._closed:
+                return
+            self._pending[table].append(row)
+            self._pending_keys.add((table,) + key)
+            self._pending_count += 1
+            seen = self._seen_sets.get((table,) + key[:-1])
+            if seen is not None:
+                seen.add(key[-1])
+            if self._pending_count == 1:
+                self._pending_since = time.monotonic()
+                self._cond.notify_all()
+            elif self._pending_count >= self.batch_size:
+                self._cond.notify_all()
+
+    def _writer_loop(self):
+        """Thread ghi: gom bộ đệm và ghi theo lô, tuần tự hoá mọi lần ghi của instance này"""
+        while True:
+            with self._cond:
+                while not self._closed and self._flush_requested == self._flush_done:
+                    if self._pending_count >= self.batch_size:
+                        break
+                    if self._pending_count:
+                        remaining = self._pending_since + (self.flush_interval or 0) - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                requested = self._flush_requested
+                batch = {table: rows for table, rows in self._pending.items() if rows}
+                keys = self._pending_keys.copy()
+                self._pending = {table: [] for table in self._INSERT_SQL}
+                self._pending_count = 0
+                closing = self._closed
+
+            ok = self._write_batch(batch) if batch else True
+
+            with self._cond:
+                self._pending_keys -= keys
+                if not ok:
+                    # Lô không ghi được: bỏ các id khỏi tập đã lưu để lần insert sau ghi lại
+                    for key in keys:
+                        seen = self._seen_sets.get(key[:-1])
+                        if seen is not None:
+                            seen.discard(key[-1])
+                self._flush_done = max(self._flush_done, requested)
+                self._cond.notify_all()
+                if closing and not self._pending_count:
+                    return
+
+    def _write_batch(self, batch: Dict[str, List[Tuple]]) -> bool:
+        """Ghi một lô trong một transaction; thử lại khi file đang bị tiến trình khác khoá
+
+        Trả về False nếu lô không ghi được sau các lần thử.
+        """
+        count = sum(len(rows) for rows in batch.values())
+        attempts = 5
+        for attempt in range(attempts):
+            try:
+                with self._write_lock, self.conn:
+                    for table, rows in batch.items():
+                        self.conn.executemany(self._INSERT_SQL[table], rows)
+                return True
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    logger.error(f"Ghi {count} dòng vào cơ sở dữ liệu thất bại: {e}")
+                    return False
+                if attempt == attempts - 1:
+                    logger.error(f"Cơ sở dữ liệu vẫn bị khoá sau {attempts} lần thử, bỏ lô {count} dòng: {e}")
+                    return False
+                logger.warning(f"Cơ sở dữ liệu đang bị khoá, thử lại lần {attempt + 1}/{attempts}: {e}")
+                time.sleep(min(2 ** attempt, 10))
+            except Exception as e:
+                logger.error(f"Ghi {count} dòng vào cơ sở dữ liệu thất bại: {e}")
+                return False
+        return False
+
+    def create_zdict_table(self):
+        sql = """CREATE TABLE if not exists t_zdict (
                         id integer primary key autoincrement,
-                        sec_uid varchar(200),
-                        aweme_id integer unique, 
-                        rawdata json
+                        data blob
                     );"""
 
         try:
@@ -29,33 +253,241 @@ class DataBase(object):
         except Exception as e:
             pass
 
+    @staticmethod
+    def _schema_version(conn: sqlite3.Connection) -> int:
+        conn.execute("CREATE TABLE if not exists schema_version (version integer not null);")
+        row = conn.execute("select max(version) from schema_version;").fetchone()
+        if row and row[0] is not None:
+            return row[0]
+        # Chưa có bản ghi phiên bản: cơ sở dữ liệu cũ (hoặc vừa tạo) được coi là phiên bản 1
+        return 1
+
+    def _rebuild_table(self, conn: sqlite3.Connection, table: str):
+        """Tạo lại bảng theo _TABLE_SQL (SQLite không xoá được ràng buộc unique của cột)"""
+        columns = [row[1] for row in conn.execute(f"pragma table_info({table});")]
+        conn.execute(f"ALTER TABLE {table} RENAME TO {table}_old;")
+        conn.execute(self._TABLE_SQL[table])
+        column_list = ", ".join(columns)
+        conn.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {table}_old;")
+        conn.execute(f"DROP TABLE {table}_old;")
+
+    def _migrate_v2(self, conn: sqlite3.Connection):
+        """Phiên bản 2: khoá unique kết hợp theo phạm vi thay cho aweme_id unique toàn cục"""
+        for table in self._TABLE_SQL:
+            row = conn.execute(
+                "select sql from sqlite_master where type='table' and name=?;", (table,)).fetchone()
+            if row and "aweme_id integer unique" in row[0].lower():
+                self._rebuild_table(conn, table)
+        # t_mix trước đây không có ràng buộc, bỏ các dòng trùng trước khi tạo index unique
+        conn.execute(
+            "delete from t_mix where id not in "
+            "(select min(id) from t_mix group by sec_uid, mix_id, aweme_id);")
+        for index_sql in self._INDEX_SQL.values():
+            conn.execute(index_sql)
+        conn.execute("insert into schema_version (version) values(2);")
+
+    def migrate_schema(self):
+        """Nâng schema lên SCHEMA_VERSION trong một transaction duy nhất, lỗi giữa chừng thì rollback toàn bộ"""
+        with self._write_lock:
+            # Ở chế độ mặc định, module sqlite3 chạy ALTER/CREATE ngoài transaction (autocommit),
+            # nên dùng kết nối riêng isolation_level=None với BEGIN/COMMIT tường minh
+            conn = self._connect()
+            conn.isolation_level = None
+            try:
+                conn.execute("BEGIN IMMEDIATE;")
+                try:
+                    if self._schema_version(conn) < 2:
+                        self._migrate_v2(conn)
+                    conn.execute("COMMIT;")
+                except BaseException:
+                    conn.execute("ROLLBACK;")
+                    raise
+            finally:
+                conn.close()
+
+    def _latest_zdict_id(self) -> Optional[int]:
+        row = self._reader().execute("select max(id) from t_zdict;").fetchone()
+        return row[0] if row else None
+
+    def _get_zdict(self, dict_id: int) -> bytes:
+        if not dict_id:
+            return b''
+        zdict = self._zdicts.get(dict_id)
+        if zdict is None:
+            row = self._reader().execute("select data from t_zdict where id=?;", (dict_id,)).fetchone()
+            zdict = self._zdicts[dict_id] = bytes(row[0]) if row else b''
+        return zdict
+
+    def train_dictionary(self) -> int:
+        """Tạo từ điển nén từ các bản ghi gần nhất, trả về id từ điển (0 nếu chưa có dữ liệu)
+
+        Từ điển là các đoạn JSON mẫu ghép lại: các khối author/music/video lặp lại giữa các
+        bản ghi sẽ được zlib tham chiếu thẳng vào từ điển thay vì lưu lại.
+        """
+        samples: List[bytes] = []
+        for table in self._INSERT_SQL:
+            for (raw,) in self._reader().execute(
+                    f"select rawdata from {table} order by id desc limit ?;", (_ZDICT_SAMPLES,)):
+                text = self.decode_rawdata(raw)
+                if text:
+                    samples.append(text.encode('utf-8'))
+        if not samples:
+            return 0
+        # Phần cuối từ điển được ưu tiên, nên đặt các mẫu mới nhất ở cuối
+        zdict = b''.join(reversed(samples))[-_ZDICT_SIZE:]
+        with self._write_lock, self.conn:
+            cursor = self.conn.execute("insert into t_zdict (data) values(?);", (zdict,))
+        self._zdicts[cursor.lastrowid] = zdict
+        return cursor.lastrowid
+
+    def encode_rawdata(self, data: dict):
+        """Chuyển aweme sang dạng lưu trữ: chuỗi JSON, hoặc blob nén nếu bật compress"""
+        text = json.dumps(data)
+        if not self.compress:
+            return text
+        dict_id = self._zdict_id or 0
+        zdict = self._get_zdict(dict_id)
+        compressor = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+        payload = compressor.compress(text.encode('utf-8')) + compressor.flush()
+        return _BLOB_HEADER.pack(_BLOB_MAGIC, dict_id) + payload
+
+    def decode_rawdata(self, raw) -> Optional[str]:
+        """Giải nén rawdata (nếu là blob nén) và trả về chuỗi JSON"""
+        if not isinstance(raw, (bytes, memoryview)):
+            return raw
+        raw = bytes(raw)
+        if not raw.startswith(_BLOB_MAGIC):
+            return raw.decode('utf-8')
+        _, dict_id = _BLOB_HEADER.unpack_from(raw)
+        zdict = self._get_zdict(dict_id)
+        decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+        data = decompressor.decompress(raw[_BLOB_HEADER.size:]) + decompressor.flush()
+        return data.decode('utf-8')
+
+    def _decode_row(self, row):
+        if row is None:
+            return None
+        return row[:-1] + (self.decode_rawdata(row[-1]),)
+
+    def migrate_rawdata(self, compress: bool = True, batch: int = 500) -> int:
+        """Chuyển toàn bộ rawdata sẵn có sang dạng nén (hoặc giải nén lại), trả về số dòng đã đổi"""
+        self.flush()
+        self.compress = compress
+        if compress:
+            self._zdict_id = self.train_dictionary()
+        changed = 0
+        with self._write_lock:
+            for table in self._INSERT_SQL:
+                last_id = 0
+                while True:
+                    rows = self.conn.execute(
+                        f"select id, rawdata from {table} where id > ? order by id limit ?;",
+                        (last_id, batch)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    updates = []
+                    for row_id, raw in rows:
+                        text = self.decode_rawdata(raw)
+                        if text is None:
+                            continue
+                        encoded = self.encode_rawdata(json.loads(text))
+                        if encoded != raw:
+                            updates.append((encoded, row_id))
+                    with self.conn:
+                        self.conn.executemany(f"update {table} set rawdata=? where id=?;", updates)
+                    changed += len(updates)
+            self.conn.execute("VACUUM;")
+        return changed
+
+    def _is_pending(self, table: str, *key) -> bool:
+        with self._lock:
+            return (table,) + key in self._pending_keys
+
+    def _seen(self, table: str, *scope) -> Set[int]:
+        """Tập aweme_id đã lưu trong phạm vi scope, nạp từ SQLite ở lần dùng đầu tiên"""
+        key = (table,) + scope
+        with self._lock:
+            seen = self._seen_sets.get(key)
+            if seen is None:
+                # Ghi bộ đệm trước để tập nạp về đầy đủ, sau đó insert_* tự thêm vào tập
+                self.flush()
+                seen = set()
+                for (aweme_id,) in self._reader().execute(self._SEEN_SQL[table], scope):
+                    try:
+                        seen.add(int(aweme_id))
+                    except (TypeError, ValueError):
+                        pass
+                self._seen_sets[key] = seen
+            return seen
+
+    def has_user_post(self, sec_uid: str, aweme_id: int) -> bool:
+        return int(aweme_id) in self._seen('t_user_post', sec_uid)
+
+    def has_user_like(self, sec_uid: str, aweme_id: int) -> bool:
+        return int(aweme_id) in self._seen('t_user_like', sec_uid)
+
+    def has_mix(self, sec_uid: str, mix_id: str, aweme_id: int) -> bool:
+        return int(aweme_id) in self._seen('t_mix', sec_uid, mix_id)
+
+    def has_music(self, music_id: str, aweme_id: int) -> bool:
+        return int(aweme_id) in self._seen('t_music', music_id)
+
+    def flush(self):
+        """Yêu cầu thread ghi ghi hết bộ đệm và chờ tới khi xong"""
+        with self._cond:
+            if self._closed or not (self._pending_count or self._pending_keys):
+                return
+            self._flush_requested += 1
+            requested = self._flush_requested
+            self._cond.notify_all()
+            while self._flush_done < requested and self._writer.is_alive():
+                self._cond.wait(1)
+
+    def close(self):
+        """Ghi nốt bộ đệm, dừng thread ghi và đóng các kết nối"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        with self._write_lock:
+            self.conn.close()
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        atexit.unregister(self.close)
+
+    def create_user_post_table(self):
+        sql = self._TABLE_SQL['t_user_post']
+
+        try:
+            self.cursor.execute(sql)
+            self.conn.commit()
+        except Exception as e:
+            pass
+
     def get_user_post(self, sec_uid: str, aweme_id: int):
         sql = """select id, sec_uid, aweme_id, rawdata from t_user_post where sec_uid=? and aweme_id=?;"""
 
         try:
-            self.cursor.execute(sql, (sec_uid, aweme_id))
-            self.conn.commit()
-            res = self.cursor.fetchone()
-            return res
+            if self._is_pending('t_user_post', sec_uid, int(aweme_id)):
+                return (None, sec_uid, aweme_id, None)
+            row = self._reader().execute(sql, (sec_uid, aweme_id)).fetchone()
+            return self._decode_row(row)
         except Exception as e:
             pass
 
     def insert_user_post(self, sec_uid: str, aweme_id: int, data: dict):
-        insertsql = """insert into t_user_post (sec_uid, aweme_id, rawdata) values(?,?,?);"""
-
         try:
-            self.cursor.execute(insertsql, (sec_uid, aweme_id, json.dumps(data)))
-            self.conn.commit()
+            self._enqueue('t_user_post', (sec_uid, int(aweme_id)), (sec_uid, aweme_id, self.encode_rawdata(data)))
         except Exception as e:
             pass
 
     def create_user_like_table(self):
-        sql = """CREATE TABLE if not exists t_user_like (
-                        id integer primary key autoincrement,
-                        sec_uid varchar(200),
-                        aweme_id integer unique,
-                        rawdata json
-                    );"""
+        sql = self._TABLE_SQL['t_user_like']
 
         try:
             self.cursor.execute(sql)
@@ -67,30 +499,21 @@ class DataBase(object):
         sql = """select id, sec_uid, aweme_id, rawdata from t_user_like where sec_uid=? and aweme_id=?;"""
 
         try:
-            self.cursor.execute(sql, (sec_uid, aweme_id))
-            self.conn.commit()
-            res = self.cursor.fetchone()
-            return res
+            if self._is_pending('t_user_like', sec_uid, int(aweme_id)):
+                return (None, sec_uid, aweme_id, None)
+            row = self._reader().execute(sql, (sec_uid, aweme_id)).fetchone()
+            return self._decode_row(row)
         except Exception as e:
             pass
 
     def insert_user_like(self, sec_uid: str, aweme_id: int, data: dict):
-        insertsql = """insert into t_user_like (sec_uid, aweme_id, rawdata) values(?,?,?);"""
-
         try:
-            self.cursor.execute(insertsql, (sec_uid, aweme_id, json.dumps(data)))
-            self.conn.commit()
+            self._enqueue('t_user_like', (sec_uid, int(aweme_id)), (sec_uid, aweme_id, self.encode_rawdata(data)))
         except Exception as e:
             pass
 
     def create_mix_table(self):
-        sql = """CREATE TABLE if not exists t_mix (
-                        id integer primary key autoincrement,
-                        sec_uid varchar(200),
-                        mix_id varchar(200),
-                        aweme_id integer,
-                        rawdata json
-                    );"""
+        sql = self._TABLE_SQL['t_mix']
 
         try:
             self.cursor.execute(sql)
@@ -102,29 +525,21 @@ class DataBase(object):
         sql = """select id, sec_uid, mix_id, aweme_id, rawdata from t_mix where sec_uid=? and  mix_id=? and aweme_id=?;"""
 
         try:
-            self.cursor.execute(sql, (sec_uid, mix_id, aweme_id))
-            self.conn.commit()
-            res = self.cursor.fetchone()
-            return res
+            if self._is_pending('t_mix', sec_uid, mix_id, int(aweme_id)):
+                return (None, sec_uid, mix_id, aweme_id, None)
+            row = self._reader().execute(sql, (sec_uid, mix_id, aweme_id)).fetchone()
+            return self._decode_row(row)
         except Exception as e:
             pass
 
     def insert_mix(self, sec_uid: str, mix_id: str, aweme_id: int, data: dict):
-        insertsql = """insert into t_mix (sec_uid, mix_id, aweme_id, rawdata) values(?,?,?,?);"""
-
         try:
-            self.cursor.execute(insertsql, (sec_uid, mix_id, aweme_id, json.dumps(data)))
-            self.conn.commit()
+            self._enqueue('t_mix', (sec_uid, mix_id, int(aweme_id)), (sec_uid, mix_id, aweme_id, self.encode_rawdata(data)))
         except Exception as e:
             pass
 
     def create_music_table(self):
-        sql = """CREATE TABLE if not exists t_music (
-                        id integer primary key autoincrement,
-                        music_id varchar(200),
-                        aweme_id integer unique,
-                        rawdata json
-                    );"""
+        sql = self._TABLE_SQL['t_music']
 
         try:
             self.cursor.execute(sql)
@@ -136,22 +551,27 @@ class DataBase(object):
         sql = """select id, music_id, aweme_id, rawdata from t_music where music_id=? and aweme_id=?;"""
 
         try:
-            self.cursor.execute(sql, (music_id, aweme_id))
-            self.conn.commit()
-            res = self.cursor.fetchone()
-            return res
+            if self._is_pending('t_music', music_id, int(aweme_id)):
+                return (None, music_id, aweme_id, None)
+            row = self._reader().execute(sql, (music_id, aweme_id)).fetchone()
+            return self._decode_row(row)
         except Exception as e:
             pass
 
     def insert_music(self, music_id: str, aweme_id: int, data: dict):
-        insertsql = """insert into t_music (music_id, aweme_id, rawdata) values(?,?,?);"""
-
         try:
-            self.cursor.execute(insertsql, (music_id, aweme_id, json.dumps(data)))
-            self.conn.commit()
+            self._enqueue('t_music', (music_id, int(aweme_id)), (music_id, aweme_id, self.encode_rawdata(data)))
         except Exception as e:
             pass
 
 
 if __name__ == '__main__':
-    pass
+    parser = argparse.ArgumentParser(description="Công cụ bảo trì cơ sở dữ liệu lịch sử tải xuống")
+    parser.add_argument("command", choices=["migrate"], help="migrate: chuyển rawdata sẵn có sang dạng nén")
+    parser.add_argument("--db", default="data.db", help="Đường dẫn file cơ sở dữ liệu, mặc định data.db")
+    parser.add_argument("--decompress", action="store_true", help="Giải nén ngược lại về chuỗi JSON")
+    args = parser.parse_args()
+
+    with DataBase(args.db) as db:
+        count = db.migrate_rawdata(compress=not args.decompress)
+    print(f"Đã chuyển đổi {count} bản ghi trong {args.db}")
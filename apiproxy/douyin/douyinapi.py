@@ -11,7 +11,7 @@ import copy
 from apiproxy.douyin import douyin_headers
 from apiproxy.douyin.urls import Urls
 from apiproxy.douyin.result import Result
-from apiproxy.common import utils
+from apiproxy.common.signer import get_signer
 
 class DouyinApi(object):
     def __init__(self):
@@ -77,7 +77,7 @@ class DouyinApi(object):
             key_type = "music"
         elif "/webcast/reflow/" in urlstr:
             key1 = re.findall('reflow/(\d+)?', urlstr)[0]
-            url = self.urls.LIVE2 + utils.getXbogus(
+            url = self.urls.LIVE2 + get_signer().sign_params(
                 f'live_id=1&room_id={key1}&app_id=1128')
             res = requests.get(url, headers=douyin_headers)
             resjson = json.loads(res.text)
@@ -99,7 +99,7 @@ class DouyinApi(object):
         start = time.time()  # Thời gian bắt đầu
         while True:
             try:
-                jx_url = self.urls.POST_DETAIL + utils.getXbogus(
+                jx_url = self.urls.POST_DETAIL + get_signer().sign_params(
                     f'aweme_id={aweme_id}&device_platform=webapp&aid=6383')
 
                 raw = requests.get(url=jx_url, headers=douyin_headers).text
@@ -137,10 +137,10 @@ class DouyinApi(object):
         while True:
             try:
                 if mode == "post":
-                    url = self.urls.USER_POST + utils.getXbogus(
+                    url = self.urls.USER_POST + get_signer().sign_params(
                         f'sec_user_id={sec_uid}&count={count}&max_cursor={max_cursor}&device_platform=webapp&aid=6383')
                 elif mode == "like":
-                    url = self.urls.USER_FAVORITE_A + utils.getXbogus(
+                    url = self.urls.USER_FAVORITE_A + get_signer().sign_params(
                         f'sec_user_id={sec_uid}&count={count}&max_cursor={max_cursor}&device_platform=webapp&aid=6383')
                 else:
                     return None
@@ -178,7 +178,7 @@ class DouyinApi(object):
         start = time.time()  # Thời gian bắt đầu
         while True:
             try:
-                live_api = self.urls.LIVE + utils.getXbogus(
+                live_api = self.urls.LIVE + get_signer().sign_params(
                     f'aid=6383&device_platform=web&web_rid={web_rid}')
 
                 response = requests.get(live_api, headers=douyin_headers)
@@ -253,7 +253,7 @@ class DouyinApi(object):
         start = time.time()  # Thời gian bắt đầu
         while True:
             try:
-                url = self.urls.USER_MIX + utils.getXbogus(
+                url = self.urls.USER_MIX + get_signer().sign_params(
                     f'mix_id={mix_id}&cursor={cursor}&count={count}&device_platform=webapp&aid=6383')
 
                 res = requests.get(url=url, headers=douyin_headers)
@@ -296,7 +296,7 @@ class DouyinApi(object):
         start = time.time()  # Thời gian bắt đầu
         while True:
             try:
-                url = self.urls.USER_MIX_LIST + utils.getXbogus(
+                url = self.urls.USER_MIX_LIST + get_signer().sign_params(
                     f'sec_user_id={sec_uid}&count={count}&cursor={cursor}&device_platform=webapp&aid=6383')
 
                 res = requests.get(url=url, headers=douyin_headers)
@@ -324,7 +324,7 @@ class DouyinApi(object):
         start = time.time()  # Thời gian bắt đầu
         while True:
             try:
-                url = self.urls.MUSIC + utils.getXbogus(
+                url = self.urls.MUSIC + get_signer().sign_params(
                     f'music_id={music_id}&cursor={cursor}&count={count}&device_platform=webapp&aid=6383')
 
                 res = requests.get(url=url, headers=douyin_headers)
@@ -364,7 +364,7 @@ class DouyinApi(object):
         while True:
             # Interface không ổn định, đôi khi server không trả về dữ liệu, cần lấy lại
             try:
-                url = self.urls.USER_DETAIL + utils.getXbogus(
+                url = self.urls.USER_DETAIL + get_signer().sign_params(
                         f'sec_user_id={sec_uid}&device_platform=webapp&aid=6383')
 
                 res = requests.get(url=url, headers=douyin_headers)
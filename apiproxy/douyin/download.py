@@ -5,9 +5,12 @@
 import os
 import json
 import time
+import threading
 import requests
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, as_completed, TimeoutError as FutureTimeoutError
 from typing import List, Optional
 from pathlib import Path
 # import asyncio  # Tạm thời comment
@@ -21,12 +24,14 @@ from rich import print as rprint
 
 from apiproxy.douyin import douyin_headers
 from apiproxy.common import utils
+from apiproxy.common.mirror import MirrorHealth
 
 logger = logging.getLogger("douyin_downloader")
 console = Console()
 
 class Download(object):
-    def __init__(self, thread=5, music=True, cover=True, avatar=True, resjson=True, folderstyle=True):
+    def __init__(self, thread=5, music=True, cover=True, avatar=True, resjson=True, folderstyle=True,
+                 segments=1, segment_threshold=8 * 1024 * 1024, mirror_race=2):
         self.thread = thread
         self.music = music
         self.cover = cover
@@ -45,21 +50,125 @@ class Download(object):
         self.retry_times = 3
         self.chunk_size = 8192
         self.timeout = 30
-
-    def _download_media(self, url: str, path: Path, desc: str) -> bool:
+        # Mỗi luồng dùng requests.Session riêng (tái sử dụng kết nối), thanh tiến độ dùng chung
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._lock = threading.Lock()
+        self._progress_depth = 0
+        # Tải phân đoạn: số đoạn song song cho mỗi file lớn (cần os.pwrite), ngưỡng kích thước
+        self.segments = max(1, int(segments or 1)) if hasattr(os, "pwrite") else 1
+        self.segment_threshold = int(segment_threshold or 0)
+        self._segment_pool: Optional[ThreadPoolExecutor] = None
+        # Điểm sức khoẻ các host CDN trong url_list, dùng suốt lần chạy; số mirror đua cùng lúc
+        self.mirror_health = MirrorHealth()
+        self.mirror_race = max(1, int(mirror_race or 1))
+        self._probe_pool: Optional[ThreadPoolExecutor] = None
+
+    def _get_session(self) -> requests.Session:
+        """Lấy requests.Session của luồng hiện tại (tạo khi cần)"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        """Đóng tất cả session của các luồng"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            pools = [self._segment_pool, self._probe_pool]
+            self._segment_pool = self._probe_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        for session in sessions:
+            session.close()
+
+    @contextmanager
+    def _progress_context(self):
+        """Bật thanh tiến độ dùng chung, chỉ dừng khi lớp ngoài cùng thoát (an toàn giữa các luồng)"""
+        with self._lock:
+            if self._progress_depth == 0:
+                self.progress.start()
+            self._progress_depth += 1
+        try:
+            yield self.progress
+        finally:
+            with self._lock:
+                self._progress_depth -= 1
+                if self._progress_depth == 0:
+                    self.progress.stop()
+
+    def _download_media(self, urls: List[str], path: Path, desc: str) -> bool:
         """Phương thức tải xuống chung, xử lý tất cả các loại tải xuống media"""
+        # File dở dang nằm ở <tên>.part, nên file có tên cuối luôn là file đã tải đủ
         if path.exists():
             self.console.print(f"[cyan]⏭️  Bỏ qua đã tồn tại: {desc}[/]")
             return True
             
-        # Sử dụng phương thức tải xuống tiếp tục điểm dừng mới thay thế logic tải xuống cũ
-        return self.download_with_resume(url, path, desc)
+        # Đua các mirror đứng đầu, sau đó thử lần lượt; mirror cuối cùng mới dùng đủ số lần thử lại
+        urls = self._race_mirrors(urls)
+        for index, url in enumerate(urls):
+            last = index == len(urls) - 1
+            if self.download_with_resume(url, path, desc, attempts=None if last else 1):
+                return True
+            if not last:
+                logger.warning(f"Mirror thất bại, chuyển sang mirror tiếp theo: {desc}")
+        return False
+
+    def _race_mirrors(self, urls: List[str]) -> List[str]:
+        """Gửi đồng thời yêu cầu 1 byte tới các mirror đứng đầu, đưa mirror trả lời nhanh nhất lên trước
+
+        Chỉ đua khi có host chưa có điểm hoặc điểm sát nhau. Kết quả thăm dò được ghi vào
+        điểm sức khoẻ; các mirror còn lại sắp xếp lại theo điểm.
+        """
+        racing = urls[:self.mirror_race]
+        # Các host đã có điểm rõ ràng từ lần chạy này thì dựa vào điểm, không gửi thêm yêu cầu
+        if len(racing) < 2 or not self.mirror_health.should_race(racing):
+            return urls
+        with self._lock:
+            if self._probe_pool is None:
+                self._probe_pool = ThreadPoolExecutor(max_workers=self.mirror_race * max(1, int(self.thread or 1)))
+            pool = self._probe_pool
+
+        futures = {pool.submit(self._probe_mirror, url): url for url in racing}
+        winner = None
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                if future.result():
+                    winner = futures[future]
+                    break
+        except FutureTimeoutError:
+            pass
+        # Các yêu cầu chậm hơn vẫn chạy nốt trong pool và chỉ cập nhật điểm sức khoẻ
+        rest = self.mirror_health.order(url for url in urls if url != winner)
+        return [winner] + rest if winner else rest
+
+    def _probe_mirror(self, url: str) -> bool:
+        """Thăm dò độ trễ byte đầu tiên của một mirror bằng yêu cầu Range 1 byte"""
+        try:
+            with self._get_session().get(url, headers={**douyin_headers, 'Range': 'bytes=0-0'},
+                                         stream=True, timeout=self.timeout) as response:
+                if response.status_code not in (200, 206):
+                    self.mirror_health.record_failure(url)
+                    return False
+                self.mirror_health.record_success(url, response.elapsed.total_seconds())
+                return True
+        except Exception as e:
+            self.mirror_health.record_failure(url)
+            logger.debug(f"Thăm dò mirror thất bại: {str(e)}")
+            return False
 
-    def _get_first_url(self, url_list: list) -> str:
-        """Lấy URL đầu tiên từ danh sách URL một cách an toàn"""
+    def _get_urls(self, url_list: list) -> List[str]:
+        """Lấy các URL mirror từ danh sách URL, sắp xếp theo điểm sức khoẻ của host"""
         if isinstance(url_list, list) and len(url_list) > 0:
-            return url_list[0]
-        return None
+            return self.mirror_health.order(url_list)
+        return []
 
     def _download_media_files(self, aweme: dict, path: Path, name: str, desc: str) -> None:
         """Tải xuống tất cả file media"""
@@ -68,8 +177,8 @@ class Download(object):
             if aweme["awemeType"] == 0:  # Video
                 video_path = path / f"{name}_video.mp4"
                 url_list = aweme.get("video", {}).get("play_addr", {}).get("url_list", [])
-                if url := self._get_first_url(url_list):
-                    if not self._download_media(url, video_path, f"[Video]{desc}"):
+                if urls := self._get_urls(url_list):
+                    if not self._download_media(urls, video_path, f"[Video]{desc}"):
                         raise Exception("Tải xuống video thất bại")
                 else:
                     logger.warning(f"URL video rỗng: {desc}")
@@ -77,9 +186,9 @@ class Download(object):
             elif aweme["awemeType"] == 1:  # Bộ ảnh
                 for i, image in enumerate(aweme.get("images", [])):
                     url_list = image.get("url_list", [])
-                    if url := self._get_first_url(url_list):
+                    if urls := self._get_urls(url_list):
                         image_path = path / f"{name}_image_{i}.jpeg"
-                        if not self._download_media(url, image_path, f"[Bộ ảnh{i+1}]{desc}"):
+                        if not self._download_media(urls, image_path, f"[Bộ ảnh{i+1}]{desc}"):
                             raise Exception(f"Tải xuống ảnh {i+1} thất bại")
                     else:
                         logger.warning(f"URL ảnh {i+1} rỗng: {desc}")
@@ -87,26 +196,26 @@ class Download(object):
             # Tải xuống nhạc
             if self.music:
                 url_list = aweme.get("music", {}).get("play_url", {}).get("url_list", [])
-                if url := self._get_first_url(url_list):
+                if urls := self._get_urls(url_list):
                     music_name = utils.replaceStr(aweme["music"]["title"])
                     music_path = path / f"{name}_music_{music_name}.mp3"
-                    if not self._download_media(url, music_path, f"[Nhạc]{desc}"):
+                    if not self._download_media(urls, music_path, f"[Nhạc]{desc}"):
                         self.console.print(f"[yellow]⚠️  Tải xuống nhạc thất bại: {desc}[/]")
 
             # Tải xuống ảnh bìa
             if self.cover and aweme["awemeType"] == 0:
                 url_list = aweme.get("video", {}).get("cover", {}).get("url_list", [])
-                if url := self._get_first_url(url_list):
+                if urls := self._get_urls(url_list):
                     cover_path = path / f"{name}_cover.jpeg"
-                    if not self._download_media(url, cover_path, f"[Ảnh bìa]{desc}"):
+                    if not self._download_media(urls, cover_path, f"[Ảnh bìa]{desc}"):
                         self.console.print(f"[yellow]⚠️  Tải xuống ảnh bìa thất bại: {desc}[/]")
 
             # Tải xuống avatar
             if self.avatar:
                 url_list = aweme.get("author", {}).get("avatar", {}).get("url_list", [])
-                if url := self._get_first_url(url_list):
+                if urls := self._get_urls(url_list):
                     avatar_path = path / f"{name}_avatar.jpeg"
-                    if not self._download_media(url, avatar_path, f"[Avatar]{desc}"):
+                    if not self._download_media(urls, avatar_path, f"[Avatar]{desc}"):
                         self.console.print(f"[yellow]⚠️  Tải xuống avatar thất bại: {desc}[/]")
 
         except Exception as e:
@@ -171,19 +280,25 @@ class Download(object):
             border_style="cyan"
         ))
 
-        with self.progress:
+        with self._progress_context():
             download_task = self.progress.add_task(
                 "[cyan]📥 Tiến độ tải xuống hàng loạt", 
                 total=total_count
             )
             
-            for aweme in awemeList:
-                try:
-                    self.awemeDownload(awemeDict=aweme, savePath=save_path)
-                    success_count += 1
-                    self.progress.update(download_task, advance=1)
-                except Exception as e:
-                    self.console.print(f"[red]❌ Tải xuống thất bại: {str(e)}[/]")
+            # Tải song song theo số luồng cấu hình
+            with ThreadPoolExecutor(max_workers=max(1, int(self.thread or 1))) as executor:
+                futures = [
+                    executor.submit(self.awemeDownload, awemeDict=aweme, savePath=save_path)
+                    for aweme in awemeList
+                ]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        success_count += 1
+                        self.progress.update(download_task, advance=1)
+                    except Exception as e:
+                        self.console.print(f"[red]❌ Tải xuống thất bại: {str(e)}[/]")
 
         # Hiển thị thống kê hoàn thành tải xuống
         end_time = time.time()
@@ -202,56 +317,265 @@ class Download(object):
             border_style="green"
         ))
 
-    def download_with_resume(self, url: str, filepath: Path, desc: str) -> bool:
-        """Phương thức tải xuống hỗ trợ tiếp tục điểm dừng"""
-        file_size = filepath.stat().st_size if filepath.exists() else 0
-        headers = {'Range': f'bytes={file_size}-'} if file_size > 0 else {}
-
+    def _probe_range_size(self, url: str) -> Optional[int]:
+        """Thử yêu cầu Range 1 byte, trả về tổng kích thước nếu server hỗ trợ Range"""
+        try:
+            with self._get_session().get(url, headers={**douyin_headers, 'Range': 'bytes=0-0'},
+                                         stream=True, timeout=self.timeout) as response:
+                if response.status_code != 206:
+                    return None
+                total = response.headers.get('content-range', '').rsplit('/', 1)[-1]
+                return int(total) if total.isdigit() else None
+        except Exception as e:
+            logger.debug(f"Thăm dò Range thất bại: {str(e)}")
+            return None
+
+    def _download_segmented(self, url: str, part_path: Path, size: int, desc: str) -> bool:
+        """Tải file lớn theo nhiều đoạn byte song song, ghi thẳng vào vị trí tương ứng (pwrite)
+
+        File .part được cấp phát đủ kích thước nên có lỗ hổng khi đang tải; vì vậy không ghi
+        sidecar, nếu thất bại thì xoá .part để lần sau không tiếp tục từ file dở dang này.
+        """
+        step = -(-size // self.segments)
+        ranges = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+        with self._lock:
+            if self._segment_pool is None:
+                self._segment_pool = ThreadPoolExecutor(max_workers=self.segments * max(1, int(self.thread or 1)))
+            pool = self._segment_pool
+
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+        abort = threading.Event()
+        futures = []
+        ok = False
+        try:
+            os.ftruncate(fd, size)
+            with self._progress_context():
+                task = self.progress.add_task(f"[cyan]⬇️  {desc}", total=size)
+                try:
+                    futures = [pool.submit(self._fetch_segment, url, fd, start, end, task, abort)
+                               for start, end in ranges]
+                    for future in as_completed(futures):
+                        if future.exception() is not None or not future.result():
+                            break
+                    else:
+                        ok = True
+                finally:
+                    self.progress.remove_task(task)
+        finally:
+            # Dừng mọi đoạn còn lại và chờ chúng kết thúc trước khi đóng fd,
+            # tránh pwrite vào số fd đã được hệ điều hành cấp lại cho file khác
+            abort.set()
+            for future in futures:
+                future.cancel()
+            wait(futures, return_when=ALL_COMPLETED)
+            os.close(fd)
+
+        if not ok:
+            part_path.unlink(missing_ok=True)
+            logger.warning(f"Tải phân đoạn thất bại, chuyển sang tải một kết nối: {desc}")
+        return ok
+
+    def _fetch_segment(self, url: str, fd: int, start: int, end: int, task, abort: threading.Event) -> bool:
+        """Tải một đoạn byte, thử lại với cùng số lần và thời gian chờ như download_with_resume
+
+        Dừng ngay khi abort được bật (một đoạn khác đã thất bại).
+        """
+        offset = start
         for attempt in range(self.retry_times):
+            if abort.is_set():
+                return False
+            try:
+                headers = {**douyin_headers, 'Range': f'bytes={offset}-{end}'}
+                with self._get_session().get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                    if response.status_code != 206:
+                        raise Exception(f"HTTP {response.status_code}")
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if abort.is_set():
+                            return False
+                        if chunk:
+                            os.pwrite(fd, chunk, offset)
+                            offset += len(chunk)
+                            self.progress.update(task, advance=len(chunk))
+                if offset != end + 1:
+                    raise Exception(f"Đoạn dữ liệu không đầy đủ: {offset}/{end + 1} byte")
+                return True
+            except Exception as e:
+                # Lần thử lại tiếp tục từ vị trí đã ghi tới
+                logger.warning(f"Tải đoạn {start}-{end} thất bại (thử {attempt + 1}/{self.retry_times}): {str(e)}")
+                if attempt < self.retry_times - 1:
+                    abort.wait(min(2 ** attempt, 10))
+        return False
+
+    @staticmethod
+    def _part_paths(filepath: Path):
+        """Đường dẫn file tạm .part và file sidecar ghi thông tin tiếp tục tải"""
+        return filepath.with_name(filepath.name + ".part"), filepath.with_name(filepath.name + ".part.json")
+
+    @staticmethod
+    def _load_part_meta(meta_path: Path) -> dict:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _save_part_meta(meta_path: Path, meta: dict) -> None:
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except Exception as e:
+            logger.warning(f"Ghi thông tin tiếp tục tải thất bại: {meta_path}, lỗi: {str(e)}")
+
+    @staticmethod
+    def _range_matches(response, file_size: int, meta: dict) -> bool:
+        """Kiểm tra phản hồi 206 bắt đầu đúng vị trí và cùng phiên bản tài nguyên (ETag)"""
+        content_range = response.headers.get('content-range', '')
+        if not content_range.startswith(f'bytes {file_size}-'):
+            return False
+        etag = response.headers.get('etag')
+        return not (etag and meta.get("etag") and etag != meta.get("etag"))
+
+    def _resume_state(self, url: str, part_path: Path, meta_path: Path):
+        """Xác định vị trí tiếp tục và request headers từ file .part và sidecar
+
+        Chỉ tiếp tục khi có validator (ETag/Last-Modified) để gửi If-Range, hoặc URL không đổi;
+        ngược lại xoá file .part và tải lại từ đầu.
+        """
+        meta = self._load_part_meta(meta_path)
+        file_size = part_path.stat().st_size if part_path.exists() else 0
+        validator = meta.get("etag") or meta.get("last_modified")
+        expected = meta.get("expected_length")
+
+        if file_size > 0 and (validator or meta.get("url") == url) and (not expected or file_size <= expected):
+            headers = {'Range': f'bytes={file_size}-'}
+            if validator:
+                headers['If-Range'] = validator
+            return file_size, headers, meta
+
+        if part_path.exists():
+            part_path.unlink()
+        return 0, {}, {}
+
+    def download_with_resume(self, url: str, filepath: Path, desc: str, attempts: Optional[int] = None) -> bool:
+        """Phương thức tải xuống hỗ trợ tiếp tục điểm dừng
+
+        Dữ liệu được ghi vào <tên>.part kèm sidecar <tên>.part.json (URL, ETag/Last-Modified,
+        độ dài mong đợi). Lần chạy sau tiếp tục bằng Range/If-Range, chỉ đổi sang tên cuối
+        khi kích thước khớp độ dài mong đợi.
+        """
+        part_path, meta_path = self._part_paths(filepath)
+        retry_times = attempts or self.retry_times
+
+        for attempt in range(retry_times):
             try:
-                response = requests.get(url, headers={**douyin_headers, **headers},
-                                     stream=True, timeout=self.timeout)
+                file_size, headers, meta = self._resume_state(url, part_path, meta_path)
+                if file_size and meta.get("expected_length") == file_size:
+                    # Lần trước đã tải đủ nhưng chưa kịp đổi tên
+                    os.replace(part_path, filepath)
+                    meta_path.unlink(missing_ok=True)
+                    return True
+
+                if not file_size and self.segments > 1:
+                    size = self._probe_range_size(url)
+                    if size and size >= self.segment_threshold and self._download_segmented(url, part_path, size, desc):
+                        os.replace(part_path, filepath)
+                        return True
+
+                try:
+                    response = self._get_session().get(url, headers={**douyin_headers, **headers},
+                                                       stream=True, timeout=self.timeout)
+                except requests.exceptions.RequestException:
+                    # Không kết nối được hoặc đứng im quá timeout
+                    self.mirror_health.record_failure(url)
+                    raise
+
+                if response.status_code == 416 and file_size:
+                    # Range không hợp lệ với tài nguyên hiện tại, tải lại từ đầu
+                    response.close()
+                    part_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    raise Exception("HTTP 416, tải lại từ đầu")
 
                 if response.status_code not in (200, 206):
+                    self.mirror_health.record_failure(url)
                     raise Exception(f"HTTP {response.status_code}")
-
-                total_size = int(response.headers.get('content-length', 0)) + file_size
+                # elapsed là thời gian tới khi nhận xong header phản hồi (byte đầu tiên)
+                self.mirror_health.record_success(url, response.elapsed.total_seconds())
+
+                if response.status_code == 200:
+                    # Server bỏ qua Range hoặc tài nguyên đã thay đổi (If-Range không khớp)
+                    file_size = 0
+                elif not self._range_matches(response, file_size, meta):
+                    # Phần trả về không nối tiếp được file .part, bỏ đi và tải lại
+                    response.close()
+                    part_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    raise Exception("Phản hồi Range không khớp với file .part, tải lại từ đầu")
+
+                length = int(response.headers.get('content-length', 0) or 0)
+                encoded = bool(response.headers.get('content-encoding'))
+                expected = None
+                if response.status_code == 206:
+                    content_range = response.headers.get('content-range', '')
+                    total = content_range.rsplit('/', 1)[-1] if '/' in content_range else ''
+                    if total.isdigit():
+                        expected = int(total)
+                elif length and not encoded:
+                    expected = length
+
+                self._save_part_meta(meta_path, {
+                    "url": url,
+                    "etag": response.headers.get('etag') or meta.get("etag"),
+                    "last_modified": response.headers.get('last-modified') or meta.get("last_modified"),
+                    "expected_length": expected,
+                })
+
+                total_size = expected or (length + file_size)
                 mode = 'ab' if file_size > 0 else 'wb'
 
-                with self.progress:
+                with self._progress_context():
                     task = self.progress.add_task(f"[cyan]⬇️  {desc}", total=total_size)
                     self.progress.update(task, completed=file_size)  # Cập nhật tiến độ tiếp tục điểm dừng
 
-                    with open(filepath, mode) as f:
-                        try:
-                            for chunk in response.iter_content(chunk_size=self.chunk_size):
-                                if chunk:
-                                    size = f.write(chunk)
-                                    self.progress.update(task, advance=size)
-                        except (requests.exceptions.ConnectionError,
-                               requests.exceptions.ChunkedEncodingError,
-                               Exception) as chunk_error:
-                            # Mạng bị ngắt, ghi lại kích thước file hiện tại, lần sau tiếp tục từ đây
-                            current_size = filepath.stat().st_size if filepath.exists() else 0
-                            logger.warning(f"Tải xuống bị ngắt, đã tải {current_size} byte: {str(chunk_error)}")
-                            raise chunk_error
-
+                    try:
+                        with open(part_path, mode) as f:
+                            try:
+                                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                                    if chunk:
+                                        size = f.write(chunk)
+                                        self.progress.update(task, advance=size)
+                            except (requests.exceptions.ConnectionError,
+                                   requests.exceptions.ChunkedEncodingError,
+                                   Exception) as chunk_error:
+                                # Mạng bị ngắt, giữ lại file .part, lần sau tiếp tục từ đây
+                                self.mirror_health.record_failure(url)
+                                current_size = part_path.stat().st_size if part_path.exists() else 0
+                                logger.warning(f"Tải xuống bị ngắt, đã tải {current_size} byte: {str(chunk_error)}")
+                                raise chunk_error
+                    finally:
+                        # Bỏ thanh của file đã xong để nhiều luồng không làm dài danh sách tiến độ
+                        self.progress.remove_task(task)
+
+                # Chỉ đổi sang tên cuối khi kích thước khớp
+                written = part_path.stat().st_size
+                if expected is not None and written != expected:
+                    raise Exception(f"Kích thước không khớp: {written}/{expected} byte")
+                os.replace(part_path, filepath)
+                meta_path.unlink(missing_ok=True)
                 return True
 
             except Exception as e:
                 # Tính toán thời gian chờ thử lại (exponential backoff)
                 wait_time = min(2 ** attempt, 10)  # Tối đa chờ 10 giây
-                logger.warning(f"Tải xuống thất bại (thử {attempt + 1}/{self.retry_times}): {str(e)}")
+                logger.warning(f"Tải xuống thất bại (thử {attempt + 1}/{retry_times}): {str(e)}")
 
-                if attempt == self.retry_times - 1:
+                if attempt == retry_times - 1:
                     self.console.print(f"[red]❌ Tải xuống thất bại: {desc}\n   {str(e)}[/]")
                     return False
                 else:
                     logger.info(f"Chờ {wait_time} giây rồi thử lại...")
                     time.sleep(wait_time)
-                    # Tính lại kích thước file, chuẩn bị tiếp tục điểm dừng
-                    file_size = filepath.stat().st_size if filepath.exists() else 0
-                    headers = {'Range': f'bytes={file_size}-'} if file_size > 0 else {}
 
         return False
 
@@ -20,6 +20,7 @@ from apiproxy.douyin import douyin_headers
 from apiproxy.douyin.urls import Urls
 from apiproxy.douyin.result import Result
 from apiproxy.common.utils import Utils
+from apiproxy.common.signer import get_signer
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ logger = logging.getLogger(__name__)
 class EnhancedAPIStrategy(IDownloadStrategy):
     """Chiến lược tải xuống API nâng cao, bao gồm nhiều endpoint dự phòng và thử lại thông minh"""
     
-    def __init__(self, cookies: Optional[Dict] = None):
+    def __init__(self, cookies: Optional[Dict] = None, controller=None):
         self.urls = Urls()
         self.result = Result()
         self.utils = Utils()  # Sửa: sử dụng trực tiếp class Utils
@@ -35,6 +36,8 @@ class EnhancedAPIStrategy(IDownloadStrategy):
         self.session = None
         self.timeout = aiohttp.ClientTimeout(total=30)
         self.retry_delays = [1, 2, 5, 10]  # Thời gian trễ thử lại (giây)
+        # AIMDController (tuỳ chọn) nhận tín hiệu 429/phản hồi rỗng/độ trễ từ API
+        self.controller = controller
         
     @property
     def name(self) -> str:
@@ -156,11 +159,11 @@ class EnhancedAPIStrategy(IDownloadStrategy):
         for attempt in range(3):
             try:
                 params = self._build_detail_params(aweme_id)
-                # Lấy tham số X-Bogus
+                # Ký tham số bằng signer dùng chung
                 try:
-                    url = self.urls.POST_DETAIL + self.utils.getXbogus(params)
+                    url = self.urls.POST_DETAIL + get_signer().sign_params(params)
                 except Exception as e:
-                    logger.warning(f"Lấy X-Bogus thất bại: {e}, thử không có X-Bogus")
+                    logger.warning(f"Ký URL thất bại: {e}, thử không có chữ ký")
                     url = f"{self.urls.POST_DETAIL}?{params}"
                 
                 headers = {**douyin_headers}
@@ -168,12 +171,15 @@ class EnhancedAPIStrategy(IDownloadStrategy):
                     headers['Cookie'] = self._build_cookie_string()
                 
                 async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                    started = time.monotonic()
                     async with session.get(url, headers=headers) as response:
                         if response.status != 200:
+                            self._record_response(response.status)
                             logger.warning(f"API chi tiết trả về mã trạng thái: {response.status}")
                             continue
                         
                         text = await response.text()
+                        self._record_response(response.status, text, time.monotonic() - started)
                         if not text:
                             logger.warning("API chi tiết trả về phản hồi rỗng")
                             continue
@@ -191,6 +197,11 @@ class EnhancedAPIStrategy(IDownloadStrategy):
         
         return None
     
+    def _record_response(self, status: int, text: Optional[str] = None, latency: Optional[float] = None):
+        """Báo phản hồi cho bộ điều khiển AIMD (nếu có)"""
+        if self.controller is not None:
+            self.controller.record_response(status, text, latency)
+    
     async def _try_post_api(self, aweme_id: str) -> Optional[Dict]:
         """Thử lấy qua API tác phẩm người dùng"""
         # Ở đây có thể thử lấy ID tác giả video qua tìm kiếm hoặc cách khác
@@ -15,7 +15,7 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, AsyncIterator, Awaitable, Callable, Union
 from urllib.parse import urlparse
 import argparse
 import yaml
@@ -23,7 +23,6 @@ import yaml
 # Thư viện bên thứ ba
 try:
     import aiohttp
-    import requests
     from rich.console import Console
     from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
     from rich.table import Table
@@ -42,8 +41,12 @@ from apiproxy.douyin import douyin_headers
 from apiproxy.douyin.urls import Urls
 from apiproxy.douyin.result import Result
 from apiproxy.common.utils import Utils
+from apiproxy.common.mirror import MirrorHealth
+from apiproxy.common.signer import get_signer, set_default_signer
 from apiproxy.douyin.auth.cookie_manager import AutoCookieManager
 from apiproxy.douyin.database import DataBase
+from apiproxy.douyin.core.rate_limiter import get_shared_limiter
+from apiproxy.douyin.core.adaptive_controller import AIMDController, SCOPE_MEDIA
 
 # Cấu hình logging
 logging.basicConfig(
@@ -77,6 +80,9 @@ class DownloadStats:
         self.success = 0
         self.failed = 0
         self.skipped = 0
+        # Thống kê theo từng file tài nguyên (video, nhạc, ảnh bìa, ảnh)
+        self.assets_success = 0
+        self.assets_failed = 0
         self.start_time = time.time()
     
     @property
@@ -93,27 +99,13 @@ class DownloadStats:
             'success': self.success,
             'failed': self.failed,
             'skipped': self.skipped,
+            'assets_success': self.assets_success,
+            'assets_failed': self.assets_failed,
             'success_rate': f"{self.success_rate:.1f}%",
             'elapsed_time': f"{self.elapsed_time:.1f}s"
         }
 
 
-class RateLimiter:
-    """Bộ giới hạn tốc độ"""
-    def __init__(self, max_per_second: float = 2):
-        self.max_per_second = max_per_second
-        self.min_interval = 1.0 / max_per_second
-        self.last_request = 0
-    
-    async def acquire(self):
-        """Lấy quyền truy cập"""
-        current = time.time()
-        time_since_last = current - self.last_request
-        if time_since_last < self.min_interval:
-            await asyncio.sleep(self.min_interval - time_since_last)
-        self.last_request = time.time()
-
-
 class RetryManager:
     """Quản lý thử lại"""
     def __init__(self, max_retries: int = 3):
@@ -146,7 +138,11 @@ class UnifiedDownloader:
         
         # Khởi tạo các thành phần
         self.stats = DownloadStats()
-        self.rate_limiter = RateLimiter(max_per_second=2)
+        # Token bucket theo nhóm endpoint (post/detail/mix/music/media), dùng chung trong tiến trình
+        self.rate_limiter = get_shared_limiter(self.config.get('rate_limit'))
+        # Thuật toán ký URL dùng chung cho mọi request (xbogus, xbogus-v12, ...)
+        if self.config.get('signer'):
+            set_default_signer(self.config['signer'])
         self.retry_manager = RetryManager(max_retries=self.config.get('retry_times', 3))
         
         # Cookie và request headers (khởi tạo trễ, hỗ trợ tự động lấy)
@@ -158,12 +154,51 @@ class UnifiedDownloader:
         # Tải xuống tăng dần và cơ sở dữ liệu
         self.increase_cfg: Dict[str, Any] = self.config.get('increase', {}) or {}
         self.enable_database: bool = bool(self.config.get('database', True))
-        self.db: Optional[DataBase] = DataBase() if self.enable_database else None
+        self.db: Optional[DataBase] = DataBase(
+            db_path=str(self.config.get('database_path') or 'data.db'),
+            compress=bool(self.config.get('database_compress', False)),
+        ) if self.enable_database else None
         
         # Đường dẫn lưu
         self.save_path = Path(self.config.get('path', './Downloaded'))
         self.save_path.mkdir(parents=True, exist_ok=True)
+
+        # Phiên HTTP dùng chung cho cả lần chạy (khởi tạo trễ bên trong event loop)
+        self.network_cfg: Dict[str, Any] = self.config.get('network', {}) or {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Tham số ghi file (kích thước khối, cấp phát trước)
+        self.download_cfg: Dict[str, Any] = self.config.get('download', {}) or {}
+        # Giới hạn số file tải đồng thời: toàn cục và trong một tác phẩm
+        self._media_semaphore = asyncio.Semaphore(int(self.download_cfg.get('max_concurrent', 16)))
+        self.asset_concurrency = int(self.download_cfg.get('asset_concurrency', 8))
+        # Tải phân đoạn: số đoạn song song và ngưỡng kích thước (cần os.pwrite)
+        self.segments = max(1, int(self.download_cfg.get('segments', 1) or 1)) if hasattr(os, 'pwrite') else 1
+        self.segment_threshold = int(self.download_cfg.get('segment_threshold', 8 * 1024 * 1024))
+        # Mirror CDN: số mirror đua cùng lúc, thời gian không nhận dữ liệu thì coi là đứng (giây)
+        self.mirror_health = MirrorHealth()
+        self.mirror_race = max(1, int(self.download_cfg.get('mirror_race', 2)))
+        self.stall_timeout = float(self.download_cfg.get('stall_timeout', 30))
+        # Pipeline lật trang / tải xuống: số worker và kích thước hàng đợi (tạo áp lực ngược)
+        self.pipeline_workers = max(1, int(self.download_cfg.get('workers', self.config.get('thread', 5)) or 5))
+        self.pipeline_queue_size = max(1, int(self.download_cfg.get('queue_size', 50)))
+        # Điều khiển AIMD: tự tăng/giảm số worker và tốc độ API theo 429/phản hồi rỗng/403/độ trễ
+        self.controller = self._build_controller(self.config.get('adaptive', {}))
         
+    def _build_controller(self, adaptive_cfg) -> AIMDController:
+        """Tạo bộ điều khiển AIMD; `adaptive: false` giữ cố định số worker và tốc độ"""
+        if adaptive_cfg is False or (isinstance(adaptive_cfg, dict) and adaptive_cfg.get('enabled') is False):
+            return AIMDController(self.pipeline_workers, self.pipeline_workers, self.pipeline_workers)
+        adaptive_cfg = adaptive_cfg if isinstance(adaptive_cfg, dict) else {}
+        return AIMDController(
+            initial_workers=self.pipeline_workers,
+            min_workers=int(adaptive_cfg.get('min_workers', 1)),
+            max_workers=int(adaptive_cfg.get('max_workers', 2 * self.pipeline_workers)),
+            buckets=[self.rate_limiter.bucket(name) for name in ('post', 'detail', 'mix', 'music')],
+            media_buckets=[self.rate_limiter.bucket('media')],
+            latency_target=float(adaptive_cfg.get('latency_target', 3.0)),
+        )
+
     def _load_config(self, config_path: str) -> Dict:
         """Tải cấu hình từ file"""
         if not os.path.exists(config_path):
@@ -193,6 +228,30 @@ class UnifiedDownloader:
         
         return config
     
+    def _build_connector(self) -> aiohttp.TCPConnector:
+        """Tạo TCPConnector theo cấu hình network (giới hạn kết nối, keep-alive, cache DNS)"""
+        cfg = self.network_cfg
+        return aiohttp.TCPConnector(
+            limit=int(cfg.get('limit', 100)),
+            limit_per_host=int(cfg.get('limit_per_host', 10)),
+            keepalive_timeout=float(cfg.get('keepalive_timeout', 30)),
+            ttl_dns_cache=int(cfg.get('dns_cache_ttl', 300)),
+        )
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Lấy phiên HTTP dùng chung, tái sử dụng kết nối TCP/TLS tới cùng một host"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=self._build_connector())
+        return self._session
+
+    async def close(self):
+        """Đóng phiên HTTP dùng chung và ghi nốt bộ đệm database"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.db:
+            self.db.flush()
+
     def _build_cookie_string(self) -> str:
         """Xây dựng chuỗi Cookie"""
         if isinstance(self.cookies, str):
@@ -267,9 +326,10 @@ class UnifiedDownloader:
         """Phân giải liên kết ngắn"""
         if 'v.douyin.com' in url:
             try:
-                # Sử dụng request đồng bộ để lấy redirect
-                response = requests.get(url, headers=self.headers, allow_redirects=True, timeout=10)
-                final_url = response.url
+                # Theo redirect trên session dùng chung
+                session = await self._get_session()
+                async with session.get(url, headers=self.headers, allow_redirects=True, timeout=10) as response:
+                    final_url = str(response.url)
                 logger.info(f"Phân giải liên kết ngắn: {url} -> {final_url}")
                 return final_url
             except Exception as e:
@@ -362,17 +422,17 @@ class UnifiedDownloader:
         try:
             if context == 'post' and self.increase_cfg.get('post', False):
                 sec = sec_uid or self._get_sec_uid_from_info(info) or ''
-                return bool(self.db.get_user_post(sec, int(aweme_id)) if aweme_id.isdigit() else None)
+                return aweme_id.isdigit() and self.db.has_user_post(sec, int(aweme_id))
             if context == 'like' and self.increase_cfg.get('like', False):
                 sec = sec_uid or self._get_sec_uid_from_info(info) or ''
-                return bool(self.db.get_user_like(sec, int(aweme_id)) if aweme_id.isdigit() else None)
+                return aweme_id.isdigit() and self.db.has_user_like(sec, int(aweme_id))
             if context == 'mix' and self.increase_cfg.get('mix', False):
                 sec = sec_uid or self._get_sec_uid_from_info(info) or ''
                 mid = mix_id or ''
-                return bool(self.db.get_mix(sec, mid, int(aweme_id)) if aweme_id.isdigit() else None)
+                return aweme_id.isdigit() and self.db.has_mix(sec, mid, int(aweme_id))
             if context == 'music' and self.increase_cfg.get('music', False):
                 mid = music_id or ''
-                return bool(self.db.get_music(mid, int(aweme_id)) if aweme_id.isdigit() else None)
+                return aweme_id.isdigit() and self.db.has_music(mid, int(aweme_id))
         except Exception:
             return False
         return False
@@ -424,7 +484,7 @@ class UnifiedDownloader:
                 return False
             
             # Giới hạn tốc độ
-            await self.rate_limiter.acquire()
+            await self.rate_limiter.acquire('detail')
             
             # Lấy thông tin video
             if progress:
@@ -464,11 +524,11 @@ class UnifiedDownloader:
     async def _fetch_video_info(self, video_id: str) -> Optional[Dict]:
         """Lấy thông tin video"""
         try:
-            # Sử dụng trực tiếp class Douyin thành công từ DouYinCommand.py
-            from apiproxy.douyin.douyin import Douyin
+            # Sử dụng AsyncDouyin (cùng logic với class Douyin của DouYinCommand.py) trên session dùng chung
+            from apiproxy.douyin.async_douyin import AsyncDouyin
             
-            # Tạo instance Douyin
-            dy = Douyin(database=False)
+            # Tạo instance AsyncDouyin
+            dy = AsyncDouyin(database=False, session=await self._get_session())
             
             # Thiết lập cookies của chúng ta vào douyin_headers
             if hasattr(self, 'cookies') and self.cookies:
@@ -480,7 +540,7 @@ class UnifiedDownloader:
             
             try:
                 # Sử dụng implementation thành công hiện có
-                result = dy.getAwemeInfo(video_id)
+                result = await dy.getAwemeInfo(video_id)
                 if result:
                     logger.info(f"Class Douyin đã lấy thông tin video thành công: {result.get('desc', '')[:30]}")
                     return result
@@ -510,42 +570,50 @@ class UnifiedDownloader:
                 'Connection': 'keep-alive'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(fallback_url, headers=headers, timeout=15) as response:
-                    logger.info(f"Trạng thái phản hồi interface dự phòng: {response.status}")
-                    if response.status != 200:
-                        logger.error(f"Yêu cầu interface dự phòng thất bại, mã trạng thái: {response.status}")
-                        return None
+            session = await self._get_session()
+            async with session.get(fallback_url, headers=headers, timeout=15) as response:
+                logger.info(f"Trạng thái phản hồi interface dự phòng: {response.status}")
+                if response.status != 200:
+                    logger.error(f"Yêu cầu interface dự phòng thất bại, mã trạng thái: {response.status}")
+                    return None
                     
-                    text = await response.text()
-                    logger.info(f"Độ dài nội dung phản hồi interface dự phòng: {len(text)}")
+                text = await response.text()
+                logger.info(f"Độ dài nội dung phản hồi interface dự phòng: {len(text)}")
                     
-                    if not text:
-                        logger.error("Phản hồi interface dự phòng rỗng")
-                        return None
+                if not text:
+                    logger.error("Phản hồi interface dự phòng rỗng")
+                    return None
                     
-                    try:
-                        data = json.loads(text)
-                        logger.info(f"Dữ liệu trả về từ interface dự phòng: {data}")
+                try:
+                    data = json.loads(text)
+                    logger.info(f"Dữ liệu trả về từ interface dự phòng: {data}")
                         
-                        item_list = (data or {}).get('item_list') or []
-                        if item_list:
-                            aweme_detail = item_list[0]
-                            logger.info("Interface dự phòng đã lấy thông tin video thành công")
-                            return aweme_detail
-                        else:
-                            logger.error("Dữ liệu trả về từ interface dự phòng không có item_list")
+                    item_list = (data or {}).get('item_list') or []
+                    if item_list:
+                        aweme_detail = item_list[0]
+                        logger.info("Interface dự phòng đã lấy thông tin video thành công")
+                        return aweme_detail
+                    else:
+                        logger.error("Dữ liệu trả về từ interface dự phòng không có item_list")
                             
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Phân tích JSON interface dự phòng thất bại: {e}")
-                        logger.error(f"Nội dung phản hồi gốc: {text}")
-                        return None
+                except json.JSONDecodeError as e:
+                    logger.error(f"Phân tích JSON interface dự phòng thất bại: {e}")
+                    logger.error(f"Nội dung phản hồi gốc: {text}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Lấy thông tin video từ interface dự phòng thất bại: {e}")
         
         return None
     
+    def _build_signed_url(self, api_url: str, params: str) -> str:
+        """Ghép URL API với tham số đã ký (signer theo cấu hình `signer`, mặc định X-Bogus)"""
+        try:
+            return f"{api_url}{get_signer().sign_params(params)}"
+        except Exception as e:
+            logger.warning(f"Ký URL thất bại: {e}, thử không có chữ ký")
+            return f"{api_url}{params}"
+
     def _build_detail_params(self, aweme_id: str) -> str:
         """Xây dựng tham số API chi tiết"""
         # Sử dụng cùng định dạng tham số với douyinapi.py hiện có
@@ -585,42 +653,33 @@ class UnifiedDownloader:
             save_dir = self.save_path / author_name / folder_name
             save_dir.mkdir(parents=True, exist_ok=True)
             
-            success = True
+            # Danh sách tài nguyên cần tải: (các tầng URL mirror, đường dẫn, nhãn, bắt buộc)
+            assets: List[Tuple[List[List[str]], Path, str, bool]] = []
             
             if is_image:
                 # Tải xuống ảnh văn bản (không có watermark)
                 images = video_info.get('images', [])
                 for i, img in enumerate(images):
-                    img_url = self._get_best_quality_url(img.get('url_list', []))
-                    if img_url:
-                        file_path = save_dir / f"image_{i+1}.jpg"
-                        if await self._download_file(img_url, file_path):
-                            logger.info(f"Tải xuống ảnh {i+1}/{len(images)}: {file_path.name}")
-                        else:
-                            success = False
+                    img_urls = self._get_best_quality_urls(img.get('url_list', []))
+                    if img_urls:
+                        assets.append((img_urls, save_dir / f"image_{i+1}.jpg", f"ảnh {i+1}/{len(images)}", True))
             else:
                 # Tải xuống video (không có watermark)
-                video_url = self._get_no_watermark_url(video_info)
-                if video_url:
-                    file_path = save_dir / f"{folder_name}.mp4"
-                    if await self._download_file(video_url, file_path):
-                        logger.info(f"Tải xuống video: {file_path.name}")
-                    else:
-                        success = False
+                video_urls = self._get_no_watermark_urls(video_info)
+                if video_urls:
+                    assets.append((video_urls, save_dir / f"{folder_name}.mp4", "video", True))
                 
                 # Tải xuống âm thanh
                 if self.config.get('music', True):
-                    music_url = self._get_music_url(video_info)
-                    if music_url:
-                        file_path = save_dir / f"{folder_name}_music.mp3"
-                        await self._download_file(music_url, file_path)
+                    music_urls = self._get_music_urls(video_info)
+                    if music_urls:
+                        assets.append((music_urls, save_dir / f"{folder_name}_music.mp3", "nhạc", False))
             
             # Tải xuống ảnh bìa
             if self.config.get('cover', True):
-                cover_url = self._get_cover_url(video_info)
-                if cover_url:
-                    file_path = save_dir / f"{folder_name}_cover.jpg"
-                    await self._download_file(cover_url, file_path)
+                cover_urls = self._get_cover_urls(video_info)
+                if cover_urls:
+                    assets.append((cover_urls, save_dir / f"{folder_name}_cover.jpg", "ảnh bìa", False))
             
             # Lưu dữ liệu JSON
             if self.config.get('json', True):
@@ -628,94 +687,269 @@ class UnifiedDownloader:
                 with open(json_path, 'w', encoding='utf-8') as f:
                     json.dump(video_info, f, ensure_ascii=False, indent=2)
             
+            # Tải đồng thời các tài nguyên của tác phẩm
+            aweme_semaphore = asyncio.Semaphore(self.asset_concurrency)
+            
+            async def _fetch(urls: List[List[str]], file_path: Path) -> bool:
+                async with aweme_semaphore:
+                    return await self._download_file(urls, file_path)
+            
+            results = await asyncio.gather(*[_fetch(urls, file_path) for urls, file_path, _, _ in assets])
+            
+            success = True
+            for (_, file_path, label, required), ok in zip(assets, results):
+                if ok:
+                    self.stats.assets_success += 1
+                    logger.info(f"Tải xuống {label}: {file_path.name}")
+                else:
+                    self.stats.assets_failed += 1
+                    if required:
+                        success = False
+            
             return success
             
         except Exception as e:
             logger.error(f"Tải xuống file media thất bại: {e}")
             return False
     
-    def _get_no_watermark_url(self, video_info: Dict) -> Optional[str]:
-        """Lấy URL video không có watermark"""
+    def _get_no_watermark_urls(self, video_info: Dict) -> List[List[str]]:
+        """Lấy các tầng URL mirror của video: play_addr (không watermark) trước, download_addr sau"""
+        urls: List[str] = []
+        fallback: List[str] = []
         try:
             # Ưu tiên sử dụng play_addr_h264
             play_addr = video_info.get('video', {}).get('play_addr_h264') or \
                        video_info.get('video', {}).get('play_addr')
             
             if play_addr:
-                url_list = play_addr.get('url_list', [])
-                if url_list:
+                for url in play_addr.get('url_list', []) or []:
                     # Thay thế URL để lấy phiên bản không có watermark
-                    url = url_list[0]
                     url = url.replace('playwm', 'play')
                     url = url.replace('720p', '1080p')
-                    return url
+                    urls.append(url)
             
-            # Dự phòng: download_addr
+            # Dự phòng (có watermark): chỉ dùng khi đã thử hết play_addr
             download_addr = video_info.get('video', {}).get('download_addr')
             if download_addr:
-                url_list = download_addr.get('url_list', [])
-                if url_list:
-                    return url_list[0]
+                fallback.extend(download_addr.get('url_list', []) or [])
                     
         except Exception as e:
             logger.error(f"Lấy URL không có watermark thất bại: {e}")
         
-        return None
+        return [tier for tier in ([u for u in urls if u], [u for u in fallback if u]) if tier]
     
-    def _get_best_quality_url(self, url_list: List[str]) -> Optional[str]:
-        """Lấy URL chất lượng cao nhất"""
+    def _get_best_quality_urls(self, url_list: List[str]) -> List[List[str]]:
+        """Chia URL thành các tầng theo chất lượng, URL chất lượng cao nhất ở tầng đầu"""
         if not url_list:
-            return None
+            return []
         
-        # Ưu tiên chọn URL chứa từ khóa cụ thể
+        # Ưu tiên URL chứa từ khóa cụ thể, các URL còn lại làm tầng mirror dự phòng
         for keyword in ['1080', 'origin', 'high']:
             for url in url_list:
                 if keyword in url:
-                    return url
+                    rest = [u for u in url_list if u != url]
+                    return [[url], rest] if rest else [[url]]
         
-        # Trả về URL đầu tiên
-        return url_list[0]
+        return [list(url_list)]
     
-    def _get_music_url(self, video_info: Dict) -> Optional[str]:
-        """Lấy URL nhạc"""
+    def _get_music_urls(self, video_info: Dict) -> List[List[str]]:
+        """Lấy các URL mirror của nhạc (một tầng)"""
         try:
             music = video_info.get('music', {})
             play_url = music.get('play_url', {})
-            url_list = play_url.get('url_list', [])
-            return url_list[0] if url_list else None
+            urls = list(play_url.get('url_list', []) or [])
+            return [urls] if urls else []
         except:
-            return None
+            return []
     
-    def _get_cover_url(self, video_info: Dict) -> Optional[str]:
-        """Lấy URL ảnh bìa"""
+    def _get_cover_urls(self, video_info: Dict) -> List[List[str]]:
+        """Lấy các tầng URL mirror của ảnh bìa"""
         try:
             cover = video_info.get('video', {}).get('cover', {})
             url_list = cover.get('url_list', [])
-            return self._get_best_quality_url(url_list)
+            return self._get_best_quality_urls(url_list)
         except:
-            return None
+            return []
     
-    async def _download_file(self, url: str, save_path: Path) -> bool:
-        """Tải xuống file"""
-        try:
-            if save_path.exists():
-                logger.info(f"File đã tồn tại, bỏ qua: {save_path.name}")
-                return True
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        content = await response.read()
-                        with open(save_path, 'wb') as f:
-                            f.write(content)
+    async def _download_file(self, url: Union[str, List[List[str]]], save_path: Path) -> bool:
+        """Tải xuống file
+
+        Nội dung được ghi theo từng khối vào file tạm `.part`, chỉ đổi tên thành
+        file đích khi đã nhận đủ dữ liệu, nên bộ nhớ không phụ thuộc kích thước file
+        và không bao giờ để lại file đích bị cắt cụt.
+
+        `url` là một URL hoặc các tầng mirror theo thứ tự ưu tiên (vd. không watermark rồi mới
+        tới có watermark). Trong mỗi tầng, các mirror được sắp theo điểm sức khoẻ, đua lấy byte
+        đầu tiên, và chuyển sang mirror kế tiếp khi gặp 403/5xx hoặc bị đứng; chỉ khi đã thử
+        hết một tầng mới chuyển sang tầng sau.
+        """
+        temp_path = save_path.with_name(save_path.name + '.part')
+        if save_path.exists():
+            logger.info(f"File đã tồn tại, bỏ qua: {save_path.name}")
+            return True
+
+        tiers = [[url]] if isinstance(url, str) else url
+        tried = set()
+        session = await self._get_session()
+        async with self._media_semaphore:
+            # Bucket CDN riêng, không tiêu hao ngân sách request API
+            await self.rate_limiter.acquire('media')
+            for tier in tiers:
+                remaining = self.mirror_health.order(u for u in tier if u not in tried)
+                tried.update(remaining)
+                while remaining:
+                    racing, remaining = remaining[:self.mirror_race], remaining[self.mirror_race:]
+                    mirror_url, response, failed = await self._open_fastest_mirror(session, racing)
+                    if response is None:
+                        continue
+                    try:
+                        async with response:
+                            size = self._range_size(response) if self.segments > 1 else None
+                            if size and size >= self.segment_threshold:
+                                # File lớn và server hỗ trợ Range: tải nhiều đoạn song song
+                                response.close()
+                                await self._download_segmented(session, mirror_url, temp_path, size)
+                            else:
+                                await self._stream_to_file(response, temp_path)
+                        os.replace(temp_path, save_path)
                         return True
+                    except Exception as e:
+                        # Mirror bị ngắt hoặc đứng giữa chừng; các mirror đua cùng chỉ bị huỷ
+                        # (không lỗi) nên vẫn được thử lại cùng các mirror còn lại
+                        self.mirror_health.record_failure(mirror_url)
+                        logger.warning(f"Tải xuống từ mirror thất bại {mirror_url[:80]}: {e}")
+                        remaining = [u for u in racing if u != mirror_url and u not in failed] + remaining
+                        try:
+                            temp_path.unlink()
+                        except OSError:
+                            pass
+
+        logger.error(f"Tải xuống file thất bại, đã thử hết mirror: {save_path.name}")
+        return False
+
+    async def _open_fastest_mirror(self, session: aiohttp.ClientSession,
+                                   urls: List[str]
+                                   ) -> Tuple[Optional[str], Optional[aiohttp.ClientResponse], List[str]]:
+        """Gửi GET đồng thời tới các mirror, giữ phản hồi 200 đến trước nhất và huỷ phần còn lại
+
+        Trả về (mirror thắng, phản hồi, các mirror đã trả lỗi).
+        """
+        timeout = aiohttp.ClientTimeout(sock_connect=self.stall_timeout, sock_read=self.stall_timeout)
+
+        async def _open(mirror_url: str):
+            started = time.monotonic()
+            response = await session.get(mirror_url, headers=self.headers, timeout=timeout)
+            if response.status != 200:
+                self.controller.record_response(response.status, scope=SCOPE_MEDIA)
+                response.release()
+                raise IOError(f"mã trạng thái {response.status}")
+            self.mirror_health.record_success(mirror_url, time.monotonic() - started)
+            # Phản hồi CDN chỉ điều chỉnh số worker và bucket media, không đụng tới bucket API
+            self.controller.record_response(response.status, scope=SCOPE_MEDIA)
+            return mirror_url, response
+
+        tasks = {asyncio.ensure_future(_open(u)): u for u in urls}
+        pending = set(tasks)
+        winner: Tuple[Optional[str], Optional[aiohttp.ClientResponse]] = (None, None)
+        failed: List[str] = []
+        try:
+            while pending and winner[1] is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        failed.append(tasks[task])
+                        self.mirror_health.record_failure(tasks[task])
+                        logger.warning(f"Mirror lỗi {tasks[task][:80]}: {task.exception()}")
+                    elif winner[1] is None:
+                        winner = task.result()
                     else:
-                        logger.error(f"Tải xuống thất bại, mã trạng thái: {response.status}")
-                        return False
-                        
-        except Exception as e:
-            logger.error(f"Tải xuống file thất bại {url}: {e}")
-            return False
+                        task.result()[1].release()
+        finally:
+            for task in pending:
+                task.cancel()
+            # Đóng các phản hồi chậm hơn đã kịp mở trước khi bị huỷ
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, tuple):
+                    result[1].release()
+        return winner + (failed,)
+
+    @staticmethod
+    def _range_size(response: aiohttp.ClientResponse) -> Optional[int]:
+        """Kích thước file nếu server quảng bá Accept-Ranges: bytes và phản hồi không nén"""
+        if response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+            return None
+        if response.headers.get('Content-Encoding'):
+            return None
+        return response.content_length
+
+    async def _download_segmented(self, session: aiohttp.ClientSession, url: str, temp_path: Path, size: int):
+        """Tải file theo nhiều đoạn byte song song, ghi thẳng vào vị trí tương ứng (pwrite)"""
+        chunk_size = int(self.download_cfg.get('chunk_size', 64 * 1024))
+        step = -(-size // self.segments)
+
+        fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, size)
+                except OSError:
+                    os.ftruncate(fd, size)
+            else:
+                os.ftruncate(fd, size)
+
+            async def _fetch_segment(offset: List[int], end: int):
+                # offset[0] tăng dần theo dữ liệu đã ghi, nên lần thử lại tiếp tục giữa đoạn
+                headers = {**self.headers, 'Range': f'bytes={offset[0]}-{end}'}
+                timeout = aiohttp.ClientTimeout(sock_connect=self.stall_timeout, sock_read=self.stall_timeout)
+                async with session.get(url, headers=headers, timeout=timeout) as response:
+                    if response.status != 206:
+                        raise IOError(f"Yêu cầu đoạn trả về mã trạng thái {response.status}")
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        os.pwrite(fd, chunk, offset[0])
+                        offset[0] += len(chunk)
+                if offset[0] != end + 1:
+                    raise IOError(f"Đoạn dữ liệu không đầy đủ: {offset[0]}/{end + 1} byte")
+
+            tasks = [
+                asyncio.ensure_future(
+                    self.retry_manager.execute_with_retry(_fetch_segment, [start], min(start + step, size) - 1))
+                for start in range(0, size, step)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # gather dừng ở lỗi đầu tiên nhưng các đoạn khác vẫn chạy; huỷ và chờ chúng
+                # kết thúc trước khi đóng fd để không pwrite vào fd đã được cấp lại cho file khác
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            os.close(fd)
+
+    async def _stream_to_file(self, response: aiohttp.ClientResponse, temp_path: Path) -> int:
+        """Ghi nội dung phản hồi theo từng khối vào file tạm, trả về số byte đã ghi"""
+        chunk_size = int(self.download_cfg.get('chunk_size', 64 * 1024))
+        # Content-Length chỉ khớp với số byte ghi ra khi phản hồi không bị nén
+        expected = response.content_length if not response.headers.get('Content-Encoding') else None
+        written = 0
+
+        with open(temp_path, 'wb') as f:
+            if expected and self.download_cfg.get('preallocate', False) and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, expected)
+                except OSError as e:
+                    logger.debug(f"Không thể cấp phát trước {expected} byte cho {temp_path.name}: {e}")
+
+            async for chunk in response.content.iter_chunked(chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+
+            if expected and written != expected:
+                raise IOError(f"Dữ liệu không đầy đủ: {written}/{expected} byte")
+            # Cắt phần đã cấp phát trước nhưng không dùng tới
+            f.truncate(written)
+
+        return written
     
     async def download_user_page(self, url: str) -> bool:
         """Tải xuống nội dung trang chủ người dùng"""
@@ -758,11 +992,113 @@ class UnifiedDownloader:
             logger.error(f"Tải xuống trang chủ người dùng thất bại: {e}")
             return False
     
+    async def _iter_pages(self, fetch_page: Callable[[int], Awaitable[Optional[Dict]]],
+                          cursor_key: str, endpoint: str = 'post') -> AsyncIterator[Dict]:
+        """Lật trang theo con trỏ, mỗi lần yield một trang có aweme_list không rỗng"""
+        cursor = 0
+        while True:
+            # Giới hạn tốc độ
+            await self.rate_limiter.acquire(endpoint)
+            data = await fetch_page(cursor)
+            if not data:
+                return
+            if not data.get('aweme_list'):
+                return
+            yield data
+            # Kiểm tra xem còn thêm không
+            if not data.get('has_more'):
+                return
+            cursor = data.get(cursor_key, 0)
+
+    def _iter_user_post_pages(self, user_id: str) -> AsyncIterator[Dict]:
+        """Các trang tác phẩm đã đăng của người dùng (USER_POST), lấy dần theo max_cursor"""
+        return self._iter_pages(lambda cursor: self._fetch_user_posts(user_id, cursor), 'max_cursor')
+
+    async def _run_aweme_pipeline(self, pages: AsyncIterator[Dict],
+                                  process: Callable[[Dict], Awaitable[bool]],
+                                  should_skip: Optional[Callable[[Dict], bool]] = None,
+                                  max_count: int = 0) -> int:
+        """Pipeline producer/consumer: một producer lật trang, nhiều worker tải tác phẩm
+
+        Producer đọc từng trang từ pages và đẩy tác phẩm vào hàng đợi có giới hạn,
+        khi hàng đợi đầy thì producer dừng chờ (áp lực ngược). Trả về số tác phẩm tải thành công.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        stop = asyncio.Event()
+        cond = asyncio.Condition()
+        downloaded = 0
+        reserved = 0  # Số tác phẩm đã thành công + đang tải, để không vượt max_count
+
+        async def producer():
+            try:
+                async for data in pages:
+                    for aweme in data.get('aweme_list') or []:
+                        if stop.is_set():
+                            break
+                        await queue.put(aweme)
+                    if stop.is_set():
+                        break
+            finally:
+                await pages.aclose()
+            # Báo kết thúc cho từng worker (bỏ qua khi producer bị huỷ)
+            for _ in range(worker_count):
+                await queue.put(None)
+
+        async def worker():
+            nonlocal downloaded, reserved
+            while True:
+                aweme = await queue.get()
+                if aweme is None:
+                    return
+                # Sau khi dừng vẫn tiếp tục rút hàng đợi để producer không bị chặn
+                if stop.is_set():
+                    continue
+                try:
+                    if should_skip and should_skip(aweme):
+                        continue
+                except Exception as e:
+                    logger.error(f"Kiểm tra bỏ qua tác phẩm thất bại: {e}")
+                    continue
+                if max_count > 0:
+                    async with cond:
+                        while not stop.is_set() and reserved >= max_count:
+                            await cond.wait()
+                        if stop.is_set():
+                            continue
+                        reserved += 1
+                try:
+                    # Số worker thực sự chạy cùng lúc do bộ điều khiển AIMD quyết định
+                    async with self.controller.slot():
+                        success = await process(aweme)
+                except Exception as e:
+                    logger.error(f"Xử lý tác phẩm thất bại: {e}")
+                    success = False
+                async with cond:
+                    if success:
+                        downloaded += 1
+                        if max_count > 0 and downloaded >= max_count and not stop.is_set():
+                            console.print(f"[yellow]Đã đạt giới hạn số lượng tải xuống: {max_count}[/yellow]")
+                            stop.set()
+                    elif max_count > 0:
+                        reserved -= 1
+                    cond.notify_all()
+
+        worker_count = self.controller.max_workers
+        tasks = [asyncio.ensure_future(producer())]
+        tasks += [asyncio.ensure_future(worker()) for _ in range(worker_count)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Một worker lỗi: huỷ producer (có thể đang chờ hàng đợi đầy) và các worker còn lại
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return downloaded
+
     async def _download_user_posts(self, user_id: str):
         """Tải xuống tác phẩm người dùng đã đăng"""
         max_count = self.config.get('number', {}).get('post', 0)
-        cursor = 0
-        downloaded = 0
         
         console.print(f"\n[green]Bắt đầu tải xuống tác phẩm người dùng đã đăng...[/green]")
         
@@ -775,99 +1111,86 @@ class UnifiedDownloader:
             console=console
         ) as progress:
             
-            while True:
-                # Giới hạn tốc độ
-                await self.rate_limiter.acquire()
-                
-                # Lấy danh sách tác phẩm
-                posts_data = await self._fetch_user_posts(user_id, cursor)
-                if not posts_data:
-                    break
-                
-                aweme_list = posts_data.get('aweme_list', [])
-                if not aweme_list:
-                    break
-                
-                # Tải xuống tác phẩm
-                for aweme in aweme_list:
-                    if max_count > 0 and downloaded >= max_count:
-                        console.print(f"[yellow]Đã đạt giới hạn số lượng tải xuống: {max_count}[/yellow]")
-                        return
-                    
-                    # Lọc thời gian
-                    if not self._check_time_filter(aweme):
-                        continue
-                    
-                    # Tạo nhiệm vụ tải xuống
-                    task_id = progress.add_task(
-                        f"Tải xuống tác phẩm {downloaded + 1}", 
-                        total=100
-                    )
-                    
-                    # Đánh giá tăng dần
-                    if self._should_skip_increment('post', aweme, sec_uid=user_id):
-                        continue
-                    
-                    # Tải xuống
-                    success = await self._download_media_files(aweme, progress)
-                    
-                    if success:
-                        downloaded += 1
-                        self.stats.success += 1  # Tăng số đếm thành công
-                        progress.update(task_id, completed=100)
-                        self._record_increment('post', aweme, sec_uid=user_id)
-                    else:
-                        self.stats.failed += 1  # Tăng số đếm thất bại
-                        progress.update(task_id, description="[red]Tải xuống thất bại[/red]")
-                
-                # Kiểm tra xem còn thêm không
-                if not posts_data.get('has_more'):
-                    break
-                
-                cursor = posts_data.get('max_cursor', 0)
+            def should_skip(aweme: Dict) -> bool:
+                # Lọc thời gian và đánh giá tăng dần
+                if not self._check_time_filter(aweme):
+                    return True
+                return self._should_skip_increment('post', aweme, sec_uid=user_id)
+            
+            async def process(aweme: Dict) -> bool:
+                # Tạo nhiệm vụ tải xuống
+                task_id = progress.add_task(
+                    f"Tải xuống tác phẩm {aweme.get('aweme_id', '')}", 
+                    total=100
+                )
+                success = await self._download_media_files(aweme, progress)
+                if success:
+                    self.stats.success += 1  # Tăng số đếm thành công
+                    progress.update(task_id, completed=100)
+                    self._record_increment('post', aweme, sec_uid=user_id)
+                else:
+                    self.stats.failed += 1  # Tăng số đếm thất bại
+                    progress.update(task_id, description="[red]Tải xuống thất bại[/red]")
+                return success
+            
+            downloaded = await self._run_aweme_pipeline(
+                self._iter_user_post_pages(user_id), process, should_skip, max_count
+            )
         
         console.print(f"[green]✅ Hoàn thành tải xuống tác phẩm người dùng, đã tải {downloaded} tác phẩm[/green]")
     
     async def _fetch_user_posts(self, user_id: str, cursor: int = 0) -> Optional[Dict]:
-        """Lấy danh sách tác phẩm người dùng"""
+        """Lấy một trang danh sách tác phẩm người dùng (USER_POST) bắt đầu từ max_cursor"""
         try:
-            # Sử dụng trực tiếp phương thức getUserInfo của class Douyin, giống như DouYinCommand.py
-            from apiproxy.douyin.douyin import Douyin
-            
-            # Tạo instance Douyin
-            dy = Douyin(database=False)
-            
-            # Lấy danh sách tác phẩm người dùng
-            result = dy.getUserInfo(
-                user_id, 
-                "post", 
-                35, 
-                0,  # Không giới hạn số lượng
-                False,  # Không bật tăng dần
-                "",  # start_time
-                ""   # end_time
-            )
-            
-            if result:
-                logger.info(f"Class Douyin đã lấy danh sách tác phẩm người dùng thành công, tổng {len(result)} tác phẩm")
-                # Chuyển đổi sang định dạng mong muốn
-                return {
-                    'status_code': 0,
-                    'aweme_list': result,
-                    'max_cursor': cursor,
-                    'has_more': False
-                }
-            else:
-                logger.error("Class Douyin trả về kết quả rỗng")
-                return None
-                
+            params_list = [
+                f'sec_user_id={user_id}',
+                f'max_cursor={cursor}',
+                'count=35',
+                'aid=6383',
+                'device_platform=webapp',
+                'channel=channel_pc_web',
+                'pc_client_type=1',
+                'version_code=170400',
+                'version_name=17.4.0',
+                'cookie_enabled=true',
+                'screen_width=1920',
+                'screen_height=1080',
+                'browser_language=zh-CN',
+                'browser_platform=MacIntel',
+                'browser_name=Chrome',
+                'browser_version=122.0.0.0',
+                'browser_online=true'
+            ]
+            params = '&'.join(params_list)
+
+            full_url = self._build_signed_url(self.urls_helper.USER_POST, params)
+
+            logger.info(f"Yêu cầu danh sách tác phẩm người dùng: {full_url[:100]}...")
+
+            session = await self._get_session()
+            started = time.monotonic()
+            async with session.get(full_url, headers=self.headers, timeout=10) as response:
+                if response.status != 200:
+                    self.controller.record_response(response.status)
+                    logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
+                    return None
+
+                text = await response.text()
+                self.controller.record_response(response.status, text, time.monotonic() - started)
+                if not text:
+                    logger.error("Nội dung phản hồi rỗng")
+                    return None
+
+                data = json.loads(text)
+                if data.get('status_code') == 0:
+                    return data
+                else:
+                    logger.error(f"API trả về lỗi: {data.get('status_msg', 'Lỗi không xác định')}")
+                    return None
         except Exception as e:
             logger.error(f"Lấy danh sách tác phẩm người dùng thất bại: {e}")
-            import traceback
-            traceback.print_exc()
-        
         return None
-    
+
     async def _download_user_likes(self, user_id: str):
         """Tải xuống tác phẩm người dùng đã thích"""
         max_count = 0
@@ -875,8 +1198,6 @@ class UnifiedDownloader:
             max_count = int(self.config.get('number', {}).get('like', 0))
         except Exception:
             max_count = 0
-        cursor = 0
-        downloaded = 0
 
         console.print(f"\n[green]Bắt đầu tải xuống tác phẩm người dùng đã thích...[/green]")
 
@@ -889,50 +1210,29 @@ class UnifiedDownloader:
             console=console
         ) as progress:
 
-            while True:
-                # Giới hạn tốc độ
-                await self.rate_limiter.acquire()
-
-                # Lấy danh sách thích
-                likes_data = await self._fetch_user_likes(user_id, cursor)
-                if not likes_data:
-                    break
-
-                aweme_list = likes_data.get('aweme_list', [])
-                if not aweme_list:
-                    break
-
-                # Tải xuống tác phẩm
-                for aweme in aweme_list:
-                    if max_count > 0 and downloaded >= max_count:
-                        console.print(f"[yellow]Đã đạt giới hạn số lượng tải xuống: {max_count}[/yellow]")
-                        return
-
-                    if not self._check_time_filter(aweme):
-                        continue
-
-                    task_id = progress.add_task(
-                        f"Tải xuống thích {downloaded + 1}",
-                        total=100
-                    )
-
-                    # Đánh giá tăng dần
-                    if self._should_skip_increment('like', aweme, sec_uid=user_id):
-                        continue
-
-                    success = await self._download_media_files(aweme, progress)
-
-                    if success:
-                        downloaded += 1
-                        progress.update(task_id, completed=100)
-                        self._record_increment('like', aweme, sec_uid=user_id)
-                    else:
-                        progress.update(task_id, description="[red]Tải xuống thất bại[/red]")
+            def should_skip(aweme: Dict) -> bool:
+                if not self._check_time_filter(aweme):
+                    return True
+                # Đánh giá tăng dần
+                return self._should_skip_increment('like', aweme, sec_uid=user_id)
+
+            async def process(aweme: Dict) -> bool:
+                task_id = progress.add_task(
+                    f"Tải xuống thích {aweme.get('aweme_id', '')}",
+                    total=100
+                )
+                success = await self._download_media_files(aweme, progress)
+                if success:
+                    progress.update(task_id, completed=100)
+                    self._record_increment('like', aweme, sec_uid=user_id)
+                else:
+                    progress.update(task_id, description="[red]Tải xuống thất bại[/red]")
+                return success
 
-                # Lật trang
-                if not likes_data.get('has_more'):
-                    break
-                cursor = likes_data.get('max_cursor', 0)
+            downloaded = await self._run_aweme_pipeline(
+                self._iter_pages(lambda cursor: self._fetch_user_likes(user_id, cursor), 'max_cursor'),
+                process, should_skip, max_count
+            )
 
         console.print(f"[green]✅ Hoàn thành tải xuống tác phẩm thích, đã tải {downloaded} tác phẩm[/green]")
 
@@ -962,32 +1262,30 @@ class UnifiedDownloader:
 
             api_url = self.urls_helper.USER_FAVORITE_A
 
-            try:
-                xbogus = self.utils.getXbogus(params)
-                full_url = f"{api_url}{params}&X-Bogus={xbogus}"
-            except Exception as e:
-                logger.warning(f"Lấy X-Bogus thất bại: {e}, thử không có X-Bogus")
-                full_url = f"{api_url}{params}"
+            full_url = self._build_signed_url(api_url, params)
 
             logger.info(f"Yêu cầu danh sách thích người dùng: {full_url[:100]}...")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_url, headers=self.headers, timeout=10) as response:
-                    if response.status != 200:
-                        logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
-                        return None
-
-                    text = await response.text()
-                    if not text:
-                        logger.error("Nội dung phản hồi rỗng")
-                        return None
-
-                    data = json.loads(text)
-                    if data.get('status_code') == 0:
-                        return data
-                    else:
-                        logger.error(f"API trả về lỗi: {data.get('status_msg', 'Lỗi không xác định')}")
-                        return None
+            session = await self._get_session()
+            started = time.monotonic()
+            async with session.get(full_url, headers=self.headers, timeout=10) as response:
+                if response.status != 200:
+                    self.controller.record_response(response.status)
+                    logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
+                    return None
+
+                text = await response.text()
+                self.controller.record_response(response.status, text, time.monotonic() - started)
+                if not text:
+                    logger.error("Nội dung phản hồi rỗng")
+                    return None
+
+                data = json.loads(text)
+                if data.get('status_code') == 0:
+                    return data
+                else:
+                    logger.error(f"API trả về lỗi: {data.get('status_msg', 'Lỗi không xác định')}")
+                    return None
         except Exception as e:
             logger.error(f"Lấy danh sách thích người dùng thất bại: {e}")
         return None
@@ -1007,7 +1305,7 @@ class UnifiedDownloader:
 
         console.print(f"\n[green]Bắt đầu lấy danh sách bộ sưu tập người dùng...[/green]")
         while True:
-            await self.rate_limiter.acquire()
+            await self.rate_limiter.acquire('mix')
             mix_list_data = await self._fetch_user_mix_list(user_id, cursor)
             if not mix_list_data:
                 break
@@ -1057,29 +1355,27 @@ class UnifiedDownloader:
             params = '&'.join(params_list)
 
             api_url = self.urls_helper.USER_MIX_LIST
-            try:
-                xbogus = self.utils.getXbogus(params)
-                full_url = f"{api_url}{params}&X-Bogus={xbogus}"
-            except Exception as e:
-                logger.warning(f"Lấy X-Bogus thất bại: {e}, thử không có X-Bogus")
-                full_url = f"{api_url}{params}"
+            full_url = self._build_signed_url(api_url, params)
 
             logger.info(f"Yêu cầu danh sách bộ sưu tập người dùng: {full_url[:100]}...")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_url, headers=self.headers, timeout=10) as response:
-                    if response.status != 200:
-                        logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
-                        return None
-                    text = await response.text()
-                    if not text:
-                        logger.error("Nội dung phản hồi rỗng")
-                        return None
-                    data = json.loads(text)
-                    if data.get('status_code') == 0:
-                        return data
-                    else:
-                        logger.error(f"API trả về lỗi: {data.get('status_msg', 'Lỗi không xác định')}")
-                        return None
+            session = await self._get_session()
+            started = time.monotonic()
+            async with session.get(full_url, headers=self.headers, timeout=10) as response:
+                if response.status != 200:
+                    self.controller.record_response(response.status)
+                    logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
+                    return None
+                text = await response.text()
+                self.controller.record_response(response.status, text, time.monotonic() - started)
+                if not text:
+                    logger.error("Nội dung phản hồi rỗng")
+                    return None
+                data = json.loads(text)
+                if data.get('status_code') == 0:
+                    return data
+                else:
+                    logger.error(f"API trả về lỗi: {data.get('status_msg', 'Lỗi không xác định')}")
+                    return None
         except Exception as e:
             logger.error(f"Lấy danh sách bộ sưu tập người dùng thất bại: {e}")
         return None
@@ -1104,29 +1400,12 @@ class UnifiedDownloader:
 
     async def _download_mix_by_id(self, mix_id: str):
         """Tải xuống tất cả tác phẩm theo ID bộ sưu tập"""
-        cursor = 0
-        downloaded = 0
-
         console.print(f"\n[green]Bắt đầu tải xuống bộ sưu tập {mix_id} ...[/green]")
 
-        while True:
-            await self.rate_limiter.acquire()
-            data = await self._fetch_mix_awemes(mix_id, cursor)
-            if not data:
-                break
-
-            aweme_list = data.get('aweme_list') or []
-            if not aweme_list:
-                break
-
-            for aweme in aweme_list:
-                success = await self._download_media_files(aweme)
-                if success:
-                    downloaded += 1
-
-            if not data.get('has_more'):
-                break
-            cursor = data.get('cursor', 0)
+        downloaded = await self._run_aweme_pipeline(
+            self._iter_pages(lambda cursor: self._fetch_mix_awemes(mix_id, cursor), 'cursor', 'mix'),
+            self._download_media_files
+        )
 
         console.print(f"[green]✅ Hoàn thành tải xuống bộ sưu tập, đã tải {downloaded} tác phẩm[/green]")
 
@@ -1155,26 +1434,24 @@ class UnifiedDownloader:
             params = '&'.join(params_list)
 
             api_url = self.urls_helper.USER_MIX
-            try:
-                xbogus = self.utils.getXbogus(params)
-                full_url = f"{api_url}{params}&X-Bogus={xbogus}"
-            except Exception as e:
-                logger.warning(f"Lấy X-Bogus thất bại: {e}, thử không có X-Bogus")
-                full_url = f"{api_url}{params}"
+            full_url = self._build_signed_url(api_url, params)
 
             logger.info(f"Yêu cầu danh sách tác phẩm bộ sưu tập: {full_url[:100]}...")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_url, headers=self.headers, timeout=10) as response:
-                    if response.status != 200:
-                        logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
-                        return None
-                    text = await response.text()
-                    if not text:
-                        logger.error("Nội dung phản hồi rỗng")
-                        return None
-                    data = json.loads(text)
-                    # USER_MIX trả về không có status_code thống nhất, ở đây trả về trực tiếp
-                    return data
+            session = await self._get_session()
+            started = time.monotonic()
+            async with session.get(full_url, headers=self.headers, timeout=10) as response:
+                if response.status != 200:
+                    self.controller.record_response(response.status)
+                    logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
+                    return None
+                text = await response.text()
+                self.controller.record_response(response.status, text, time.monotonic() - started)
+                if not text:
+                    logger.error("Nội dung phản hồi rỗng")
+                    return None
+                data = json.loads(text)
+                # USER_MIX trả về không có status_code thống nhất, ở đây trả về trực tiếp
+                return data
         except Exception as e:
             logger.error(f"Lấy tác phẩm bộ sưu tập thất bại: {e}")
         return None
@@ -1191,8 +1468,6 @@ class UnifiedDownloader:
                 logger.error(f"Không thể trích xuất ID từ liên kết nhạc: {url}")
                 return False
 
-            cursor = 0
-            downloaded = 0
             limit_num = 0
             try:
                 limit_num = int((self.config.get('number', {}) or {}).get('music', 0))
@@ -1201,29 +1476,18 @@ class UnifiedDownloader:
 
             console.print(f"\n[green]Bắt đầu tải xuống tác phẩm trong nhạc {music_id}...[/green]")
 
-            while True:
-                await self.rate_limiter.acquire()
-                data = await self._fetch_music_awemes(music_id, cursor)
-                if not data:
-                    break
-                aweme_list = data.get('aweme_list') or []
-                if not aweme_list:
-                    break
-
-                for aweme in aweme_list:
-                    if limit_num > 0 and downloaded >= limit_num:
-                        console.print(f"[yellow]Đã đạt giới hạn số lượng tải xuống nhạc: {limit_num}[/yellow]")
-                        return True
-                    if self._should_skip_increment('music', aweme, music_id=music_id):
-                        continue
-                    success = await self._download_media_files(aweme)
-                    if success:
-                        downloaded += 1
-                        self._record_increment('music', aweme, music_id=music_id)
-
-                if not data.get('has_more'):
-                    break
-                cursor = data.get('cursor', 0)
+            async def process(aweme: Dict) -> bool:
+                success = await self._download_media_files(aweme)
+                if success:
+                    self._record_increment('music', aweme, music_id=music_id)
+                return success
+
+            downloaded = await self._run_aweme_pipeline(
+                self._iter_pages(lambda cursor: self._fetch_music_awemes(music_id, cursor), 'cursor', 'music'),
+                process,
+                lambda aweme: self._should_skip_increment('music', aweme, music_id=music_id),
+                limit_num
+            )
 
             console.print(f"[green]✅ Hoàn thành tải xuống tác phẩm nhạc, đã tải {downloaded} tác phẩm[/green]")
             return True
@@ -1256,25 +1520,23 @@ class UnifiedDownloader:
             params = '&'.join(params_list)
 
             api_url = self.urls_helper.MUSIC
-            try:
-                xbogus = self.utils.getXbogus(params)
-                full_url = f"{api_url}{params}&X-Bogus={xbogus}"
-            except Exception as e:
-                logger.warning(f"Lấy X-Bogus thất bại: {e}, thử không có X-Bogus")
-                full_url = f"{api_url}{params}"
+            full_url = self._build_signed_url(api_url, params)
 
             logger.info(f"Yêu cầu danh sách tác phẩm nhạc: {full_url[:100]}...")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(full_url, headers=self.headers, timeout=10) as response:
-                    if response.status != 200:
-                        logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
-                        return None
-                    text = await response.text()
-                    if not text:
-                        logger.error("Nội dung phản hồi rỗng")
-                        return None
-                    data = json.loads(text)
-                    return data
+            session = await self._get_session()
+            started = time.monotonic()
+            async with session.get(full_url, headers=self.headers, timeout=10) as response:
+                if response.status != 200:
+                    self.controller.record_response(response.status)
+                    logger.error(f"Yêu cầu thất bại, mã trạng thái: {response.status}")
+                    return None
+                text = await response.text()
+                self.controller.record_response(response.status, text, time.monotonic() - started)
+                if not text:
+                    logger.error("Nội dung phản hồi rỗng")
+                    return None
+                data = json.loads(text)
+                return data
         except Exception as e:
             logger.error(f"Lấy tác phẩm nhạc thất bại: {e}")
         return None
@@ -1329,6 +1591,14 @@ class UnifiedDownloader:
             border_style="cyan"
         ))
         
+        try:
+            await self._run()
+        finally:
+            # Giải phóng phiên HTTP dùng chung
+            await self.close()
+
+    async def _run(self):
+        """Xử lý lần lượt các liên kết trong cấu hình"""
         # Khởi tạo Cookie và request headers
         await self._initialize_cookies_and_headers()
         
@@ -1398,6 +1668,8 @@ class UnifiedDownloader:
         table.add_row("Thành công", str(stats['success']))
         table.add_row("Thất bại", str(stats['failed']))
         table.add_row("Đã bỏ qua", str(stats['skipped']))
+        table.add_row("File thành công", str(stats['assets_success']))
+        table.add_row("File thất bại", str(stats['assets_failed']))
         table.add_row("Tỷ lệ thành công", stats['success_rate'])
         table.add_row("Thời gian", stats['elapsed_time'])
         
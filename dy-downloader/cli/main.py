@@ -17,14 +17,24 @@ display = ProgressDisplay()
 
 
 async def download_url(url: str, config: ConfigLoader, cookie_manager: CookieManager, database: Database = None):
-    file_manager = FileManager(config.get('path'))
-    rate_limiter = RateLimiter(max_per_second=2)
+    rate_limiter = RateLimiter(
+        max_per_second=float(config.get('rate_limit', 2) or 2),
+        rates=config.get('rate_limits') or None,
+    )
     retry_handler = RetryHandler(max_retries=config.get('retry_times', 3))
+    file_manager = FileManager(
+        config.get('path'),
+        segments=int(config.get('segments', 1) or 1),
+        segment_threshold=int(config.get('segment_threshold', 8 * 1024 * 1024) or 0),
+        retry_handler=retry_handler,
+        stall_timeout=float(config.get('stall_timeout', 30) or 30),
+        mirror_race=int(config.get('mirror_race', 2) or 1),
+    )
     queue_manager = QueueManager(max_workers=int(config.get('thread', 5) or 5))
 
     original_url = url
 
-    async with DouyinAPIClient(cookie_manager.get_cookies()) as api_client:
+    async with DouyinAPIClient(cookie_manager.get_cookies(), signer=config.get('signer')) as api_client:
         if url.startswith('https://v.douyin.com'):
             resolved_url = await api_client.resolve_short_url(url)
             if resolved_url:
@@ -108,23 +118,33 @@ async def main_async(args):
         display.print_warning("Cookies có thể không hợp lệ hoặc không đầy đủ")
 
     database = None
-    if config.get('database'):
-        database = Database()
+    if config.get('database') or args.migrate_db:
+        database = Database(compress=bool(config.get('database_compress', False)))
         await database.initialize()
         display.print_success("Cơ sở dữ liệu đã khởi tạo")
 
+    if args.migrate_db:
+        changed = await database.migrate_metadata(compress=args.migrate_db == 'compress')
+        await database.close()
+        display.print_success(f"Đã chuyển đổi metadata của {changed} bản ghi")
+        return
+
     urls = config.get_links()
     display.print_info(f"Tìm thấy {len(urls)} URL để xử lý")
 
     all_results = []
 
-    for i, url in enumerate(urls, 1):
-        display.print_info(f"Đang xử lý [{i}/{len(urls)}]: {url}")
+    try:
+        for i, url in enumerate(urls, 1):
+            display.print_info(f"Đang xử lý [{i}/{len(urls)}]: {url}")
 
-        result = await download_url(url, config, cookie_manager, database)
-        if result:
-            all_results.append(result)
-            display.show_result(result)
+            result = await download_url(url, config, cookie_manager, database)
+            if result:
+                all_results.append(result)
+                display.show_result(result)
+    finally:
+        if database:
+            await database.close()
 
     if all_results:
         from core.downloader_base import DownloadResult
@@ -145,6 +165,8 @@ def main():
     parser.add_argument('-c', '--config', help='Đường dẫn file cấu hình (mặc định: config.yml)')
     parser.add_argument('-p', '--path', help='Đường dẫn lưu')
     parser.add_argument('-t', '--thread', type=int, help='Số luồng')
+    parser.add_argument('--migrate-db', choices=['compress', 'decompress'],
+                        help='Nén (hoặc giải nén) metadata đã lưu trong cơ sở dữ liệu rồi thoát')
     parser.add_argument('--version', action='version', version='1.0.0')
 
     args = parser.parse_args()
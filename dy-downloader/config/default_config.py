@@ -26,6 +26,14 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     },
     'thread': 5,
     'retry_times': 3,
+    'segments': 1,
+    'segment_threshold': 8 * 1024 * 1024,
+    'stall_timeout': 30,
+    'mirror_race': 2,
+    'rate_limit': 2,
+    'rate_limits': {},
+    'signer': 'xbogus-v12',
     'database': True,
+    'database_compress': False,
     'auto_cookie': False,
 }
@@ -1,5 +1,6 @@
 from .rate_limiter import RateLimiter
 from .retry_handler import RetryHandler
 from .queue_manager import QueueManager
+from .mirror_health import MirrorHealth
 
-__all__ = ['RateLimiter', 'RetryHandler', 'QueueManager']
+__all__ = ['RateLimiter', 'RetryHandler', 'QueueManager', 'MirrorHealth']
@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, Iterable, List, Sequence
+from urllib.parse import urlparse
+
+
+class MirrorHealth:
+    """Per-host health scores used to order CDN candidates from a url_list.
+
+    Lower is better: EWMA first-byte latency plus a penalty per recent failure.
+    Unknown hosts get a default latency so they are still tried.
+    """
+
+    def __init__(self, alpha: float = 0.3, failure_penalty: float = 5.0, default_latency: float = 1.0):
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self.default_latency = default_latency
+        self._latency: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlparse(url).netloc
+
+    def record_success(self, url: str, latency: float) -> None:
+        host = self.host(url)
+        with self._lock:
+            previous = self._latency.get(host)
+            self._latency[host] = latency if previous is None else (1 - self.alpha) * previous + self.alpha * latency
+            if self._failures.get(host):
+                self._failures[host] -= 1
+
+    def record_failure(self, url: str) -> None:
+        host = self.host(url)
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+
+    def score(self, url: str) -> float:
+        host = self.host(url)
+        with self._lock:
+            latency = self._latency.get(host, self.default_latency)
+            return latency + self.failure_penalty * self._failures.get(host, 0)
+
+    def should_race(self, urls: Sequence[str], margin: float = 0.25) -> bool:
+        # Probing pays off only while some host is unscored or the best two are close
+        hosts = [self.host(u) for u in urls]
+        with self._lock:
+            if any(h not in self._latency and h not in self._failures for h in hosts):
+                return True
+        scores = sorted(self.score(u) for u in urls)
+        return len(scores) > 1 and scores[1] - scores[0] <= margin * scores[0]
+
+    def order(self, urls: Iterable[str]) -> List[str]:
+        unique = list(dict.fromkeys(u for u in urls if u))
+        return sorted(unique, key=self.score)
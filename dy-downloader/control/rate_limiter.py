@@ -1,21 +1,140 @@
 import asyncio
 import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+class TokenBucket:
+    """Token bucket with burst capacity and FIFO waiters.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``. No lock is
+    held while waiting: queued callers are woken in arrival order by a loop timer.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: deque = deque()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        # Never jumps ahead of queued waiters
+        self._refill()
+        if not self._waiters and self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1) -> None:
+        if tokens > self.capacity:
+            raise ValueError(f'cannot acquire {tokens} tokens from a bucket of {self.capacity}')
+        if self.try_acquire(tokens):
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((future, tokens))
+        self._schedule(loop)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted but cancelled before use: hand the tokens back
+                self._tokens = min(self.capacity, self._tokens + tokens)
+            self._schedule(loop)
+            raise
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+        while self._waiters:
+            future, tokens = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self._wakeup = loop.call_later(delay, self._schedule, loop)
+                return
+            self._tokens -= tokens
+            self._waiters.popleft()
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'tokens': round(self.tokens, 3),
+            'waiting': len(self._waiters),
+        }
+
+
+RateSpec = Union[float, Tuple[float, float], Dict[str, float]]
+
+# Endpoint family -> (tokens per second, burst). API families share max_per_second by default;
+# CDN media has its own much larger budget so downloads and API paging never starve each other.
+ENDPOINT_FAMILIES = ('post', 'detail', 'mix', 'music')
+DEFAULT_MEDIA_RATE = (20.0, 40.0)
 
 
 class RateLimiter:
-    def __init__(self, max_per_second: float = 2):
+    """Per-endpoint token buckets (post, detail, mix, music, media, default)."""
+
+    def __init__(
+        self,
+        max_per_second: float = 2,
+        burst: Optional[float] = None,
+        rates: Optional[Dict[str, RateSpec]] = None,
+    ):
         self.max_per_second = max_per_second
-        self.min_interval = 1.0 / max_per_second
-        self.last_request = 0
-        self._lock = asyncio.Lock()
+        api_rate = (float(max_per_second), burst if burst is not None else max(1.0, 2 * max_per_second))
+        self._rates: Dict[str, Tuple[float, float]] = {name: api_rate for name in ENDPOINT_FAMILIES}
+        self._rates['default'] = api_rate
+        self._rates['media'] = DEFAULT_MEDIA_RATE
+        for name, spec in (rates or {}).items():
+            self._rates[name] = self._parse_rate(spec)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _parse_rate(spec: RateSpec) -> Tuple[float, float]:
+        if isinstance(spec, dict):
+            rate = float(spec.get('rate', 2))
+            return rate, float(spec.get('burst', max(1.0, rate)))
+        if isinstance(spec, (tuple, list)):
+            return float(spec[0]), float(spec[1])
+        rate = float(spec)
+        return rate, max(1.0, rate)
+
+    def bucket(self, endpoint: str = 'default') -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            rate, burst = self._rates.get(endpoint, self._rates['default'])
+            bucket = self._buckets[endpoint] = TokenBucket(rate, burst)
+        return bucket
 
-    async def acquire(self):
-        async with self._lock:
-            current = time.time()
-            time_since_last = current - self.last_request
+    async def acquire(self, endpoint: str = 'default', tokens: float = 1) -> None:
+        await self.bucket(endpoint).acquire(tokens)
 
-            if time_since_last < self.min_interval:
-                wait_time = self.min_interval - time_since_last
-                await asyncio.sleep(wait_time)
+    def try_acquire(self, endpoint: str = 'default', tokens: float = 1) -> bool:
+        return self.bucket(endpoint).try_acquire(tokens)
 
-            self.last_request = time.time()
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: bucket.get_stats() for name, bucket in self._buckets.items()}
@@ -5,7 +5,7 @@ from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlencode
 
 from utils.logger import setup_logger
-from utils.xbogus import XBogus
+from utils.signer import get_signer
 
 logger = setup_logger('APIClient')
 
@@ -13,7 +13,7 @@ logger = setup_logger('APIClient')
 class DouyinAPIClient:
     BASE_URL = 'https://www.douyin.com'
 
-    def __init__(self, cookies: Dict[str, str]):
+    def __init__(self, cookies: Dict[str, str], signer: Optional[str] = None):
         self.cookies = cookies or {}
         self._session: Optional[aiohttp.ClientSession] = None
         self.headers = {
@@ -27,7 +27,7 @@ class DouyinAPIClient:
             'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
             'Connection': 'keep-alive',
         }
-        self._signer = XBogus(self.headers['User-Agent'])
+        self._signer = get_signer(signer)
 
     async def __aenter__(self) -> 'DouyinAPIClient':
         await self._ensure_session()
@@ -84,8 +84,8 @@ class DouyinAPIClient:
         }
 
     def sign_url(self, url: str) -> Tuple[str, str]:
-        signed_url, _xbogus, ua = self._signer.build(url)
-        return signed_url, ua
+        ua = self.headers['User-Agent']
+        return self._signer.sign_params(url, ua), ua
 
     def build_signed_path(self, path: str, params: Dict[str, Any]) -> Tuple[str, str]:
         query = urlencode(params)
@@ -1,7 +1,8 @@
 import json
 from abc import ABC, abstractmethod
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 from urllib.parse import urlparse
 
 from config import ConfigLoader
@@ -68,6 +69,12 @@ class BaseDownloader(ABC):
             return not await self.database.is_downloaded(aweme_id)
         return True
 
+    async def _downloaded_ids(self, aweme_items: List[Dict[str, Any]]) -> Set[str]:
+        if not self.database:
+            return set()
+        ids = {str(item.get('aweme_id')) for item in aweme_items if item.get('aweme_id')}
+        return ids - await self.database.filter_undownloaded(ids)
+
     def _filter_by_time(self, aweme_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         start_time = self.config.get('start_time')
         end_time = self.config.get('end_time')
@@ -129,22 +136,21 @@ class BaseDownloader(ABC):
 
         media_type = self._detect_media_type(aweme_data)
         if media_type == 'video':
-            video_info = self._build_no_watermark_url(aweme_data)
-            if not video_info:
+            video_candidates = self._build_no_watermark_candidates(aweme_data)
+            if not video_candidates:
                 logger.error(f'No playable video URL found for aweme {aweme_id}')
                 return False
 
-            video_url, video_headers = video_info
             video_path = save_dir / f"{safe_title}_{aweme_id}.mp4"
-            if not await self._download_with_retry(video_url, video_path, session, headers=video_headers):
+            if not await self._download_with_retry(video_candidates, video_path, session):
                 return False
 
             if self.config.get('cover'):
-                cover_url = self._extract_first_url(aweme_data.get('video', {}).get('cover'))
-                if cover_url:
+                cover_urls = self._extract_urls(aweme_data.get('video', {}).get('cover'))
+                if cover_urls:
                     cover_path = save_dir / f"{safe_title}_{aweme_id}_cover.jpg"
                     await self._download_with_retry(
-                        cover_url,
+                        cover_urls,
                         cover_path,
                         session,
                         headers=self._download_headers(),
@@ -152,11 +158,11 @@ class BaseDownloader(ABC):
                     )
 
             if self.config.get('music'):
-                music_url = self._extract_first_url(aweme_data.get('music', {}).get('play_url'))
-                if music_url:
+                music_urls = self._extract_urls(aweme_data.get('music', {}).get('play_url'))
+                if music_urls:
                     music_path = save_dir / f"{safe_title}_{aweme_id}_music.mp3"
                     await self._download_with_retry(
-                        music_url,
+                        music_urls,
                         music_path,
                         session,
                         headers=self._download_headers(),
@@ -164,16 +170,16 @@ class BaseDownloader(ABC):
                     )
 
         elif media_type == 'gallery':
-            image_urls = self._collect_image_urls(aweme_data)
-            if not image_urls:
+            image_candidates = self._collect_image_candidates(aweme_data)
+            if not image_candidates:
                 logger.error(f'No images found for aweme {aweme_id}')
                 return False
 
-            for index, image_url in enumerate(image_urls, start=1):
-                suffix = Path(urlparse(image_url).path).suffix or '.jpg'
+            for index, image_urls in enumerate(image_candidates, start=1):
+                suffix = Path(urlparse(image_urls[0]).path).suffix or '.jpg'
                 image_path = save_dir / f"{safe_title}_{aweme_id}_{index}{suffix}"
                 success = await self._download_with_retry(
-                    image_url,
+                    image_urls,
                     image_path,
                     session,
                     headers=self._download_headers(),
@@ -187,11 +193,11 @@ class BaseDownloader(ABC):
 
         if self.config.get('avatar'):
             author = aweme_data.get('author', {})
-            avatar_url = self._extract_first_url(author.get('avatar_larger'))
-            if avatar_url:
+            avatar_urls = self._extract_urls(author.get('avatar_larger'))
+            if avatar_urls:
                 avatar_path = save_dir / 'avatar.jpg'
                 await self._download_with_retry(
-                    avatar_url,
+                    avatar_urls,
                     avatar_path,
                     session,
                     headers=self._download_headers(),
@@ -221,26 +227,59 @@ class BaseDownloader(ABC):
 
     async def _download_with_retry(
         self,
-        url: str,
+        url: Union[str, Sequence[Union[str, Tuple[str, Dict[str, str]]]]],
         save_path: Path,
         session,
         *,
         headers: Optional[Dict[str, str]] = None,
         optional: bool = False,
     ) -> bool:
-        async def _task():
-            success = await self.file_manager.download_file(url, save_path, session, headers=headers)
+        # Accepts one URL or a list of mirrors (optionally paired with their own headers)
+        raw = [url] if isinstance(url, str) else list(url)
+        candidates = [c if isinstance(c, tuple) else (c, headers) for c in raw if c]
+        # CDN downloads draw from their own bucket, not the API budget
+        await self.rate_limiter.acquire('media')
+        # Health only reorders mirrors inside a preference group; groups keep the order the
+        # caller built. Only the group tried first is raced.
+        ordered: List[Tuple[str, Optional[Dict[str, str]]]] = []
+        for _, group in groupby(candidates, key=lambda c: self._mirror_preference(c[0])):
+            group = list(group)
+            if session is not None and not ordered:
+                ordered.extend(await self.file_manager.race_mirrors(session, group))
+            else:
+                ordered.extend(self.file_manager.order_mirrors(group))
+        candidates = ordered
+
+        async def _task(candidate_url: str, candidate_headers: Optional[Dict[str, str]]):
+            success = await self.file_manager.download_file(
+                candidate_url, save_path, session, headers=candidate_headers
+            )
             if not success:
-                raise RuntimeError(f'Download failed for {url}')
+                raise RuntimeError(f'Download failed for {candidate_url}')
             return True
 
-        try:
-            await self.retry_handler.execute_with_retry(_task)
-            return True
-        except Exception as error:
-            log_fn = logger.warning if optional else logger.error
-            log_fn(f"Download error for {save_path.name}: {error}")
-            return False
+        # Earlier mirrors get a single attempt so a 403/5xx/stall fails over quickly;
+        # the last one keeps the full retry budget
+        for index, (candidate_url, candidate_headers) in enumerate(candidates):
+            try:
+                if index < len(candidates) - 1:
+                    await _task(candidate_url, candidate_headers)
+                else:
+                    await self.retry_handler.execute_with_retry(_task, candidate_url, candidate_headers)
+                return True
+            except Exception as error:
+                if index < len(candidates) - 1:
+                    logger.warning(f"Mirror failed for {save_path.name}, trying next: {error}")
+                    continue
+                log_fn = logger.warning if optional else logger.error
+                log_fn(f"Download error for {save_path.name}: {error}")
+        return False
+
+    @staticmethod
+    def _mirror_preference(url: str) -> Tuple[bool, bool]:
+        # Mirrors the order built by _build_no_watermark_candidates:
+        # douyin.com play URLs before CDN mirrors, watermark=0 first within each
+        return not urlparse(url).netloc.endswith('douyin.com'), 'watermark=0' not in url
 
     def _detect_media_type(self, aweme_data: Dict[str, Any]) -> str:
         if aweme_data.get('image_post_info') or aweme_data.get('images'):
@@ -248,12 +287,18 @@ class BaseDownloader(ABC):
         return 'video'
 
     def _build_no_watermark_url(self, aweme_data: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, str]]]:
+        candidates = self._build_no_watermark_candidates(aweme_data)
+        return candidates[0] if candidates else None
+
+    def _build_no_watermark_candidates(self, aweme_data: Dict[str, Any]) -> List[Tuple[str, Dict[str, str]]]:
         video = aweme_data.get('video', {})
         play_addr = video.get('play_addr', {})
         url_candidates = [c for c in (play_addr.get('url_list') or []) if c]
         url_candidates.sort(key=lambda u: 0 if 'watermark=0' in u else 1)
 
-        fallback_candidate: Optional[Tuple[str, Dict[str, str]]] = None
+        # douyin.com play URLs come first, CDN mirrors are kept as failover candidates
+        primary: List[Tuple[str, Dict[str, str]]] = []
+        mirrors: List[Tuple[str, Dict[str, str]]] = []
 
         for candidate in url_candidates:
             parsed = urlparse(candidate)
@@ -262,14 +307,15 @@ class BaseDownloader(ABC):
             if parsed.netloc.endswith('douyin.com'):
                 if 'X-Bogus=' not in candidate:
                     signed_url, ua = self.api_client.sign_url(candidate)
-                    headers = self._download_headers(user_agent=ua)
-                    return signed_url, headers
-                return candidate, headers
+                    primary.append((signed_url, self._download_headers(user_agent=ua)))
+                else:
+                    primary.append((candidate, headers))
+                continue
 
-            fallback_candidate = (candidate, headers)
+            mirrors.append((candidate, headers))
 
-        if fallback_candidate:
-            return fallback_candidate
+        if primary or mirrors:
+            return primary + mirrors
 
         uri = play_addr.get('uri') or video.get('vid') or video.get('download_addr', {}).get('uri')
         if uri:
@@ -282,28 +328,28 @@ class BaseDownloader(ABC):
                 'source': 'PackSourceEnum_PUBLISH',
             }
             signed_url, ua = self.api_client.build_signed_path('/aweme/v1/play/', params)
-            return signed_url, self._download_headers(user_agent=ua)
+            return [(signed_url, self._download_headers(user_agent=ua))]
 
-        return None
+        return []
 
-    def _collect_image_urls(self, aweme_data: Dict[str, Any]) -> List[str]:
-        image_urls: List[str] = []
+    def _collect_image_candidates(self, aweme_data: Dict[str, Any]) -> List[List[str]]:
+        image_candidates: List[List[str]] = []
         image_post = aweme_data.get('image_post_info', {})
         images = image_post.get('images') or aweme_data.get('images') or []
         for item in images:
-            url_list = item.get('url_list') if isinstance(item, dict) else None
+            url_list = self._extract_urls(item)
             if url_list:
-                image_urls.append(url_list[0])
-        return image_urls
+                image_candidates.append(url_list)
+        return image_candidates
 
     @staticmethod
-    def _extract_first_url(source: Any) -> Optional[str]:
+    def _extract_urls(source: Any) -> List[str]:
         if isinstance(source, dict):
             url_list = source.get('url_list')
-            if isinstance(url_list, list) and url_list:
-                return url_list[0]
-        elif isinstance(source, list) and source:
-            return source[0]
-        elif isinstance(source, str):
-            return source
-        return None
+            if isinstance(url_list, list):
+                return [u for u in url_list if u]
+        elif isinstance(source, list):
+            return [u for u in source if u]
+        elif isinstance(source, str) and source:
+            return [source]
+        return []
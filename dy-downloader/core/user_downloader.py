@@ -35,6 +35,7 @@ class UserDownloader(BaseDownloader):
     async def _download_user_post(self, sec_uid: str, user_info: Dict[str, Any]) -> DownloadResult:
         result = DownloadResult()
         aweme_list = []
+        downloaded_ids = set()
         max_cursor = 0
         has_more = True
 
@@ -45,7 +46,7 @@ class UserDownloader(BaseDownloader):
             latest_time = await self.database.get_latest_aweme_time(user_info.get('uid'))
 
         while has_more:
-            await self.rate_limiter.acquire()
+            await self.rate_limiter.acquire('post')
 
             data = await self.api_client.get_user_post(sec_uid, max_cursor)
             if not data:
@@ -55,6 +56,9 @@ class UserDownloader(BaseDownloader):
             if not aweme_items:
                 break
 
+            # One query per page marks items that are already on disk, so they are never queued
+            downloaded_ids.update(await self._downloaded_ids(aweme_items))
+
             if increase_enabled and latest_time:
                 new_items = [a for a in aweme_items if a.get('create_time', 0) > latest_time]
                 aweme_list.extend(new_items)
@@ -75,21 +79,20 @@ class UserDownloader(BaseDownloader):
         aweme_list = self._limit_count(aweme_list, 'post')
 
         result.total = len(aweme_list)
+        pending_list = [a for a in aweme_list if str(a.get('aweme_id')) not in downloaded_ids]
+        result.skipped += len(aweme_list) - len(pending_list)
 
         author_name = user_info.get('nickname', 'unknown')
 
         async def _process_aweme(item: Dict[str, Any]):
             aweme_id = item.get('aweme_id')
-            if not await self._should_download(aweme_id):
-                return {'status': 'skipped', 'aweme_id': aweme_id}
-
             success = await self._download_aweme_assets(item, author_name, mode='post')
             return {
                 'status': 'success' if success else 'failed',
                 'aweme_id': aweme_id,
             }
 
-        download_results = await self.queue_manager.download_batch(_process_aweme, aweme_list)
+        download_results = await self.queue_manager.download_batch(_process_aweme, pending_list)
 
         for entry in download_results:
             status = entry.get('status') if isinstance(entry, dict) else None
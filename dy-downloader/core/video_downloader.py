@@ -22,7 +22,7 @@ class VideoDownloader(BaseDownloader):
             result.skipped += 1
             return result
 
-        await self.rate_limiter.acquire()
+        await self.rate_limiter.acquire('detail')
 
         aweme_data = await self.api_client.get_video_detail(aweme_id)
         if not aweme_data:
@@ -1,20 +1,59 @@
+import asyncio
+import json
+import zlib
 import aiosqlite
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
 
+# Statements are module constants so sqlite3's per-connection statement cache reuses them
+_INSERT_AWEME_SQL = '''
+    INSERT OR REPLACE INTO aweme
+    (aweme_id, aweme_type, title, author_id, author_name, create_time, download_time, file_path, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_IS_DOWNLOADED_SQL = 'SELECT 1 FROM aweme WHERE aweme_id = ?'
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+_IN_CHUNK_SIZE = 500
+_LATEST_TIME_SQL = 'SELECT MAX(create_time) FROM aweme WHERE author_id = ?'
+_COUNT_BY_AUTHOR_SQL = 'SELECT COUNT(*) FROM aweme WHERE author_id = ?'
+_GET_METADATA_SQL = 'SELECT metadata FROM aweme WHERE aweme_id = ?'
+_INSERT_HISTORY_SQL = '''
+    INSERT INTO download_history
+    (url, url_type, download_time, total_count, success_count, config)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Compressed metadata is stored as a BLOB starting with this marker; plain rows stay TEXT
+_COMPRESSED_MARKER = b'ZL1'
+
+_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA busy_timeout=5000',
+)
+
 
 class Database:
-    def __init__(self, db_path: str = 'dy_downloader.db'):
+    def __init__(self, db_path: str = 'dy_downloader.db', compress: bool = False):
         self.db_path = db_path
+        self.compress = compress
         self._initialized = False
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._init_lock = asyncio.Lock()
 
     async def initialize(self):
-        if self._initialized:
-            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+
+            self._conn = await aiosqlite.connect(self.db_path)
+            for pragma in _PRAGMAS:
+                await self._conn.execute(pragma)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
+            await self._conn.execute('''
                 CREATE TABLE IF NOT EXISTS aweme (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     aweme_id TEXT UNIQUE NOT NULL,
@@ -29,7 +68,7 @@ class Database:
                 )
             ''')
 
-            await db.execute('''
+            await self._conn.execute('''
                 CREATE TABLE IF NOT EXISTS download_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     url TEXT NOT NULL,
@@ -41,75 +80,137 @@ class Database:
                 )
             ''')
 
-            await db.execute('CREATE INDEX IF NOT EXISTS idx_aweme_id ON aweme(aweme_id)')
-            await db.execute('CREATE INDEX IF NOT EXISTS idx_author_id ON aweme(author_id)')
-            await db.execute('CREATE INDEX IF NOT EXISTS idx_download_time ON aweme(download_time)')
+            await self._conn.execute('CREATE INDEX IF NOT EXISTS idx_aweme_id ON aweme(aweme_id)')
+            await self._conn.execute('CREATE INDEX IF NOT EXISTS idx_author_id ON aweme(author_id)')
+            await self._conn.execute('CREATE INDEX IF NOT EXISTS idx_download_time ON aweme(download_time)')
 
-            await db.commit()
+            await self._conn.commit()
+
+            self._initialized = True
 
-        self._initialized = True
+    async def _connection(self) -> aiosqlite.Connection:
+        if not self._initialized:
+            await self.initialize()
+        return self._conn
 
     async def is_downloaded(self, aweme_id: str) -> bool:
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                'SELECT id FROM aweme WHERE aweme_id = ?',
-                (aweme_id,)
-            )
+        db = await self._connection()
+        async with db.execute(_IS_DOWNLOADED_SQL, (aweme_id,)) as cursor:
             result = await cursor.fetchone()
-            return result is not None
+        return result is not None
 
-    async def add_aweme(self, aweme_data: Dict[str, Any]):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT OR REPLACE INTO aweme
-                (aweme_id, aweme_type, title, author_id, author_name, create_time, download_time, file_path, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                aweme_data.get('aweme_id'),
-                aweme_data.get('aweme_type'),
-                aweme_data.get('title'),
-                aweme_data.get('author_id'),
-                aweme_data.get('author_name'),
-                aweme_data.get('create_time'),
-                int(datetime.now().timestamp()),
-                aweme_data.get('file_path'),
-                aweme_data.get('metadata'),
-            ))
+    async def filter_undownloaded(self, aweme_ids: Iterable[str]) -> Set[str]:
+        pending = {str(aweme_id) for aweme_id in aweme_ids if aweme_id}
+        if not pending:
+            return set()
+        db = await self._connection()
+        ids = list(pending)
+        for start in range(0, len(ids), _IN_CHUNK_SIZE):
+            chunk = ids[start:start + _IN_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            async with db.execute(
+                f'SELECT aweme_id FROM aweme WHERE aweme_id IN ({placeholders})', chunk
+            ) as cursor:
+                for (aweme_id,) in await cursor.fetchall():
+                    pending.discard(aweme_id)
+        return pending
+
+    @staticmethod
+    def encode_metadata(metadata: Optional[str], compress: bool):
+        if not compress or metadata is None:
+            return metadata
+        return _COMPRESSED_MARKER + zlib.compress(metadata.encode('utf-8'), 9)
+
+    @staticmethod
+    def decode_metadata(stored) -> Optional[str]:
+        if isinstance(stored, (bytes, memoryview)):
+            stored = bytes(stored)
+            if stored.startswith(_COMPRESSED_MARKER):
+                return zlib.decompress(stored[len(_COMPRESSED_MARKER):]).decode('utf-8')
+            return stored.decode('utf-8')
+        return stored
+
+    async def get_aweme_metadata(self, aweme_id: str) -> Optional[Dict[str, Any]]:
+        db = await self._connection()
+        async with db.execute(_GET_METADATA_SQL, (aweme_id,)) as cursor:
+            result = await cursor.fetchone()
+        metadata = self.decode_metadata(result[0]) if result else None
+        return json.loads(metadata) if metadata else None
+
+    async def migrate_metadata(self, compress: bool = True, batch: int = 500) -> int:
+        db = await self._connection()
+        changed = 0
+        last_id = 0
+        while True:
+            async with db.execute(
+                'SELECT id, metadata FROM aweme WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = []
+            for row_id, stored in rows:
+                encoded = self.encode_metadata(self.decode_metadata(stored), compress)
+                if encoded != stored:
+                    updates.append((encoded, row_id))
+            await db.executemany('UPDATE aweme SET metadata = ? WHERE id = ?', updates)
             await db.commit()
+            changed += len(updates)
+        await db.execute('VACUUM')
+        return changed
+
+    def _aweme_row(self, aweme_data: Dict[str, Any], download_time: int) -> Tuple:
+        return (
+            aweme_data.get('aweme_id'),
+            aweme_data.get('aweme_type'),
+            aweme_data.get('title'),
+            aweme_data.get('author_id'),
+            aweme_data.get('author_name'),
+            aweme_data.get('create_time'),
+            download_time,
+            aweme_data.get('file_path'),
+            self.encode_metadata(aweme_data.get('metadata'), self.compress),
+        )
+
+    async def add_aweme(self, aweme_data: Dict[str, Any]):
+        await self.add_awemes([aweme_data])
+
+    async def add_awemes(self, awemes: Iterable[Dict[str, Any]]):
+        download_time = int(datetime.now().timestamp())
+        rows = [self._aweme_row(aweme_data, download_time) for aweme_data in awemes]
+        if not rows:
+            return
+        db = await self._connection()
+        await db.executemany(_INSERT_AWEME_SQL, rows)
+        await db.commit()
 
     async def get_latest_aweme_time(self, author_id: str) -> Optional[int]:
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                'SELECT MAX(create_time) FROM aweme WHERE author_id = ?',
-                (author_id,)
-            )
+        db = await self._connection()
+        async with db.execute(_LATEST_TIME_SQL, (author_id,)) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result and result[0] else None
+        return result[0] if result and result[0] else None
 
     async def add_history(self, history_data: Dict[str, Any]):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT INTO download_history
-                (url, url_type, download_time, total_count, success_count, config)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                history_data.get('url'),
-                history_data.get('url_type'),
-                int(datetime.now().timestamp()),
-                history_data.get('total_count'),
-                history_data.get('success_count'),
-                history_data.get('config'),
-            ))
-            await db.commit()
+        db = await self._connection()
+        await db.execute(_INSERT_HISTORY_SQL, (
+            history_data.get('url'),
+            history_data.get('url_type'),
+            int(datetime.now().timestamp()),
+            history_data.get('total_count'),
+            history_data.get('success_count'),
+            history_data.get('config'),
+        ))
+        await db.commit()
 
     async def get_aweme_count_by_author(self, author_id: str) -> int:
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                'SELECT COUNT(*) FROM aweme WHERE author_id = ?',
-                (author_id,)
-            )
+        db = await self._connection()
+        async with db.execute(_COUNT_BY_AUTHOR_SQL, (author_id,)) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result else 0
+        return result[0] if result else 0
 
     async def close(self):
-        pass
+        if self._conn is not None:
+            await self._conn.close()
+        self._conn = None
+        self._initialized = False
@@ -1,17 +1,42 @@
+import os
+import time
+import asyncio
 import aiofiles
 import aiohttp
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from utils.validators import sanitize_filename
 from utils.logger import setup_logger
+from control.mirror_health import MirrorHealth
+from control.retry_handler import RetryHandler
 
 logger = setup_logger('FileManager')
 
 
 class FileManager:
-    def __init__(self, base_path: str = './Downloaded'):
+    def __init__(
+        self,
+        base_path: str = './Downloaded',
+        segments: int = 1,
+        segment_threshold: int = 8 * 1024 * 1024,
+        retry_handler: Optional[RetryHandler] = None,
+        mirror_health: Optional[MirrorHealth] = None,
+        stall_timeout: float = 30,
+        mirror_race: int = 2,
+    ):
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        # Segmented mode needs positional writes; it is disabled where os.pwrite is missing
+        self.segments = max(1, int(segments or 1)) if hasattr(os, 'pwrite') else 1
+        self.segment_threshold = int(segment_threshold or 0)
+        self.retry_handler = retry_handler or RetryHandler()
+        self.mirror_health = mirror_health or MirrorHealth()
+        # A mirror that sends no bytes for this long is treated as stalled
+        self.stall_timeout = stall_timeout
+        # How many of the best-scored mirrors are probed concurrently before a download
+        self.mirror_race = max(1, int(mirror_race or 1))
+        # Range sizes learned by a race probe, consumed by the download that follows it
+        self._probed_sizes: Dict[str, Optional[int]] = {}
 
     def get_save_path(self, author_name: str, mode: str = None, aweme_title: str = None,
                      aweme_id: str = None, folderstyle: bool = True) -> Path:
@@ -48,26 +73,189 @@ class FileManager:
             should_close = True
 
         try:
+            if self.segments > 1:
+                if url in self._probed_sizes:
+                    size = self._probed_sizes.pop(url)
+                else:
+                    size = await self._probe_size(session, url, headers)
+                if size and size >= self.segment_threshold:
+                    return await self._download_segmented(session, url, save_path, size, headers)
+
+            started = time.monotonic()
             async with session.get(
                 url,
-                timeout=aiohttp.ClientTimeout(total=300),
+                timeout=aiohttp.ClientTimeout(total=300, sock_read=self.stall_timeout),
                 headers=headers,
             ) as response:
                 if response.status == 200:
+                    self.mirror_health.record_success(url, time.monotonic() - started)
                     async with aiofiles.open(save_path, 'wb') as f:
                         async for chunk in response.content.iter_chunked(8192):
                             await f.write(chunk)
                     return True
                 else:
+                    self.mirror_health.record_failure(url)
                     logger.error(f"Download failed: {url}, status: {response.status}")
                     return False
         except Exception as e:
+            self.mirror_health.record_failure(url)
             logger.error(f"Download error: {url}, error: {e}")
             return False
         finally:
             if should_close:
                 await session.close()
 
+    def order_mirrors(
+        self,
+        candidates: List[Tuple[str, Optional[Dict[str, str]]]],
+    ) -> List[Tuple[str, Optional[Dict[str, str]]]]:
+        return sorted(candidates, key=lambda c: self.mirror_health.score(c[0]))
+
+    async def race_mirrors(
+        self,
+        session: aiohttp.ClientSession,
+        candidates: List[Tuple[str, Optional[Dict[str, str]]]],
+    ) -> List[Tuple[str, Optional[Dict[str, str]]]]:
+        # Order one preference group by health; while the top mirrors are unscored or
+        # scored close together, race a one-byte request against them and put the first
+        # to answer first. Otherwise the remembered scores decide without extra requests.
+        ordered = self.order_mirrors(candidates)
+        racing = ordered[:self.mirror_race]
+        if len(racing) < 2 or not self.mirror_health.should_race([url for url, _ in racing]):
+            return ordered
+
+        tasks = {
+            asyncio.ensure_future(self._probe_mirror(session, url, headers)): index
+            for index, (url, headers) in enumerate(racing)
+        }
+        pending = set(tasks)
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ok, size = task.result()
+                    if ok and winner is None:
+                        winner = tasks[task]
+                        if self.segments > 1:
+                            # The probe doubles as the Range check for the download
+                            self._probed_sizes[racing[winner][0]] = size
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            return self.order_mirrors(candidates)
+        first = racing[winner]
+        return [first] + self.order_mirrors([c for c in candidates if c is not first])
+
+    async def _probe_mirror(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Dict[str, str]],
+    ) -> Tuple[bool, Optional[int]]:
+        probe_headers = {**(headers or {}), 'Range': 'bytes=0-0'}
+        try:
+            started = time.monotonic()
+            async with session.get(
+                url,
+                timeout=aiohttp.ClientTimeout(total=self.stall_timeout),
+                headers=probe_headers,
+            ) as response:
+                if response.status not in (200, 206):
+                    self.mirror_health.record_failure(url)
+                    return False, None
+                self.mirror_health.record_success(url, time.monotonic() - started)
+                if response.status != 206:
+                    return True, None
+                total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+                return True, int(total) if total.isdigit() else None
+        except Exception as e:
+            self.mirror_health.record_failure(url)
+            logger.debug(f"Mirror probe failed: {url}, error: {e}")
+            return False, None
+
+    async def _probe_size(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Dict[str, str]],
+    ) -> Optional[int]:
+        probe_headers = {**(headers or {}), 'Range': 'bytes=0-0'}
+        try:
+            started = time.monotonic()
+            async with session.get(
+                url,
+                timeout=aiohttp.ClientTimeout(total=30),
+                headers=probe_headers,
+            ) as response:
+                if response.status != 206:
+                    return None
+                self.mirror_health.record_success(url, time.monotonic() - started)
+                total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+                return int(total) if total.isdigit() else None
+        except Exception as e:
+            logger.debug(f"Range probe failed: {url}, error: {e}")
+            return None
+
+    @staticmethod
+    def split_ranges(size: int, parts: int) -> List[Tuple[int, int]]:
+        step = -(-size // parts)
+        return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+    async def _download_segmented(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        save_path: Path,
+        size: int,
+        headers: Optional[Dict[str, str]],
+    ) -> bool:
+        temp_path = save_path.with_name(save_path.name + '.part')
+        fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+        try:
+            os.ftruncate(fd, size)
+
+            async def _fetch_segment(offset: List[int], end: int):
+                # offset[0] advances as bytes land, so a retry resumes mid-segment
+                range_headers = {**(headers or {}), 'Range': f'bytes={offset[0]}-{end}'}
+                async with session.get(
+                    url,
+                    timeout=aiohttp.ClientTimeout(total=300, sock_read=self.stall_timeout),
+                    headers=range_headers,
+                ) as response:
+                    if response.status != 206:
+                        raise RuntimeError(f"Segment request returned status {response.status}")
+                    async for chunk in response.content.iter_chunked(65536):
+                        os.pwrite(fd, chunk, offset[0])
+                        offset[0] += len(chunk)
+                if offset[0] != end + 1:
+                    raise RuntimeError(f"Segment incomplete: {offset[0]}/{end + 1}")
+
+            tasks = [
+                asyncio.ensure_future(self.retry_handler.execute_with_retry(_fetch_segment, [start], end))
+                for start, end in self.split_ranges(size, self.segments)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # gather raises on the first failure while siblings keep writing; stop them
+                # before the fd is closed so no pwrite lands on a reused descriptor
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as e:
+            os.close(fd)
+            temp_path.unlink(missing_ok=True)
+            logger.error(f"Segmented download error: {url}, error: {e}")
+            return False
+
+        os.close(fd)
+        os.replace(temp_path, save_path)
+        return True
+
     def file_exists(self, file_path: Path) -> bool:
         return file_path.exists() and file_path.stat().st_size > 0
 
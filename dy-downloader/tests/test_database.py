@@ -36,3 +36,60 @@ async def test_database_aweme_lifecycle(tmp_path):
         'success_count': 1,
         'config': json.dumps({'path': './Downloaded/'}, ensure_ascii=False),
     })
+
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_database_add_awemes_batch_persists_after_close(tmp_path):
+    db_path = tmp_path / "batch.db"
+    database = Database(str(db_path))
+    await database.initialize()
+
+    await database.add_awemes([
+        {'aweme_id': str(i), 'aweme_type': 'video', 'author_id': 'author', 'create_time': 1700000000 + i}
+        for i in range(50)
+    ])
+    await database.close()
+
+    reopened = Database(str(db_path))
+    assert await reopened.is_downloaded('49') is True
+    assert await reopened.get_aweme_count_by_author('author') == 50
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_database_filter_undownloaded(tmp_path):
+    database = Database(str(tmp_path / "filter.db"))
+    await database.initialize()
+
+    await database.add_awemes([
+        {'aweme_id': str(i), 'aweme_type': 'video'} for i in range(0, 1200, 2)
+    ])
+
+    pending = await database.filter_undownloaded(str(i) for i in range(1200))
+
+    assert pending == {str(i) for i in range(1, 1200, 2)}
+    assert await database.filter_undownloaded([]) == set()
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_database_compressed_metadata_roundtrip_and_migration(tmp_path):
+    db_path = tmp_path / "compress.db"
+    metadata = json.dumps({'desc': 'x' * 2000, 'author': {'uid': 'a'}}, ensure_ascii=False)
+
+    plain = Database(str(db_path))
+    await plain.add_aweme({'aweme_id': '1', 'aweme_type': 'video', 'metadata': metadata})
+    await plain.close()
+
+    compressed = Database(str(db_path), compress=True)
+    await compressed.add_aweme({'aweme_id': '2', 'aweme_type': 'video', 'metadata': metadata})
+    assert await compressed.get_aweme_metadata('1') == json.loads(metadata)
+    assert await compressed.get_aweme_metadata('2') == json.loads(metadata)
+
+    assert await compressed.migrate_metadata(compress=True) == 1
+    assert await compressed.get_aweme_metadata('1') == json.loads(metadata)
+    assert await compressed.migrate_metadata(compress=False) == 2
+    assert await compressed.get_aweme_metadata('2') == json.loads(metadata)
+    await compressed.close()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from control import RetryHandler
+from storage import FileManager
+
+
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_get('/file', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f'http://127.0.0.1:{port}/file'
+
+
+def test_split_ranges_covers_file():
+    ranges = FileManager.split_ranges(10, 3)
+
+    assert ranges == [(0, 3), (4, 7), (8, 9)]
+
+
+@pytest.mark.asyncio
+async def test_download_file_segmented_matches_source(tmp_path):
+    payload = os.urandom(256 * 1024 + 7)
+    source = tmp_path / 'source.bin'
+    source.write_bytes(payload)
+    ranges_seen = []
+
+    async def handler(request):
+        ranges_seen.append(request.headers.get('Range'))
+        return web.FileResponse(source)
+
+    runner, url = await _start_server(handler)
+    try:
+        manager = FileManager(
+            str(tmp_path),
+            segments=4,
+            segment_threshold=1024,
+            retry_handler=RetryHandler(max_retries=1),
+        )
+        target = tmp_path / 'out.bin'
+
+        assert await manager.download_file(url, target) is True
+    finally:
+        await runner.cleanup()
+
+    assert target.read_bytes() == payload
+    assert not (tmp_path / 'out.bin.part').exists()
+    assert ranges_seen[0] == 'bytes=0-0'
+    assert len(ranges_seen) == 5
+
+
+@pytest.mark.asyncio
+async def test_download_file_falls_back_without_range_support(tmp_path):
+    payload = b'x' * 4096
+
+    async def handler(request):
+        return web.Response(body=payload)
+
+    runner, url = await _start_server(handler)
+    try:
+        manager = FileManager(str(tmp_path), segments=4, segment_threshold=1)
+        target = tmp_path / 'out.bin'
+
+        assert await manager.download_file(url, target) is True
+    finally:
+        await runner.cleanup()
+
+    assert target.read_bytes() == payload
+
+
+@pytest.mark.asyncio
+async def test_failed_segment_stops_writes_before_close(tmp_path, monkeypatch):
+    payload = os.urandom(256 * 1024)
+    source = tmp_path / 'source.bin'
+    source.write_bytes(payload)
+    events = []
+
+    real_pwrite, real_close = os.pwrite, os.close
+
+    def recording_pwrite(fd, data, offset):
+        events.append(('write', fd))
+        return real_pwrite(fd, data, offset)
+
+    def recording_close(fd):
+        events.append(('close', fd))
+        return real_close(fd)
+
+    monkeypatch.setattr(os, 'pwrite', recording_pwrite)
+    monkeypatch.setattr(os, 'close', recording_close)
+
+    async def handler(request):
+        range_header = request.headers.get('Range', '')
+        if range_header == 'bytes=0-0':
+            return web.FileResponse(source)
+        if range_header.startswith('bytes=0-'):
+            return web.Response(status=500)
+        start, end = (int(v) for v in range_header[len('bytes='):].split('-'))
+        response = web.StreamResponse(status=206)
+        await response.prepare(request)
+        for pos in range(start, end + 1, 4096):
+            await response.write(payload[pos:min(pos + 4096, end + 1)])
+            await asyncio.sleep(0.01)
+        return response
+
+    runner, url = await _start_server(handler)
+    session = aiohttp.ClientSession()
+    try:
+        manager = FileManager(
+            str(tmp_path),
+            segments=4,
+            segment_threshold=1024,
+            retry_handler=RetryHandler(max_retries=1),
+        )
+        target = tmp_path / 'out.bin'
+
+        assert await manager.download_file(url, target, session=session) is False
+        await asyncio.sleep(0.2)
+    finally:
+        await session.close()
+        await runner.cleanup()
+
+    closed = [i for i, event in enumerate(events) if event[0] == 'close']
+    assert closed
+    for index in closed:
+        fd = events[index][1]
+        assert ('write', fd) not in events[index + 1:]
+    assert not (tmp_path / 'out.bin.part').exists()
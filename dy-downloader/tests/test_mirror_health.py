@@ -0,0 +1,184 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from auth import CookieManager
+from config import ConfigLoader
+from control import MirrorHealth, RetryHandler
+from core.api_client import DouyinAPIClient
+from core.video_downloader import VideoDownloader
+from storage import FileManager
+
+
+def test_order_prefers_healthy_fast_hosts():
+    health = MirrorHealth()
+    slow = 'https://slow.example/v.mp4'
+    fast = 'https://fast.example/v.mp4'
+    broken = 'https://broken.example/v.mp4'
+
+    health.record_success(slow, 2.0)
+    health.record_success(fast, 0.1)
+    health.record_failure(broken)
+
+    assert health.order([broken, slow, '', fast, slow]) == [fast, slow, broken]
+
+
+def test_order_keeps_original_order_for_unknown_hosts():
+    health = MirrorHealth()
+    urls = ['https://a.example/x', 'https://b.example/x', 'https://c.example/x']
+
+    assert health.order(urls) == urls
+
+
+@pytest.mark.asyncio
+async def test_download_with_retry_fails_over_to_next_mirror(tmp_path):
+    async def forbidden(_request):
+        return web.Response(status=403)
+
+    async def ok(_request):
+        return web.Response(body=b'payload')
+
+    app = web.Application()
+    app.router.add_get('/forbidden', forbidden)
+    app.router.add_get('/ok', ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    config = ConfigLoader()
+    config.update(path=str(tmp_path))
+    api_client = DouyinAPIClient({})
+    downloader = VideoDownloader(
+        config,
+        api_client,
+        FileManager(str(tmp_path)),
+        CookieManager(str(tmp_path / '.cookies.json')),
+        retry_handler=RetryHandler(max_retries=1),
+    )
+    target = tmp_path / 'out.bin'
+    bad = f'http://127.0.0.1:{port}/forbidden'
+    good = f'http://localhost:{port}/ok'
+    try:
+        session = await api_client.get_session()
+        assert await downloader._download_with_retry([bad, good], target, session) is True
+    finally:
+        await api_client.close()
+        await runner.cleanup()
+
+    assert target.read_bytes() == b'payload'
+    health = downloader.file_manager.mirror_health
+    assert health.order([bad, good]) == [good, bad]
+
+
+@pytest.mark.asyncio
+async def test_race_mirrors_puts_first_responder_first(tmp_path):
+    async def slow(_request):
+        await asyncio.sleep(0.5)
+        return web.Response(body=b'slow')
+
+    async def fast(_request):
+        return web.Response(body=b'fast')
+
+    app = web.Application()
+    app.router.add_get('/slow', slow)
+    app.router.add_get('/fast', fast)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    manager = FileManager(str(tmp_path), mirror_race=2)
+    slow_url = f'http://127.0.0.1:{port}/slow'
+    fast_url = f'http://localhost:{port}/fast'
+    try:
+        async with aiohttp.ClientSession() as session:
+            ordered = await manager.race_mirrors(session, [(slow_url, None), (fast_url, None)])
+    finally:
+        await runner.cleanup()
+
+    assert [url for url, _ in ordered] == [fast_url, slow_url]
+    assert manager.mirror_health.score(fast_url) < manager.mirror_health.default_latency
+
+
+def test_should_race_only_when_unscored_or_close():
+    health = MirrorHealth()
+    fast = 'https://fast.example/v.mp4'
+    slow = 'https://slow.example/v.mp4'
+
+    assert health.should_race([fast, slow]) is True
+
+    health.record_success(fast, 0.1)
+    health.record_success(slow, 0.11)
+    assert health.should_race([fast, slow]) is True
+
+    health.record_success(slow, 3.0)
+    assert health.should_race([fast, slow]) is False
+
+
+@pytest.mark.asyncio
+async def test_race_mirrors_skips_probes_for_known_hosts(tmp_path):
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        return web.Response(body=b'x')
+
+    app = web.Application()
+    app.router.add_get('/{name}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    manager = FileManager(str(tmp_path), mirror_race=2)
+    slow_url = f'http://127.0.0.1:{port}/slow'
+    fast_url = f'http://localhost:{port}/fast'
+    manager.mirror_health.record_success(slow_url, 2.0)
+    manager.mirror_health.record_success(fast_url, 0.1)
+    try:
+        async with aiohttp.ClientSession() as session:
+            ordered = await manager.race_mirrors(session, [(slow_url, None), (fast_url, None)])
+    finally:
+        await runner.cleanup()
+
+    assert [url for url, _ in ordered] == [fast_url, slow_url]
+    assert hits == []
+
+
+@pytest.mark.asyncio
+async def test_download_with_retry_keeps_preference_groups(tmp_path, monkeypatch):
+    config = ConfigLoader()
+    config.update(path=str(tmp_path))
+    file_manager = FileManager(str(tmp_path))
+    downloader = VideoDownloader(
+        config,
+        DouyinAPIClient({}),
+        file_manager,
+        CookieManager(str(tmp_path / '.cookies.json')),
+        retry_handler=RetryHandler(max_retries=1),
+    )
+    play = 'https://www.douyin.com/aweme/v1/play/?video_id=1&watermark=0'
+    mirror_plain = 'https://cdn-a.example/v.mp4'
+    mirror_nowm = 'https://cdn-b.example/v.mp4?watermark=0'
+    # CDN mirrors score far better, but must not jump ahead of their preference group
+    file_manager.mirror_health.record_success(mirror_plain, 0.01)
+    file_manager.mirror_health.record_success(mirror_nowm, 0.5)
+    file_manager.mirror_health.record_failure(play)
+    attempts = []
+
+    async def fake_download(url, save_path, session=None, headers=None):
+        attempts.append(url)
+        return False
+
+    monkeypatch.setattr(file_manager, 'download_file', fake_download)
+
+    assert await downloader._download_with_retry(
+        [play, mirror_nowm, mirror_plain], tmp_path / 'out.mp4', None
+    ) is False
+    assert attempts == [play, mirror_nowm, mirror_plain]
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from control import RateLimiter
+from control.rate_limiter import TokenBucket
+
+
+def test_try_acquire_allows_burst_then_rejects():
+    bucket = TokenBucket(rate=1, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_fifo_order():
+    bucket = TokenBucket(rate=50, capacity=1)
+    order = []
+
+    async def _worker(index):
+        await bucket.acquire()
+        order.append(index)
+
+    started = time.monotonic()
+    await asyncio.gather(*(_worker(i) for i in range(6)))
+
+    assert order == list(range(6))
+    # One token up front, the other five refill at 50/s
+    assert time.monotonic() - started >= 0.08
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_block_queue():
+    bucket = TokenBucket(rate=20, capacity=1)
+    await bucket.acquire()
+
+    waiter = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(bucket.acquire(), timeout=1)
+
+
+def test_endpoint_buckets_are_independent():
+    limiter = RateLimiter(max_per_second=1, burst=1, rates={'media': {'rate': 100, 'burst': 5}})
+
+    assert limiter.try_acquire('post')
+    assert not limiter.try_acquire('post')
+    assert limiter.try_acquire('detail')
+    assert all(limiter.try_acquire('media') for _ in range(5))
@@ -1,4 +1,11 @@
-from utils.xbogus import generate_x_bogus
+import pytest
+
+from utils import signer as signer_module
+from core.api_client import DouyinAPIClient
+from utils.signer import Signer, get_signer, register_signer
+from utils.xbogus import XBogus, generate_x_bogus
+
+DETAIL_URL = "https://www.douyin.com/aweme/v1/web/aweme/detail/?aweme_id=7300000000000000000&aid=6383"
 
 
 def test_generate_x_bogus_appends_parameter():
@@ -9,3 +16,40 @@ def test_generate_x_bogus_appends_parameter():
     assert "X-Bogus=" in signed_url
     assert isinstance(token, str) and len(token) > 10
     assert isinstance(ua, str) and "Mozilla" in ua
+
+
+def test_build_matches_reference_vector(monkeypatch):
+    monkeypatch.setattr(signer_module.time, "time", lambda: 1700000000)
+
+    _, token, _ = XBogus().build(DETAIL_URL)
+
+    assert token == "DFSzswVYiYUANxu0tmWx-e9WX7jK"
+
+
+def test_sign_many_uses_one_timestamp(monkeypatch):
+    monkeypatch.setattr(signer_module.time, "time", lambda: 1700000000)
+    signer = XBogus()
+    urls = [f"{DETAIL_URL}&page={i}" for i in range(3)]
+
+    assert signer.sign_many(urls) == [signer.build(url) for url in urls]
+
+
+def test_registry_rejects_unknown_signer():
+    with pytest.raises(ValueError):
+        get_signer('does-not-exist')
+
+
+def test_api_client_uses_registered_signer():
+    class _StaticSigner(Signer):
+        param_name = 'a_bogus'
+
+        def sign(self, payload, ua=None, form='', timestamp=None):
+            return 'token'
+
+    register_signer('static-test', _StaticSigner)
+    client = DouyinAPIClient({}, signer='static-test')
+
+    signed_url, ua = client.sign_url(DETAIL_URL)
+
+    assert signed_url == f"{DETAIL_URL}&a_bogus=token"
+    assert ua == client.headers['User-Agent']
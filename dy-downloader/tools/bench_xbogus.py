@@ -0,0 +1,108 @@
+import argparse
+import base64
+import hashlib
+import sys
+import timeit
+from pathlib import Path
+from typing import Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.signer import get_signer
+from utils.xbogus import XBogus
+
+DEFAULT_URL = (
+    "https://www.douyin.com/aweme/v1/web/aweme/post/?device_platform=webapp&aid=6383"
+    "&channel=channel_pc_web&sec_user_id=MS4wLjABAAAA&max_cursor=0&count=20"
+)
+_CHARACTER = "Dkdpgh4ZKsQB80/Mfvw36XI1R25-WUAlEi7NLboqYTOPuzmFjJnryx9HVGcaStCe="
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare the X-Bogus signer against the straightforward per-request algorithm.",
+    )
+    parser.add_argument("--url", default=DEFAULT_URL, help="URL to sign")
+    parser.add_argument("--number", type=int, default=2000, help="Signatures per measurement")
+    parser.add_argument("--batch", type=int, default=20, help="URLs per sign_many call")
+    return parser.parse_args(argv)
+
+
+def _rc4(key: bytes, data: bytes) -> bytes:
+    s = list(range(256))
+    j = 0
+    for i in range(256):
+        j = (j + s[i] + key[i % len(key)]) % 256
+        s[i], s[j] = s[j], s[i]
+    out = bytearray()
+    i = j = 0
+    for byte in data:
+        i = (i + 1) % 256
+        j = (j + s[i]) % 256
+        s[i], s[j] = s[j], s[i]
+        out.append(byte ^ s[(s[i] + s[j]) % 256])
+    return bytes(out)
+
+
+def reference_sign(url: str, user_agent: str, timer: int) -> str:
+    # Recomputes every salt, runs both RC4 passes and encodes char by char on each call
+    ua_md5 = hashlib.md5(base64.b64encode(_rc4(b"\x00\x01\x0c", user_agent.encode("ISO-8859-1")))).digest()
+    empty_md5 = hashlib.md5(bytes.fromhex("d41d8cd98f00b204e9800998ecf8427e")).digest()
+    url_md5 = hashlib.md5(hashlib.md5(url.encode("ISO-8859-1")).digest()).digest()
+    ct = 536919696
+    values = [
+        64, 0, 1, 12, url_md5[14], url_md5[15], empty_md5[14], empty_md5[15], ua_md5[14], ua_md5[15],
+        timer >> 24 & 255, timer >> 16 & 255, timer >> 8 & 255, timer & 255,
+        ct >> 24 & 255, ct >> 16 & 255, ct >> 8 & 255, ct & 255,
+    ]
+    checksum = 0
+    for value in values:
+        checksum ^= value
+    values.append(checksum)
+    garbled = bytes([2, 255]) + _rc4(b"\xff", bytes(values))
+    xb = ""
+    for idx in range(0, len(garbled), 3):
+        x3 = (garbled[idx] << 16) | (garbled[idx + 1] << 8) | garbled[idx + 2]
+        xb += (
+            _CHARACTER[(x3 & 16515072) >> 18]
+            + _CHARACTER[(x3 & 258048) >> 12]
+            + _CHARACTER[(x3 & 4032) >> 6]
+            + _CHARACTER[x3 & 63]
+        )
+    return xb
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv or sys.argv[1:])
+    signer = XBogus()
+    timer = 1700000000
+
+    if get_signer().sign(args.url, signer.user_agent, timestamp=timer) != reference_sign(
+        args.url, signer.user_agent, timer
+    ):
+        print("[ERROR] Signer output differs from the reference algorithm", file=sys.stderr)
+        return 1
+
+    urls = [f"{args.url}&page={i}" for i in range(args.batch)]
+    rounds = max(1, args.number // args.batch)
+    results = {
+        "reference": timeit.timeit(lambda: reference_sign(args.url, signer.user_agent, timer), number=args.number)
+        / args.number,
+        "build": timeit.timeit(lambda: signer.build(args.url), number=args.number) / args.number,
+        "generate_x_bogus (new signer per call)": timeit.timeit(
+            lambda: XBogus(signer.user_agent).build(args.url), number=args.number
+        )
+        / args.number,
+        f"sign_many (batch of {args.batch})": timeit.timeit(lambda: signer.sign_many(urls), number=rounds)
+        / (rounds * args.batch),
+    }
+
+    baseline = results["reference"]
+    for name, seconds in results.items():
+        print(f"{name:<40} {seconds * 1e6:9.2f} us/sign  {baseline / seconds:6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
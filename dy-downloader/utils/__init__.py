@@ -2,6 +2,7 @@ from .logger import setup_logger
 from .validators import validate_url, sanitize_filename
 from .helpers import parse_timestamp, format_size
 from .xbogus import generate_x_bogus, XBogus
+from .signer import get_signer, register_signer
 
 __all__ = [
     'setup_logger',
@@ -11,4 +12,6 @@ __all__ = [
     'format_size',
     'generate_x_bogus',
     'XBogus',
+    'get_signer',
+    'register_signer',
 ]
@@ -0,0 +1,179 @@
+# ==============================================================================
+# Copyright (C) 2021 Evil0ctal
+#
+# This file is part of the Douyin_TikTok_Download_API project.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import base64
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Signing entry point shared by every API call. Algorithms are looked up by name
+# (config key `signer`), so a new one (e.g. a_bogus) only needs register_signer().
+#
+# dy-downloader ships standalone, so this is a copy of apiproxy/common/signer.py,
+# which is the canonical source. Keep the Signer interface identical in both so a
+# signer class can be registered in either package unchanged; only defaults differ.
+
+_CHARACTER = "Dkdpgh4ZKsQB80/Mfvw36XI1R25-WUAlEi7NLboqYTOPuzmFjJnryx9HVGcaStCe="
+# The output encoding is plain base64 bit-packing over a shuffled alphabet
+_B64_TRANSLATE = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    _CHARACTER[:64].encode("ascii"),
+)
+_PAYLOAD_SIZE = 19
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+)
+
+
+def _rc4_keystream(key: bytes, length: int) -> bytes:
+    s = bytearray(range(256))
+    j = 0
+    key_len = len(key)
+    for i in range(256):
+        j = (j + s[i] + key[i % key_len]) & 255
+        s[i], s[j] = s[j], s[i]
+
+    stream = bytearray(length)
+    i = j = 0
+    for n in range(length):
+        i = (i + 1) & 255
+        j = (j + s[i]) & 255
+        s[i], s[j] = s[j], s[i]
+        stream[n] = s[(s[i] + s[j]) & 255]
+    return bytes(stream)
+
+
+def rc4_encrypt(key: bytes, data: bytes) -> bytes:
+    stream = _rc4_keystream(key, len(data))
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+
+# The payload is always 19 bytes encrypted with the constant key "\xff", so its RC4
+# keystream is a constant too: encryption is a single XOR against this integer.
+_PAYLOAD_KEYSTREAM = int.from_bytes(_rc4_keystream(b"\xff", _PAYLOAD_SIZE), "big")
+
+
+@lru_cache(maxsize=128)
+def ua_salt(ua_key: bytes, user_agent: str) -> bytes:
+    # Shared by every signer instance: RC4 + base64 + md5 runs once per (key, UA)
+    data = bytes(ord(char) & 255 for char in user_agent)
+    return hashlib.md5(base64.b64encode(rc4_encrypt(ua_key, data))).digest()
+
+
+@lru_cache(maxsize=64)
+def form_salt(form: str) -> bytes:
+    return hashlib.md5(hashlib.md5(form.encode()).digest()).digest()
+
+
+class Signer:
+    # Name of the query parameter the token is appended as
+    param_name = ""
+
+    def sign(self, payload: str, ua: Optional[str] = None, form: str = "", timestamp: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    def sign_params(self, payload: str, ua: Optional[str] = None, form: str = "") -> str:
+        return f"{payload}&{self.param_name}={self.sign(payload, ua, form)}"
+
+    def sign_many(self, payloads: Iterable[str], ua: Optional[str] = None, form: str = "") -> List[str]:
+        # One timestamp for the whole batch, e.g. when prefetching several pages
+        timestamp = int(time.time())
+        return [f"{payload}&{self.param_name}={self.sign(payload, ua, form, timestamp)}" for payload in payloads]
+
+
+class XBogusSigner(Signer):
+    """X-Bogus variants differ only in the version byte, canvas constant and UA RC4 key."""
+
+    param_name = "X-Bogus"
+
+    def __init__(self, version: int, canvas: int, ua_key: bytes, encoding: str = "utf-8",
+                 default_ua: Optional[str] = None):
+        self.version = version
+        self.canvas = canvas.to_bytes(4, "big")
+        self.ua_key = ua_key
+        self.encoding = encoding
+        self.default_ua = default_ua or DEFAULT_USER_AGENT
+        self._prefix = bytes((64, 0, 1, version))
+
+    def sign(self, payload: str, ua: Optional[str] = None, form: str = "", timestamp: Optional[int] = None) -> str:
+        payload_salt = hashlib.md5(hashlib.md5(payload.encode(self.encoding)).digest()).digest()
+        form_hash = form_salt(form)
+        ua_hash = ua_salt(self.ua_key, ua or self.default_ua)
+        if timestamp is None:
+            timestamp = int(time.time())
+
+        data = bytearray(self._prefix)
+        data += bytes((
+            payload_salt[14], payload_salt[15],
+            form_hash[14], form_hash[15],
+            ua_hash[14], ua_hash[15],
+        ))
+        data += (timestamp & 0xFFFFFFFF).to_bytes(4, "big")
+        data += self.canvas
+        checksum = 64
+        for value in data[1:]:
+            checksum ^= value
+        data.append(checksum)
+
+        encrypted = (int.from_bytes(data, "big") ^ _PAYLOAD_KEYSTREAM).to_bytes(_PAYLOAD_SIZE, "big")
+        return base64.b64encode(b"\x02\xff" + encrypted).translate(_B64_TRANSLATE).decode("ascii")
+
+
+_registry: Dict[str, Callable[[], Signer]] = {
+    # Variant this client has always used (ct 536919696, version 12)
+    'xbogus-v12': lambda: XBogusSigner(12, 536919696, b"\x00\x01\x0c", encoding="ISO-8859-1"),
+    # Web variant used by the apiproxy downloader (canvas 1489154074, version 14)
+    'xbogus': lambda: XBogusSigner(14, 1489154074, b"\x00\x01\x0e"),
+}
+_instances: Dict[str, Signer] = {}
+_lock = threading.Lock()
+DEFAULT_SIGNER = 'xbogus-v12'
+_default_name = DEFAULT_SIGNER
+
+
+def register_signer(name: str, factory: Callable[[], Signer]) -> None:
+    with _lock:
+        _registry[name] = factory
+        _instances.pop(name, None)
+
+
+def available_signers() -> List[str]:
+    return sorted(_registry)
+
+
+def set_default_signer(name: str) -> None:
+    global _default_name
+    if name not in _registry:
+        raise ValueError(f"Unknown signer '{name}', available: {', '.join(available_signers())}")
+    _default_name = name
+
+
+def get_signer(name: Optional[str] = None) -> Signer:
+    name = name or _default_name
+    signer = _instances.get(name)
+    if signer is None:
+        with _lock:
+            signer = _instances.get(name)
+            if signer is None:
+                if name not in _registry:
+                    raise ValueError(f"Unknown signer '{name}', available: {', '.join(available_signers())}")
+                signer = _instances[name] = _registry[name]()
+    return signer
@@ -0,0 +1,44 @@
+from apiproxy.douyin.core.adaptive_controller import AIMDController, SCOPE_MEDIA
+from apiproxy.douyin.core.rate_limiter import TokenBucket
+
+
+def _controller():
+    api = TokenBucket(2.0, name='post')
+    media = TokenBucket(20.0, name='media')
+    controller = AIMDController(
+        initial_workers=2,
+        max_workers=8,
+        buckets=[api],
+        media_buckets=[media],
+        decrease_interval=0,
+    )
+    return controller, api, media
+
+
+def test_cdn_successes_do_not_raise_api_rates():
+    controller, api, media = _controller()
+
+    for _ in range(20):
+        controller.record_response(200, scope=SCOPE_MEDIA)
+
+    assert api.rate == 2.0
+    assert media.rate > 20.0
+    assert controller.workers > 2
+
+
+def test_cdn_forbidden_does_not_halve_api_rates():
+    controller, api, media = _controller()
+
+    controller.record_response(403, scope=SCOPE_MEDIA)
+
+    assert api.rate == 2.0
+    assert media.rate == 10.0
+
+
+def test_api_throttle_only_slows_api_buckets():
+    controller, api, media = _controller()
+
+    controller.record_response(429)
+
+    assert api.rate == 1.0
+    assert media.rate == 20.0
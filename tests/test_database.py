@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+from apiproxy.douyin.database import DataBase
+
+
+def _create_v1_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE t_user_post (
+                        id integer primary key autoincrement,
+                        sec_uid varchar(200),
+                        aweme_id integer unique,
+                        rawdata json
+                    );""")
+    conn.executemany(
+        "insert into t_user_post (sec_uid, aweme_id, rawdata) values(?, ?, ?);",
+        [('user', aweme_id, '{}') for aweme_id in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("select name from sqlite_master where type='table';")}
+    finally:
+        conn.close()
+
+
+def test_failed_migration_rolls_back_every_step(tmp_path, monkeypatch):
+    path = str(tmp_path / 'data.db')
+    _create_v1_database(path)
+    broken = dict(DataBase._INDEX_SQL, t_broken="CREATE INDEX ix_broken on t_missing (x);")
+    monkeypatch.setattr(DataBase, '_INDEX_SQL', broken)
+
+    with pytest.raises(sqlite3.OperationalError):
+        DataBase(path)
+
+    tables = _tables(path)
+    assert 't_user_post_old' not in tables
+    assert 'schema_version' not in tables
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("select count(*) from t_user_post;").fetchone()[0] == 5
+        schema = conn.execute("select sql from sqlite_master where name='t_user_post';").fetchone()[0]
+        assert 'aweme_id integer unique' in schema.lower()
+    finally:
+        conn.close()
+
+    monkeypatch.undo()
+    with DataBase(path) as db:
+        assert db.has_user_post('user', 4)
+        db.insert_user_post('other', 4, {})
+        db.flush()
+        assert db.get_user_post('other', 4) is not None
@@ -0,0 +1,53 @@
+import pytest
+
+from apiproxy.douyin.core.queue_manager import PersistentQueue
+from apiproxy.douyin.strategies.base import DownloadTask, TaskType
+
+
+def _task(index: int, priority: int) -> DownloadTask:
+    return DownloadTask(
+        task_id=f't{index}',
+        url=f'https://www.douyin.com/video/{index}',
+        task_type=TaskType.VIDEO,
+        priority=priority,
+        created_at=float(index),
+    )
+
+
+async def _drain(queue: PersistentQueue):
+    order = []
+    while True:
+        task = await queue.get_task(timeout=0)
+        if task is None:
+            return order
+        order.append(task.task_id)
+
+
+@pytest.mark.asyncio
+async def test_window_overflow_keeps_priority_order(tmp_path):
+    queue = PersistentQueue(str(tmp_path / 'queue.db'), window_size=4)
+    try:
+        await queue.add_tasks(_task(i, i % 3) for i in range(9))
+        order = await _drain(queue)
+    finally:
+        queue.close()
+
+    assert order == ['t2', 't5', 't8', 't1', 't4', 't7', 't0', 't3', 't6']
+
+
+@pytest.mark.asyncio
+async def test_new_tasks_do_not_jump_restored_backlog(tmp_path):
+    db_path = str(tmp_path / 'queue.db')
+    queue = PersistentQueue(db_path, window_size=4)
+    await queue.add_tasks(_task(i, 5) for i in range(3))
+    queue.close()
+
+    queue = PersistentQueue(db_path, window_size=4)
+    try:
+        await queue.add_task(_task(10, 0))
+        await queue.add_task(_task(11, 9))
+        order = await _drain(queue)
+    finally:
+        queue.close()
+
+    assert order == ['t11', 't0', 't1', 't2', 't10']
@@ -0,0 +1,39 @@
+import pytest
+
+from apiproxy.douyin.core.rate_limiter import SlidingWindowCounter
+
+
+def test_count_keeps_events_for_the_whole_window():
+    counter = SlidingWindowCounter(1, 10)
+    for _ in range(5):
+        counter.add(100.0)
+
+    # 100.0 // 0.1 == 999 used to drop these a bucket early
+    assert counter.count(100.95) == 5
+    assert counter.count(101.05) == 5
+    assert counter.count(101.15) == 0
+
+
+def test_time_until_below_waits_for_oldest_bucket():
+    counter = SlidingWindowCounter(1, 10)
+    for _ in range(5):
+        counter.add(100.0)
+    counter.add(100.3)
+
+    wait = counter.time_until_below(5, 100.5)
+
+    assert wait == pytest.approx(0.6)
+    assert counter.count(100.5 + wait + 1e-9) == 1
+    assert counter.time_until_below(5, 100.5 + wait + 1e-9) == 0.0
+
+
+def test_paced_requests_never_exceed_limit():
+    counter = SlidingWindowCounter(1, 10)
+    now = 100.0
+    times = []
+    for _ in range(30):
+        now += counter.time_until_below(5, now) + 1e-9
+        counter.add(now)
+        times.append(now)
+
+    assert all(later - earlier >= 1.0 for earlier, later in zip(times, times[5:]))